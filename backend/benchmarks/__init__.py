@@ -0,0 +1,4 @@
+"""Benchmarks for the SecureVote backend hot paths.
+
+Run from the backend directory, e.g. ``python -m benchmarks.detection photos/``.
+"""
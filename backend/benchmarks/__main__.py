@@ -0,0 +1,42 @@
+"""Run the synthetic benchmark suite and write one combined JSON report.
+
+Usage (from the backend directory):
+    python -m benchmarks --output results.json
+    python -m benchmarks --quick --output results.json
+    python -m benchmarks.compare baseline.json results.json
+
+Face detection needs real photos and the models, so it is run separately
+with ``python -m benchmarks.detection``.
+"""
+import argparse
+import sys
+
+from benchmarks import cast_vote, decode, gallery, rpc, storage
+from benchmarks.common import write_results
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the SecureVote benchmark suite")
+    parser.add_argument("--quick", action="store_true", help="Small sizes for a fast smoke run")
+    parser.add_argument("--sizes", type=int, nargs="+", help="Gallery sizes (default 10000 100000 1000000)")
+    parser.add_argument("--skip", nargs="+", default=[], choices=["gallery", "storage", "decode", "cast_vote", "rpc"])
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    args = parser.parse_args(argv)
+
+    sizes = args.sizes or ([10000] if args.quick else [10000, 100000, 1000000])
+    results = {}
+    if "gallery" not in args.skip:
+        results["gallery"] = gallery.run(sizes, ["exact", "ivf"], queries=50 if args.quick else 200)
+    if "storage" not in args.skip:
+        results["storage"] = storage.run(existing=1000 if args.quick else 100000, commits=50 if args.quick else 500)
+    if "decode" not in args.skip:
+        results["decode"] = decode.run(repeats=10 if args.quick else 50)
+    if "cast_vote" not in args.skip:
+        results["cast_vote"] = cast_vote.run(votes=50 if args.quick else 500, concurrency=8)
+    if "rpc" not in args.skip:
+        results["rpc"] = rpc.run(calls=100 if args.quick else 500, concurrency=16, rpc_latency_ms=5)
+
+    write_results("suite", results, args.output)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
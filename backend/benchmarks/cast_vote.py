@@ -0,0 +1,124 @@
+"""End-to-end /cast-vote latency against a local stub chain.
+
+Usage (from the backend directory):
+    python -m benchmarks.cast_vote --votes 500 --concurrency 8 --rpc-latency-ms 20 --output cast_vote.json
+    python -m benchmarks.cast_vote --votes 500 --concurrency 8 --batch-size 50 --output cast_vote_batched.json
+
+Runs in a scratch directory with its own database. The endpoint
+coroutine is awaited directly (no HTTP server), so the numbers cover
+the security checks, signing, outbox commit and vote record. The
+background submitter is then started and the time to drain the outbox
+to confirmed receipts is reported. With ``--batch-size`` above 1 votes
+are sent in castVotes batches, and every confirmed vote must map to its
+own (tx hash, log index) pair.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+from benchmarks.common import summarize, write_results
+from benchmarks.stub_chain import StubChain
+from benchmarks.synthetic import random_unit_vectors, voter_names
+from vote_outbox import CONFIRMED, FAILED
+
+# Well-known development account (anvil/hardhat account 0); never holds real funds
+DEV_ACCOUNT = "0xf39Fd6e51aad88F6F4ce6aB8827279cffFb92266"
+DEV_PRIVATE_KEY = "0xac0974bec39a17e36ba4a6b4d238ff944bacb478cbed5efcae784d7bf4f2ff80"
+DEV_CONTRACT = "0x5FbDB2315678afecb367f032d93F642f64180aa3"
+
+async def cast_votes(main, names, concurrency: int):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def cast(name):
+        async with semaphore:
+            started = time.perf_counter()
+            await main.cast_vote(main.VoteRequest(voter_name=name, candidate_id="candidate-1"))
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(cast(name) for name in names))
+    return latencies, time.perf_counter() - started
+
+def run(votes: int = 200, concurrency: int = 4, rpc_latency_ms: float = 0.0, drain_timeout: float = 120.0,
+        batch_size: int = 1):
+    backend_dir = os.getcwd()
+    chain = StubChain(DEV_ACCOUNT, DEV_CONTRACT, latency_ms=rpc_latency_ms).start()
+    with tempfile.TemporaryDirectory() as workdir:
+        os.environ.update({
+            "VOTER_DB": os.path.join(workdir, "bench.db"),
+            "BLOCKCHAIN_RPC_URL": chain.url,
+            "CONTRACT_ADDRESS": DEV_CONTRACT,
+            "SIGNER_PRIVATE_KEY": DEV_PRIVATE_KEY,
+            "SIGNER_ADDRESS": DEV_ACCOUNT,
+            "TX_POLL_INTERVAL": "0.05",
+            "VOTE_BATCH_SIZE": str(batch_size),
+            "VOTE_BATCH_WAIT_MS": "200",
+        })
+        # main writes the vote journal and looks for legacy pickles in the working directory
+        os.chdir(workdir)
+        try:
+            import main
+            main.blockchain_service.initialize_web3()
+            names = voter_names(votes)
+            main.voter_store.register_voters(zip(names, [None] * votes, random_unit_vectors(votes)))
+
+            latencies, elapsed = asyncio.run(cast_votes(main, names, concurrency))
+            requests_before_drain = chain.requests
+
+            started = time.perf_counter()
+            main.blockchain_service.submitter.start()
+            if main.blockchain_service.batcher is not None:
+                main.blockchain_service.batcher.start()
+            while time.perf_counter() - started < drain_timeout:
+                counts = main.blockchain_service.outbox.counts()
+                if counts.get(CONFIRMED, 0) + counts.get(FAILED, 0) >= votes:
+                    break
+                time.sleep(0.05)
+            drain_seconds = time.perf_counter() - started
+            if main.blockchain_service.batcher is not None:
+                main.blockchain_service.batcher.stop()
+            main.blockchain_service.submitter.stop()
+
+            transactions = [main.blockchain_service.outbox.get(name) for name in names]
+            on_chain = {(tx["tx_hash"], tx["log_index"]) for tx in transactions if tx and tx["status"] == CONFIRMED}
+
+            return {
+                "votes": votes,
+                "concurrency": concurrency,
+                "rpc_latency_ms": rpc_latency_ms,
+                "cast_vote": summarize(latencies),
+                "cast_vote_throughput": votes / elapsed,
+                "rpc_requests_while_casting": requests_before_drain,
+                "drain_seconds": drain_seconds,
+                "drain_throughput": votes / drain_seconds,
+                "batch_size": batch_size,
+                "transactions_sent": chain.transaction_count,
+                "votes_per_transaction": chain.votes_recorded / max(chain.transaction_count, 1),
+                "rpc_requests_total": chain.requests,
+                # Confirmed votes with a distinct (tx hash, log index); must equal votes
+                "votes_mapped": len(on_chain),
+                "outbox": main.blockchain_service.outbox.counts(),
+            }
+        finally:
+            os.chdir(backend_dir)
+            chain.stop()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark /cast-vote against a stub chain")
+    parser.add_argument("--votes", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--rpc-latency-ms", type=float, default=0.0, help="Delay added to every stub RPC response")
+    parser.add_argument("--batch-size", type=int, default=1, help="Votes per castVotes transaction (1 sends castVote)")
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    args = parser.parse_args(argv)
+
+    results = run(args.votes, args.concurrency, args.rpc_latency_ms, batch_size=args.batch_size)
+    write_results("cast_vote", results, args.output)
+    return 0 if results["votes_mapped"] == args.votes else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
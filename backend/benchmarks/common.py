@@ -0,0 +1,50 @@
+import json
+import os
+import platform
+import time
+import numpy as np
+from datetime import datetime
+from typing import Any, Callable, Dict, List
+
+def summarize(latencies: List[float]) -> Dict[str, float]:
+    """Latency percentiles (milliseconds) and throughput for per-call timings in seconds"""
+    if not latencies:
+        return {"count": 0}
+    values = np.asarray(latencies, dtype=np.float64) * 1000.0
+    total = float(values.sum()) / 1000.0
+    return {
+        "count": len(latencies),
+        "mean_ms": float(values.mean()),
+        "p50_ms": float(np.percentile(values, 50)),
+        "p99_ms": float(np.percentile(values, 99)),
+        "max_ms": float(values.max()),
+        "per_second": len(latencies) / total if total > 0 else float("inf"),
+    }
+
+def time_calls(fn: Callable, inputs, warmup: int = 3) -> List[float]:
+    """Call ``fn`` once per input and return the wall time of each call"""
+    inputs = list(inputs)
+    for item in inputs[:warmup]:
+        fn(item)
+    latencies = []
+    for item in inputs:
+        started = time.perf_counter()
+        fn(item)
+        latencies.append(time.perf_counter() - started)
+    return latencies
+
+def write_results(name: str, results: Dict[str, Any], output: str = None) -> Dict[str, Any]:
+    """Print results as JSON and optionally save them for comparison between runs"""
+    report = {
+        "benchmark": name,
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "cpu_count": os.cpu_count(),
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    print(text)
+    if output:
+        with open(output, "w") as file:
+            file.write(text + "\n")
+    return report
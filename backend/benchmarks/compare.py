@@ -0,0 +1,62 @@
+"""Compare two benchmark JSON reports metric by metric.
+
+Usage (from the backend directory):
+    python -m benchmarks.compare baseline.json results.json --threshold 0.1
+
+Prints every p50/p99 latency and throughput found in both reports with
+the relative change, and exits with status 1 if any latency got worse
+(or throughput dropped) by more than ``--threshold``.
+"""
+import argparse
+import json
+import sys
+
+LATENCY_KEYS = ("p50_ms", "p99_ms")
+THROUGHPUT_KEYS = ("per_second",)
+
+def flatten(node, prefix=""):
+    """{'a': {'b': 1}} -> {'a.b': 1} for numeric leaves"""
+    if isinstance(node, dict):
+        values = {}
+        for key, value in node.items():
+            values.update(flatten(value, f"{prefix}.{key}" if prefix else key))
+        return values
+    if isinstance(node, (int, float)) and not isinstance(node, bool):
+        return {prefix: float(node)}
+    return {}
+
+def compare(baseline: dict, current: dict, threshold: float):
+    before, after = flatten(baseline["results"]), flatten(current["results"])
+    rows, regressions = [], []
+    for key in sorted(before.keys() & after.keys()):
+        metric = key.rsplit(".", 1)[-1]
+        if metric not in LATENCY_KEYS + THROUGHPUT_KEYS or before[key] == 0:
+            continue
+        change = (after[key] - before[key]) / before[key]
+        worse = change > threshold if metric in LATENCY_KEYS else change < -threshold
+        rows.append((key, before[key], after[key], change, worse))
+        if worse:
+            regressions.append(key)
+    return rows, regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare two benchmark reports")
+    parser.add_argument("baseline")
+    parser.add_argument("current")
+    parser.add_argument("--threshold", type=float, default=0.1, help="Relative change counted as a regression")
+    args = parser.parse_args(argv)
+
+    with open(args.baseline) as file:
+        baseline = json.load(file)
+    with open(args.current) as file:
+        current = json.load(file)
+
+    rows, regressions = compare(baseline, current, args.threshold)
+    for key, before, after, change, worse in rows:
+        marker = "  REGRESSION" if worse else ""
+        print(f"{key:<60} {before:>12.3f} -> {after:>12.3f} {change:>+8.1%}{marker}")
+    print(f"{len(regressions)} regression(s) beyond {args.threshold:.0%}")
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,58 @@
+"""Image decode latency for raw and base64 uploads at common webcam resolutions.
+
+Usage (from the backend directory):
+    python -m benchmarks.decode --output decode.json
+"""
+import argparse
+import base64
+import io
+import sys
+
+import cv2
+import numpy as np
+
+from benchmarks.common import summarize, time_calls, write_results
+from benchmarks.synthetic import encode_image, synthetic_face_image
+from image_io import base64_to_opencv_image, decode_image_bytes
+
+RESOLUTIONS = {"480p": (640, 480), "720p": (1280, 720), "1080p": (1920, 1080)}
+
+def legacy_base64_decode(image_data: str):
+    """The original PIL-based decode path"""
+    from PIL import Image
+    pil_image = Image.open(io.BytesIO(base64.b64decode(image_data)))
+    return cv2.cvtColor(np.array(pil_image), cv2.COLOR_RGB2BGR)
+
+def run(repeats: int = 50, formats=(".jpg", ".png")):
+    try:
+        import PIL  # noqa: F401
+        has_pil = True
+    except ImportError:
+        has_pil = False
+
+    results = {}
+    for label, (width, height) in RESOLUTIONS.items():
+        for extension in formats:
+            payloads = [encode_image(synthetic_face_image(width, height, seed=i), extension) for i in range(repeats)]
+            encoded = [base64.b64encode(payload).decode("ascii") for payload in payloads]
+            key = f"{label}{extension}"
+            results[key] = {
+                "bytes": int(np.mean([len(payload) for payload in payloads])),
+                "raw": summarize(time_calls(decode_image_bytes, payloads)),
+                "base64": summarize(time_calls(base64_to_opencv_image, encoded)),
+            }
+            if has_pil:
+                results[key]["legacy_pil_base64"] = summarize(time_calls(legacy_base64_decode, encoded))
+    return results
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark image decoding")
+    parser.add_argument("--repeats", type=int, default=50)
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    args = parser.parse_args(argv)
+
+    write_results("decode", run(args.repeats), args.output)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,104 @@
+"""Compare face detection pipelines for latency and agreement with full-frame MTCNN.
+
+Usage (from the backend directory):
+    python -m benchmarks.detection photos/ --empty backgrounds/ --detectors mtcnn haar
+    python -m benchmarks.detection photos/ --detectors mtcnn dnn --dnn-prototxt deploy.prototxt \
+        --dnn-model res10_300x300_ssd_iter_140000.caffemodel --output detection.json
+
+``photos/`` holds images that each contain a face; ``--empty`` holds frames
+without one. Full-frame MTCNN is the reference: for every other pipeline
+the report gives recall on face images, false positives on empty frames,
+and the IoU of its box with the MTCNN box.
+"""
+import argparse
+import os
+import sys
+import time
+
+import cv2
+
+from benchmarks.common import summarize, write_results
+from face_detection import create_detector
+from image_io import downscale_image
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp", ".webp")
+
+def load_images(directory):
+    images = []
+    for filename in sorted(os.listdir(directory)):
+        if os.path.splitext(filename)[1].lower() in IMAGE_EXTENSIONS:
+            image = cv2.imread(os.path.join(directory, filename), cv2.IMREAD_COLOR)
+            if image is not None:
+                images.append(downscale_image(image))
+    return images
+
+def iou(a, b):
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+    overlap_w = max(0, min(ax + aw, bx + bw) - max(ax, bx))
+    overlap_h = max(0, min(ay + ah, by + bh) - max(ay, by))
+    overlap = overlap_w * overlap_h
+    union = aw * ah + bw * bh - overlap
+    return overlap / union if union else 0.0
+
+def run_pipeline(pipeline, images):
+    boxes, latencies = [], []
+    for image in images:
+        started = time.perf_counter()
+        boxes.append(pipeline.detect(image))
+        latencies.append(time.perf_counter() - started)
+    return boxes, latencies
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark face detection pipelines")
+    parser.add_argument("faces", help="Directory of images that contain a face")
+    parser.add_argument("--empty", help="Directory of frames without a face")
+    parser.add_argument("--detectors", nargs="+", default=["mtcnn", "haar"], help="Pipelines to compare")
+    parser.add_argument("--prefilter-width", type=int, default=320)
+    parser.add_argument("--roi-margin", type=float, default=0.4)
+    parser.add_argument("--dnn-prototxt")
+    parser.add_argument("--dnn-model")
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    args = parser.parse_args(argv)
+
+    face_images = load_images(args.faces)
+    empty_images = load_images(args.empty) if args.empty else []
+    if not face_images:
+        print(f"No images found in {args.faces}")
+        return 1
+
+    from model_registry import models
+    models.warm_up()
+    detect_faces = lambda image: models.detector.detect_faces(image)
+
+    detectors = list(dict.fromkeys(["mtcnn"] + args.detectors))
+    results = {}
+    reference = None
+    for kind in detectors:
+        pipeline = create_detector(
+            kind, detect_faces, width=args.prefilter_width, roi_margin=args.roi_margin,
+            prototxt=args.dnn_prototxt, model=args.dnn_model,
+        )
+        face_boxes, face_latencies = run_pipeline(pipeline, face_images)
+        empty_boxes, empty_latencies = run_pipeline(pipeline, empty_images)
+        if reference is None:
+            reference = face_boxes
+
+        overlaps = [iou(box, ref) for box, ref in zip(face_boxes, reference) if box and ref]
+        results[kind] = {
+            "face_latency": summarize(face_latencies),
+            "empty_latency": summarize(empty_latencies),
+            "recall": sum(1 for box in face_boxes if box) / len(face_boxes),
+            "agreement_with_mtcnn": sum(
+                1 for box, ref in zip(face_boxes, reference) if (box is None) == (ref is None)
+            ) / len(face_boxes),
+            "mean_iou_with_mtcnn": sum(overlaps) / len(overlaps) if overlaps else None,
+            "false_positive_rate": (sum(1 for box in empty_boxes if box) / len(empty_boxes)) if empty_boxes else None,
+            "pipeline": pipeline.stats(),
+        }
+
+    write_results("detection", results, args.output)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,110 @@
+"""Stress the double-vote guard with thousands of parallel duplicate /cast-vote calls.
+
+Usage (from the backend directory):
+    python -m benchmarks.double_vote --voters 20 --attempts 200 --threads 8
+
+Every voter gets ``--attempts`` concurrent votes, spread over ``--threads``
+threads that each run their own event loop, against a local stub chain.
+Exactly one vote per voter must succeed; the rest must be rejected as
+duplicates. Exits with status 1 (and prints the report) otherwise.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+
+from fastapi import HTTPException
+
+from benchmarks.cast_vote import DEV_ACCOUNT, DEV_CONTRACT, DEV_PRIVATE_KEY
+from benchmarks.common import write_results
+from benchmarks.stub_chain import StubChain
+from benchmarks.synthetic import random_unit_vectors, voter_names
+
+async def hammer(main, names, attempts: int, outcomes: Counter, lock: threading.Lock):
+    async def cast(name):
+        try:
+            await main.cast_vote(main.VoteRequest(voter_name=name, candidate_id="candidate-1"))
+            result = ("success", name)
+        except HTTPException as e:
+            result = ("rejected", name) if e.status_code == 400 else ("error", name)
+        except Exception:
+            result = ("error", name)
+        with lock:
+            outcomes[result] += 1
+
+    await asyncio.gather(*(cast(name) for name in names for _ in range(attempts)))
+
+def run(voters: int = 20, attempts: int = 200, threads: int = 8):
+    backend_dir = os.getcwd()
+    chain = StubChain(DEV_ACCOUNT, DEV_CONTRACT).start()
+    with tempfile.TemporaryDirectory() as workdir:
+        os.environ.update({
+            "VOTER_DB": os.path.join(workdir, "stress.db"),
+            "BLOCKCHAIN_RPC_URL": chain.url,
+            "CONTRACT_ADDRESS": DEV_CONTRACT,
+            "SIGNER_PRIVATE_KEY": DEV_PRIVATE_KEY,
+            "SIGNER_ADDRESS": DEV_ACCOUNT,
+        })
+        os.chdir(workdir)
+        try:
+            import main
+            main.blockchain_service.initialize_web3()
+            names = voter_names(voters)
+            main.voter_store.register_voters(zip(names, [None] * voters, random_unit_vectors(voters)))
+
+            outcomes: Counter = Counter()
+            lock = threading.Lock()
+            per_thread = max(1, attempts // threads)
+            workers = [
+                threading.Thread(target=lambda: asyncio.run(hammer(main, names, per_thread, outcomes, lock)))
+                for _ in range(threads)
+            ]
+            started = time.perf_counter()
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+            elapsed = time.perf_counter() - started
+
+            successes = Counter({name: outcomes[("success", name)] for name in names})
+            report = {
+                "voters": voters,
+                "attempts": per_thread * threads * voters,
+                "threads": threads,
+                "seconds": elapsed,
+                "successes": sum(successes.values()),
+                "rejected": sum(count for (kind, _), count in outcomes.items() if kind == "rejected"),
+                "errors": sum(count for (kind, _), count in outcomes.items() if kind == "error"),
+                "voters_without_exactly_one_success": sorted(name for name in names if successes[name] != 1),
+                "recorded_votes": main.voter_store.vote_count(),
+                "queued_transactions": sum(main.blockchain_service.outbox.counts().values()),
+            }
+            report["passed"] = (
+                not report["voters_without_exactly_one_success"]
+                and report["errors"] == 0
+                and report["recorded_votes"] == voters
+                and report["queued_transactions"] == voters
+            )
+            return report
+        finally:
+            os.chdir(backend_dir)
+            chain.stop()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fire parallel duplicate votes and check exactly one per voter wins")
+    parser.add_argument("--voters", type=int, default=20)
+    parser.add_argument("--attempts", type=int, default=200, help="Votes per voter, across all threads")
+    parser.add_argument("--threads", type=int, default=8, help="Threads, each with its own event loop")
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    args = parser.parse_args(argv)
+
+    report = run(args.voters, args.attempts, args.threads)
+    write_results("double_vote", report, args.output)
+    return 0 if report["passed"] else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,83 @@
+"""Face matching and duplicate-check latency over synthetic galleries.
+
+Usage (from the backend directory):
+    python -m benchmarks.gallery --sizes 10000 100000 1000000 --index exact ivf --output gallery.json
+"""
+import argparse
+import sys
+import time
+
+import numpy as np
+
+from benchmarks.common import summarize, time_calls, write_results
+from benchmarks.synthetic import perturb, random_unit_vectors, voter_names
+from face_gallery import FaceGallery
+from face_index import create_index
+
+def legacy_best_match(embeddings: dict, query) -> tuple:
+    """The original authentication loop: one cosine distance per registered voter"""
+    best_name, best_score = None, float("inf")
+    for name, embedding in embeddings.items():
+        score = 1.0 - float(np.dot(query, embedding) / (np.linalg.norm(query) * np.linalg.norm(embedding)))
+        if score < best_score:
+            best_name, best_score = name, score
+    return best_name, best_score
+
+def build_gallery(vectors, names, index_kind: str):
+    index = create_index(index_kind, train_threshold=min(20000, len(names)))
+    gallery = FaceGallery(capacity=len(names), index=index)
+    for name, vector in zip(names, vectors):
+        gallery.add(name, vector)
+    return gallery
+
+def run(sizes, index_kinds, queries: int = 200, batch_size: int = 64, legacy_limit: int = 20000, seed: int = 0):
+    results = {}
+    for size in sizes:
+        vectors = random_unit_vectors(size, seed=seed)
+        names = voter_names(size)
+        picks = np.random.default_rng(seed + 1).choice(size, queries, replace=size < queries)
+        genuine = perturb(vectors[picks], seed=seed + 2)
+        impostors = random_unit_vectors(queries, seed=seed + 3)
+
+        for kind in index_kinds:
+            started = time.perf_counter()
+            gallery = build_gallery(vectors, names, kind)
+            build_seconds = time.perf_counter() - started
+
+            matched = [gallery.best_match(query)[0] for query in genuine]
+            batches = [genuine[i:i + batch_size] for i in range(0, queries, batch_size)]
+            batch_latencies = time_calls(gallery.best_matches, batches, warmup=1)
+
+            results[f"{kind}/{size}"] = {
+                "size": size,
+                "index": kind,
+                "build_seconds": build_seconds,
+                "match": summarize(time_calls(gallery.best_match, genuine)),
+                "duplicate_check": summarize(time_calls(lambda q: gallery.find_duplicate(q, 0.3), impostors)),
+                "batch_match": dict(summarize(batch_latencies), batch_size=batch_size),
+                "top1_recall": float(np.mean([name == names[i] for name, i in zip(matched, picks)])),
+            }
+            del gallery
+
+        if size <= legacy_limit:
+            embeddings = dict(zip(names, vectors))
+            results[f"legacy_loop/{size}"] = {
+                "size": size,
+                "match": summarize(time_calls(lambda q: legacy_best_match(embeddings, q), genuine[:20], warmup=1)),
+            }
+    return results
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark face matching over synthetic galleries")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--index", nargs="+", default=["exact"], help="Index kinds: exact, ivf")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    args = parser.parse_args(argv)
+
+    write_results("gallery", run(args.sizes, args.index, args.queries, args.batch_size), args.output)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,168 @@
+"""RPC client throughput, failover and health-probe caching against local stub chains.
+
+Usage (from the backend directory):
+    python -m benchmarks.rpc --calls 500 --concurrency 16 --rpc-latency-ms 20 --output rpc.json
+
+Times ``eth_blockNumber`` through web3's stock ``HTTPProvider``, the
+pooled provider (sequentially and from ``--concurrency`` threads) and
+``AsyncWeb3`` over the async provider (``--concurrency`` coroutines on
+one event loop). Then checks that sync and async calls fail over past an
+endpoint answering 503 and a closed port, and that the health probe
+sends one request per TTL however often it is polled. Exits with
+status 1 if a check fails.
+"""
+import argparse
+import asyncio
+import socket
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from web3 import AsyncWeb3, Web3
+
+from benchmarks.cast_vote import DEV_ACCOUNT, DEV_CONTRACT
+from benchmarks.common import summarize, write_results
+from benchmarks.stub_chain import StubChain
+from rpc_client import AsyncPooledHTTPProvider, PooledHTTPProvider, RPCEndpoints, RPCHealthProbe
+
+def closed_port_url() -> str:
+    """URL of a local port nothing listens on"""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    return f"http://127.0.0.1:{port}"
+
+def with_wall_time(latencies, elapsed: float):
+    result = summarize(latencies)
+    result["wall_seconds"] = elapsed
+    result["calls_per_second"] = len(latencies) / elapsed
+    return result
+
+def sync_calls(web3, calls: int, concurrency: int = 1):
+    def call(_):
+        started = time.perf_counter()
+        web3.eth.block_number
+        return time.perf_counter() - started
+
+    started = time.perf_counter()
+    if concurrency <= 1:
+        latencies = [call(i) for i in range(calls)]
+    else:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            latencies = list(pool.map(call, range(calls)))
+    return with_wall_time(latencies, time.perf_counter() - started)
+
+async def async_calls(web3, calls: int, concurrency: int):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def call():
+        async with semaphore:
+            started = time.perf_counter()
+            await web3.eth.block_number
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(call() for _ in range(calls)))
+    elapsed = time.perf_counter() - started
+    await web3.provider.close()
+    return with_wall_time(latencies, elapsed)
+
+def failover_check(healthy: StubChain, failing: StubChain):
+    urls = [failing.url, closed_port_url(), healthy.url]
+    report = {}
+    sync_endpoints = RPCEndpoints(urls)
+    async_endpoints = RPCEndpoints(urls)
+
+    async def async_block_numbers():
+        web3 = AsyncWeb3(AsyncPooledHTTPProvider(async_endpoints, timeout=2.0))
+        try:
+            return [await web3.eth.block_number for _ in range(5)]
+        finally:
+            await web3.provider.close()
+
+    try:
+        web3 = Web3(PooledHTTPProvider(sync_endpoints, timeout=2.0))
+        [web3.eth.block_number for _ in range(5)]
+        asyncio.run(async_block_numbers())
+        report["error"] = None
+    except Exception as e:
+        report["error"] = str(e)
+    for name, endpoints in (("sync", sync_endpoints), ("async", async_endpoints)):
+        report[f"{name}_failovers"] = endpoints.failovers
+        report[f"{name}_current_endpoint"] = endpoints.current_index
+    # Both clients must settle on the healthy third endpoint after two failovers
+    report["passed"] = report["error"] is None and all(
+        report[f"{name}_failovers"] == 2 and report[f"{name}_current_endpoint"] == 2 for name in ("sync", "async")
+    )
+    return report
+
+def health_check(chain: StubChain, polls: int):
+    endpoints = RPCEndpoints([chain.url])
+    web3 = Web3(PooledHTTPProvider(endpoints))
+    async_web3 = AsyncWeb3(AsyncPooledHTTPProvider(endpoints))
+
+    async def poll_async(probe):
+        results = await asyncio.gather(*(probe.check_async() for _ in range(polls)))
+        await async_web3.provider.close()
+        return all(results)
+
+    async def block_number():
+        return await async_web3.eth.block_number
+
+    before = chain.requests
+    probe = RPCHealthProbe(lambda: web3.eth.block_number, ttl=60.0)
+    sync_healthy = all(probe.check() for _ in range(polls))
+    sync_requests = chain.requests - before
+
+    before = chain.requests
+    async_probe = RPCHealthProbe(lambda: web3.eth.block_number, block_number, ttl=60.0)
+    async_healthy = asyncio.run(poll_async(async_probe))
+    async_requests = chain.requests - before
+
+    return {
+        "polls": polls,
+        "sync_probe_requests": sync_requests,
+        "async_probe_requests": async_requests,
+        "passed": sync_healthy and async_healthy and sync_requests == 1 and async_requests == 1,
+    }
+
+def run(calls: int = 500, concurrency: int = 16, rpc_latency_ms: float = 0.0):
+    chain = StubChain(DEV_ACCOUNT, DEV_CONTRACT, latency_ms=rpc_latency_ms).start()
+    failing = StubChain(DEV_ACCOUNT, DEV_CONTRACT).start()
+    failing.status_code = 503
+    try:
+        endpoints = RPCEndpoints([chain.url])
+        pooled = Web3(PooledHTTPProvider(endpoints, pool_size=concurrency))
+        results = {
+            "rpc_latency_ms": rpc_latency_ms,
+            "stock_sequential": sync_calls(Web3(Web3.HTTPProvider(chain.url)), calls),
+            "pooled_sequential": sync_calls(pooled, calls),
+            "stock_threads": sync_calls(Web3(Web3.HTTPProvider(chain.url)), calls, concurrency),
+            "pooled_threads": sync_calls(pooled, calls, concurrency),
+            "async": asyncio.run(async_calls(
+                AsyncWeb3(AsyncPooledHTTPProvider(endpoints, pool_size=concurrency)), calls, concurrency
+            )),
+            "failover": failover_check(chain, failing),
+            "health_probe": health_check(chain, polls=200),
+        }
+        results["passed"] = results["failover"]["passed"] and results["health_probe"]["passed"]
+        return results
+    finally:
+        chain.stop()
+        failing.stop()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the pooled and async RPC clients and check failover")
+    parser.add_argument("--calls", type=int, default=500, help="eth_blockNumber calls per client")
+    parser.add_argument("--concurrency", type=int, default=16, help="Threads or coroutines calling at once")
+    parser.add_argument("--rpc-latency-ms", type=float, default=0.0, help="Delay added by the stub chain")
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    args = parser.parse_args(argv)
+
+    results = run(args.calls, args.concurrency, args.rpc_latency_ms)
+    write_results("rpc", results, args.output)
+    return 0 if results["passed"] else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
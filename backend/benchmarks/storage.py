@@ -0,0 +1,101 @@
+"""Commit latency for voter registration and vote recording.
+
+Usage (from the backend directory):
+    python -m benchmarks.storage --existing 100000 --commits 500 --output storage.json
+
+The SQLite store is pre-filled with ``--existing`` voters so the numbers
+reflect a realistic roll. The legacy pickle rewrite (the whole registry
+dumped per registration) is measured on the same roll for comparison.
+A poll-opening burst of votes from ``--concurrency`` threads is timed
+with one commit (journal fsync + SQLite transaction) per vote and with
+the group committer.
+"""
+import argparse
+import os
+import pickle
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from benchmarks.common import summarize, time_calls, write_results
+from benchmarks.synthetic import random_unit_vectors, voter_names
+from group_commit import GroupCommitter
+from vote_journal import VoteJournal
+from voter_store import SQLiteVoterStore
+
+def vote_burst(workdir: str, names, concurrency: int, group_commit: bool):
+    """Votes per second when ``concurrency`` threads record votes at once"""
+    tag = "group" if group_commit else "single"
+    store = SQLiteVoterStore(os.path.join(workdir, f"burst-{tag}.db"))
+    journal = VoteJournal(os.path.join(workdir, f"burst-{tag}.jsonl"), fsync=True)
+    voted_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+    def commit_votes(votes):
+        store.record_votes(votes)
+        journal.append_many(votes)
+
+    committer = GroupCommitter(commit_votes, max_batch_size=64 if group_commit else 1)
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(lambda name: committer.commit((name, "candidate-1", None, voted_at)), names))
+    elapsed = time.perf_counter() - started
+    committer.stop()
+    journal.close()
+    return {"votes": len(names), "seconds": elapsed, "votes_per_second": len(names) / elapsed,
+            "mean_batch_size": committer.stats()["mean_batch_size"]}
+
+def run(existing: int = 10000, commits: int = 200, legacy_commits: int = 5, seed: int = 0, concurrency: int = 32):
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        store = SQLiteVoterStore(os.path.join(workdir, "bench.db"))
+        vectors = random_unit_vectors(existing + commits, seed=seed)
+        names = voter_names(existing + commits)
+
+        store.register_voters(zip(names[:existing], [None] * existing, vectors[:existing]))
+
+        new_voters = list(zip(names[existing:], vectors[existing:]))
+        registration = time_calls(
+            lambda voter: store.register_voter(voter[0], f"{voter[0]}@example.com", voter[1]), new_voters, warmup=0
+        )
+        voted_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        votes = time_calls(
+            lambda name: store.record_vote(name, "candidate-1", None, voted_at), names[:commits], warmup=0
+        )
+        results["registration_commit"] = summarize(registration)
+        results["vote_commit"] = summarize(votes)
+        results["is_registered"] = summarize(time_calls(store.is_registered, names[:commits]))
+        results["has_voted"] = summarize(time_calls(store.has_voted, names[:commits]))
+
+        registry = {name: [vector.tolist()] for name, vector in zip(names[:existing], vectors[:existing])}
+        registry_file = os.path.join(workdir, "face_registry.pkl")
+
+        def legacy_register(voter):
+            registry[voter[0]] = [voter[1].tolist()]
+            with open(registry_file, "wb") as file:
+                pickle.dump(registry, file)
+
+        results["legacy_pickle_registration"] = summarize(
+            time_calls(legacy_register, new_voters[:legacy_commits], warmup=0)
+        )
+        results["vote_burst_single_commit"] = vote_burst(workdir, names[:commits], concurrency, group_commit=False)
+        results["vote_burst_group_commit"] = vote_burst(workdir, names[:commits], concurrency, group_commit=True)
+        results["existing_voters"] = existing
+    return results
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark voter registration and vote commits")
+    parser.add_argument("--existing", type=int, default=10000, help="Voters already registered")
+    parser.add_argument("--commits", type=int, default=200, help="Registrations and votes to time")
+    parser.add_argument("--legacy-commits", type=int, default=5, help="Pickle rewrites to time")
+    parser.add_argument("--concurrency", type=int, default=32, help="Threads casting votes in the burst test")
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    args = parser.parse_args(argv)
+
+    results = run(args.existing, args.commits, args.legacy_commits, concurrency=args.concurrency)
+    write_results("storage", results, args.output)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
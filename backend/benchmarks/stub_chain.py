@@ -0,0 +1,200 @@
+"""Minimal in-process JSON-RPC node for exercising the vote path without a real chain.
+
+Answers just the calls the backend makes: chain id, nonces, gas, raw
+transaction submission and receipts (every transaction is mined
+immediately, one block each), plus empty ``eth_call``/``eth_getLogs``
+results. Signed legacy ``castVote``/``castVotes`` transactions are
+decoded and their receipts carry the ``VoteCast``/``VoteSkipped`` logs
+the contract would emit (a repeat voter reverts ``castVote`` and is
+skipped by ``castVotes``). ``latency_ms`` delays every response to mimic a remote RPC;
+setting ``status_code`` to e.g. 503 makes the node answer every request
+with that HTTP error, to exercise failover.
+"""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import rlp
+from eth_abi import decode as abi_decode, encode as abi_encode
+from web3 import Web3
+
+from tally_cache import VOTE_CAST_TOPIC
+from vote_outbox import VOTE_SKIPPED_TOPIC
+
+ZERO_WORD = "0x" + "00" * 32
+CAST_VOTE_SELECTOR = bytes(Web3.keccak(text="castVote(string,string)")[:4])
+CAST_VOTES_SELECTOR = bytes(Web3.keccak(text="castVotes(string[],string[])")[:4])
+
+def decode_votes(raw_tx: str):
+    """(is_batch, [(voter_name, candidate_id)]) from a signed legacy transaction; (False, []) for other calls"""
+    # Legacy transactions are RLP lists: nonce, gasPrice, gas, to, value, data, v, r, s
+    data = rlp.decode(bytes.fromhex(raw_tx[2:] if raw_tx.startswith("0x") else raw_tx))[5]
+    if data[:4] == CAST_VOTE_SELECTOR:
+        return False, [tuple(abi_decode(["string", "string"], data[4:]))]
+    if data[:4] == CAST_VOTES_SELECTOR:
+        voter_names, candidate_ids = abi_decode(["string[]", "string[]"], data[4:])
+        return True, list(zip(voter_names, candidate_ids))
+    return False, []
+
+class StubChain:
+    def __init__(self, account_address: str, contract_address: str, chain_id: int = 31337, latency_ms: float = 0.0):
+        self.account_address = account_address
+        self.contract_address = contract_address
+        self.chain_id = chain_id
+        self.latency = latency_ms / 1000.0
+        self.status_code = 200
+        self._lock = threading.Lock()
+        self._receipts = {}
+        self._voted = set()
+        self._block_number = 0
+        self.requests = 0
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    @property
+    def transaction_count(self) -> int:
+        with self._lock:
+            return len(self._receipts)
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name="stub-chain", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    @property
+    def votes_recorded(self) -> int:
+        with self._lock:
+            return len(self._voted)
+
+    def _vote_logs(self, is_batch: bool, votes, log: dict):
+        """Apply the votes of one transaction; returns (logs, succeeded) as the contract would"""
+        if not is_batch and votes and votes[0][0] in self._voted:
+            return [], False
+        logs = []
+        for voter_name, candidate_id in votes:
+            if voter_name in self._voted:
+                topics = [VOTE_SKIPPED_TOPIC, Web3.keccak(text=voter_name)]
+                data = abi_encode(["string"], ["Voter has already cast their vote"])
+            else:
+                self._voted.add(voter_name)
+                topics = [VOTE_CAST_TOPIC, Web3.keccak(text=voter_name), Web3.keccak(text=candidate_id)]
+                data = abi_encode(["uint256", "bytes32"], [int(time.time()), bytes(Web3.keccak(text=voter_name))])
+            logs.append(dict(log, topics=[topic.hex() for topic in topics], data="0x" + data.hex(),
+                             logIndex=hex(len(logs))))
+        return logs, True
+
+    def _send_raw_transaction(self, raw_tx: str) -> str:
+        tx_hash = Web3.keccak(hexstr=raw_tx).hex()
+        is_batch, votes = decode_votes(raw_tx)
+        with self._lock:
+            if tx_hash not in self._receipts:
+                self._block_number += 1
+                block_hash = "0x" + f"{self._block_number:064x}"
+                logs, succeeded = self._vote_logs(is_batch, votes, {
+                    "address": self.contract_address,
+                    "blockHash": block_hash,
+                    "blockNumber": hex(self._block_number),
+                    "transactionHash": tx_hash,
+                    "transactionIndex": "0x0",
+                    "removed": False,
+                })
+                self._receipts[tx_hash] = {
+                    "transactionHash": tx_hash,
+                    "transactionIndex": "0x0",
+                    "blockHash": block_hash,
+                    "blockNumber": hex(self._block_number),
+                    "from": self.account_address,
+                    "to": self.contract_address,
+                    "cumulativeGasUsed": "0x186a0",
+                    "gasUsed": "0x186a0",
+                    "effectiveGasPrice": "0x3b9aca00",
+                    "contractAddress": None,
+                    "logs": logs,
+                    "logsBloom": "0x" + "00" * 256,
+                    "status": "0x1" if succeeded else "0x0",
+                    "type": "0x0",
+                }
+        return tx_hash
+
+    def handle(self, method: str, params: list):
+        with self._lock:
+            self.requests += 1
+            block_number = self._block_number
+            sent = len(self._receipts)
+        if method == "eth_chainId":
+            return hex(self.chain_id)
+        if method == "web3_clientVersion":
+            return "StubChain/v0.1"
+        if method == "net_version":
+            return str(self.chain_id)
+        if method == "eth_blockNumber":
+            return hex(block_number)
+        if method == "eth_getTransactionCount":
+            return hex(sent)
+        if method == "eth_gasPrice":
+            return hex(Web3.to_wei(1, "gwei"))
+        if method == "eth_estimateGas":
+            return hex(100000)
+        if method == "eth_sendRawTransaction":
+            return self._send_raw_transaction(params[0])
+        if method == "eth_getTransactionReceipt":
+            with self._lock:
+                return self._receipts.get(params[0])
+        if method == "eth_call":
+            return ZERO_WORD
+        if method == "eth_getLogs":
+            return []
+        raise KeyError(method)
+
+    def _respond(self, request: dict) -> dict:
+        try:
+            return {"jsonrpc": "2.0", "id": request.get("id"),
+                    "result": self.handle(request["method"], request.get("params", []))}
+        except KeyError as e:
+            return {"jsonrpc": "2.0", "id": request.get("id"),
+                    "error": {"code": -32601, "message": f"Method not found: {e}"}}
+
+    def _handler(self):
+        chain = self
+
+        class Handler(BaseHTTPRequestHandler):
+            # Keep connections open between requests, as real nodes do
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+                if chain.latency:
+                    time.sleep(chain.latency)
+                if chain.status_code != 200:
+                    with chain._lock:
+                        chain.requests += 1
+                    self.send_response(chain.status_code)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                if isinstance(payload, list):
+                    response = [chain._respond(request) for request in payload]
+                else:
+                    response = chain._respond(payload)
+                body = json.dumps(response).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
@@ -0,0 +1,46 @@
+import cv2
+import numpy as np
+
+from face_gallery import EMBEDDING_DIM
+
+def random_unit_vectors(count: int, dim: int = EMBEDDING_DIM, seed: int = 0) -> np.ndarray:
+    """``count`` random L2-normalized float32 vectors (stand-ins for FaceNet embeddings)"""
+    rng = np.random.default_rng(seed)
+    vectors = rng.standard_normal((count, dim), dtype=np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors
+
+def perturb(vectors: np.ndarray, noise: float = 0.2, seed: int = 1) -> np.ndarray:
+    """Noisy copies of ``vectors``, like a second photo of the same voter"""
+    rng = np.random.default_rng(seed)
+    noisy = vectors + rng.standard_normal(vectors.shape, dtype=np.float32) * (noise / np.sqrt(vectors.shape[1]))
+    return noisy / np.linalg.norm(noisy, axis=1, keepdims=True)
+
+def voter_names(count: int, prefix: str = "voter") -> list:
+    return [f"{prefix}-{i:07d}" for i in range(count)]
+
+def synthetic_face_image(width: int = 640, height: int = 480, seed: int = 0) -> np.ndarray:
+    """A BGR frame with a drawn face (skin ellipse, eyes, mouth) on a noisy background"""
+    rng = np.random.default_rng(seed)
+    image = rng.integers(40, 200, (height, width, 3), dtype=np.uint8)
+    image = cv2.GaussianBlur(image, (0, 0), 3)
+
+    cx, cy = width // 2 + int(rng.integers(-width // 10, width // 10)), height // 2
+    face_w, face_h = int(min(width, height) * 0.22), int(min(width, height) * 0.3)
+    cv2.ellipse(image, (cx, cy), (face_w, face_h), 0, 0, 360, (140, 170, 210), -1)
+    for side in (-1, 1):
+        eye = (cx + side * face_w // 2, cy - face_h // 4)
+        cv2.ellipse(image, eye, (face_w // 6, face_h // 12), 0, 0, 360, (255, 255, 255), -1)
+        cv2.circle(image, eye, face_h // 16, (40, 30, 20), -1)
+        cv2.line(image, (eye[0] - face_w // 6, eye[1] - face_h // 6),
+                 (eye[0] + face_w // 6, eye[1] - face_h // 6), (50, 40, 30), max(2, face_h // 40))
+    cv2.line(image, (cx, cy - face_h // 8), (cx, cy + face_h // 6), (110, 130, 170), max(2, face_h // 40))
+    cv2.ellipse(image, (cx, cy + face_h // 2), (face_w // 3, face_h // 10), 0, 0, 180, (60, 60, 150), max(2, face_h // 30))
+    return image
+
+def encode_image(image: np.ndarray, extension: str = ".jpg", quality: int = 90) -> bytes:
+    params = [cv2.IMWRITE_JPEG_QUALITY, quality] if extension in (".jpg", ".jpeg") else []
+    ok, encoded = cv2.imencode(extension, image, params)
+    if not ok:
+        raise ValueError(f"Could not encode image as {extension}")
+    return encoded.tobytes()
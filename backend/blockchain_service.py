@@ -1,7 +1,9 @@
 
 import os
+import requests
+from concurrent.futures import ThreadPoolExecutor
 from web3 import Web3
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Iterable, List, Optional, Set
 import json
 import logging
 
@@ -59,6 +61,14 @@ class BlockchainService:
         ]
         
         self.contract = None
+        
+        # Batched hasVoted lookups
+        self.batch_chunk_size = int(os.environ.get("RPC_BATCH_SIZE", "200"))
+        self.batch_concurrency = int(os.environ.get("RPC_BATCH_CONCURRENCY", "4"))
+        self._rpc_session = requests.Session()
+        
+        # Voters confirmed on chain; votes are irreversible so positives never expire
+        self.confirmed_voters: Set[str] = set()
     
     def _initialize_contract(self):
         """Initialize the smart contract instance"""
@@ -150,15 +160,86 @@ class BlockchainService:
     
     def has_voted_on_blockchain(self, voter_name: str) -> bool:
         """Check if voter has voted on blockchain"""
+        if voter_name in self.confirmed_voters:
+            return True
         try:
             if not self.contract:
                 return False
             
-            return self.contract.functions.hasVoted(voter_name).call()
+            voted = self.contract.functions.hasVoted(voter_name).call()
+            if voted:
+                self.confirmed_voters.add(voter_name)
+            return voted
         except Exception as e:
             logger.error(f"Error checking vote status: {str(e)}")
             return False
     
+    def _has_voted_batch(self, names: List[str]) -> Dict[str, bool]:
+        """Resolve one chunk of hasVoted calls with a single JSON-RPC batch request"""
+        payload = [
+            {
+                "jsonrpc": "2.0",
+                "id": i,
+                "method": "eth_call",
+                "params": [
+                    {"to": self.contract.address, "data": self.contract.encodeABI(fn_name="hasVoted", args=[name])},
+                    "latest"
+                ]
+            }
+            for i, name in enumerate(names)
+        ]
+        response = self._rpc_session.post(self.rpc_url, json=payload, timeout=30)
+        if 400 <= response.status_code < 500:
+            # Node (or a proxy in front of it) refuses batch requests
+            return self._has_voted_each(names)
+        response.raise_for_status()
+        replies = response.json()
+        
+        if not isinstance(replies, list):
+            # Node does not support batch requests and answered with a single error object
+            return self._has_voted_each(names)
+        
+        results = {}
+        for reply in replies:
+            name = names[reply["id"]]
+            if "error" in reply:
+                raise RuntimeError(f"hasVoted({name}) failed: {reply['error']}")
+            if reply.get("result") in (None, "0x"):
+                # No return data: nothing deployed at the contract address, or the call did not run
+                raise RuntimeError(f"hasVoted({name}) failed: empty result")
+            results[name] = int(reply["result"], 16) != 0
+        
+        missing = [name for name in names if name not in results]
+        if missing:
+            # Some nodes drop entries from large batches rather than fail the request
+            results.update(self._has_voted_each(missing))
+        return results
+    
+    def _has_voted_each(self, names: List[str]) -> Dict[str, bool]:
+        """One hasVoted call per voter, for nodes without JSON-RPC batch support"""
+        return {name: bool(self.contract.functions.hasVoted(name).call()) for name in names}
+    
+    def has_voted_many(self, voter_names: Iterable[str]) -> Dict[str, bool]:
+        """Check many voters on chain using chunked JSON-RPC batches.
+        
+        Chunks of ``batch_chunk_size`` calls are sent ``batch_concurrency`` at a
+        time; voters already confirmed on chain are answered from the cache.
+        """
+        names = list(dict.fromkeys(voter_names))
+        results = {name: True for name in names if name in self.confirmed_voters}
+        if not self.contract:
+            results.update({name: False for name in names if name not in results})
+            return results
+        
+        pending = [name for name in names if name not in results]
+        chunks = [pending[i:i + self.batch_chunk_size] for i in range(0, len(pending), self.batch_chunk_size)]
+        with ThreadPoolExecutor(max_workers=self.batch_concurrency) as pool:
+            for chunk_results in pool.map(self._has_voted_batch, chunks):
+                results.update(chunk_results)
+        
+        self.confirmed_voters.update(name for name in pending if results.get(name))
+        return results
+    
     def get_blockchain_results(self) -> Dict[str, Any]:
         """Get voting results from blockchain"""
         try:
@@ -0,0 +1,190 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+# Bookkeeping per entry on top of the embedding itself (key, box, list, dict slot)
+ENTRY_OVERHEAD_BYTES = 256
+
+class FaceResult(NamedTuple):
+    """Detection and embedding for one image; both None when no face was found"""
+    embedding: Optional[np.ndarray]
+    box: Optional[Tuple[int, int, int, int]]
+
+class _Pending:
+    """A computation other threads with the same image wait on instead of repeating it"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Optional[FaceResult] = None
+
+class EmbeddingCache:
+    """Bounded LRU/TTL cache of face results keyed by a hash of the uploaded image bytes.
+
+    Absorbs client retries that resend byte-identical images: a hit skips
+    decoding, MTCNN and FaceNet. Concurrent requests for the same image
+    share one computation. Entries expire after ``ttl`` seconds and the
+    least recently used are evicted to stay under ``max_bytes``. Entries
+    tagged with a voter name are dropped by ``invalidate_voter`` so a
+    deleted voter's face data does not linger. The cache is per process;
+    ``deletion_version`` reads a deletion counter shared by every worker
+    (the voter store's), and when it moves, each lookup first drops all
+    tagged entries, since the deleting worker cannot reach this cache.
+    ``max_bytes`` 0 disables caching.
+    """
+
+    def __init__(self, max_bytes: int = 8 * 1024 * 1024, ttl: float = 300.0,
+                 deletion_version: Optional[Callable[[], int]] = None):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.deletion_version = deletion_version
+        self._deletion_version: Optional[int] = None
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, list]" = OrderedDict()  # key -> [result, expires_at, size, voter]
+        self._pending: Dict[str, _Pending] = {}
+        self._bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._coalesced = 0
+        self._evictions = 0
+        self._expired = 0
+        self._invalidations = 0
+
+    @staticmethod
+    def key(image_bytes: bytes) -> str:
+        return hashlib.blake2b(image_bytes, digest_size=16).hexdigest()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def _drop(self, key: str):
+        entry = self._entries.pop(key)
+        self._bytes -= entry[2]
+
+    def _sync_deletions(self):
+        """Drop tagged entries if a voter was deleted, by any worker, since the last lookup"""
+        if self.deletion_version is None or not self.enabled:
+            return
+        version = self.deletion_version()
+        with self._lock:
+            if version == self._deletion_version:
+                return
+            self._deletion_version = version
+            keys = [key for key, entry in self._entries.items() if entry[3] is not None]
+            for key in keys:
+                self._drop(key)
+            self._invalidations += len(keys)
+
+    def _lookup(self, key: str) -> Optional[FaceResult]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[1] <= time.monotonic():
+            self._drop(key)
+            self._expired += 1
+            return None
+        self._entries.move_to_end(key)
+        return entry[0]
+
+    def get(self, key: str) -> Optional[FaceResult]:
+        self._sync_deletions()
+        with self._lock:
+            result = self._lookup(key)
+            if result is None:
+                self._misses += 1
+            else:
+                self._hits += 1
+            return result
+
+    def put(self, key: str, result: FaceResult) -> FaceResult:
+        if not self.enabled:
+            return result
+        size = ENTRY_OVERHEAD_BYTES + (result.embedding.nbytes if result.embedding is not None else 0)
+        with self._lock:
+            voter = None
+            if key in self._entries:
+                voter = self._entries[key][3]
+                self._drop(key)
+            self._entries[key] = [result, time.monotonic() + self.ttl, size, voter]
+            self._bytes += size
+            while self._bytes > self.max_bytes and self._entries:
+                self._drop(next(iter(self._entries)))
+                self._evictions += 1
+        return result
+
+    def get_or_compute(self, image_bytes: bytes, compute: Callable[[], FaceResult]) -> FaceResult:
+        """Cached result for ``image_bytes``, else ``compute()`` it once even under concurrent retries"""
+        if not self.enabled:
+            return compute()
+        self._sync_deletions()
+        key = self.key(image_bytes)
+        with self._lock:
+            result = self._lookup(key)
+            if result is not None:
+                self._hits += 1
+                return result
+            pending = self._pending.get(key)
+            owner = pending is None
+            if owner:
+                pending = self._pending[key] = _Pending()
+                self._misses += 1
+
+        if not owner:
+            pending.done.wait()
+            if pending.result is not None:
+                with self._lock:
+                    self._coalesced += 1
+                return pending.result
+            # The first computation failed; try again here
+            return compute()
+
+        try:
+            pending.result = self.put(key, compute())
+            return pending.result
+        finally:
+            with self._lock:
+                self._pending.pop(key, None)
+            pending.done.set()
+
+    def tag(self, image_bytes: bytes, voter_name: str):
+        """Associate a cached image with the voter it was registered or matched as"""
+        key = self.key(image_bytes)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry[3] = voter_name
+
+    def invalidate_voter(self, voter_name: str) -> int:
+        """Drop every entry tagged with ``voter_name``; returns how many were removed"""
+        with self._lock:
+            keys = [key for key, entry in self._entries.items() if entry[3] == voter_name]
+            for key in keys:
+                self._drop(key)
+            self._invalidations += len(keys)
+            return len(keys)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": self._hits / lookups if lookups else 0.0,
+                "coalesced": self._coalesced,
+                "evictions": self._evictions,
+                "expired": self._expired,
+                "invalidations": self._invalidations,
+            }
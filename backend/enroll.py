@@ -0,0 +1,71 @@
+"""Offline bulk enrollment of voters from a photo directory or CSV file.
+
+Usage (from the backend directory):
+    python enroll.py photos/                 # one image per voter, named <voter name>.jpg
+    python enroll.py roll.csv                # columns: name, image_path (relative to the CSV)
+"""
+import argparse
+import csv
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+
+from image_io import downscale_image
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp", ".webp")
+
+def read_image(path):
+    """Read an image as BGR, downscaled like API uploads; None if unreadable"""
+    image = cv2.imread(path, cv2.IMREAD_COLOR)
+    return downscale_image(image) if image is not None else None
+
+def load_entries(source):
+    """Return [(voter_name, image_path)] from a directory or CSV file"""
+    if os.path.isdir(source):
+        entries = []
+        for filename in sorted(os.listdir(source)):
+            stem, extension = os.path.splitext(filename)
+            if extension.lower() in IMAGE_EXTENSIONS:
+                entries.append((stem, os.path.join(source, filename)))
+        return entries
+
+    base_dir = os.path.dirname(os.path.abspath(source))
+    with open(source, newline="") as file:
+        return [
+            (row["name"].strip(), os.path.join(base_dir, row["image_path"].strip()))
+            for row in csv.DictReader(file)
+        ]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk-enroll voters into the SecureVote face registry")
+    parser.add_argument("source", help="Directory of <name>.jpg images or CSV with name,image_path columns")
+    parser.add_argument("--batch-size", type=int, default=64, help="Voters per FaceNet batch and registry commit")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Parallel image decoders")
+    args = parser.parse_args(argv)
+
+    entries = load_entries(args.source)
+    if not entries:
+        print(f"No voters found in {args.source}")
+        return 1
+
+    # Imported here so --help does not pay for loading the models
+    from main import enroll_voters
+
+    registered = 0
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        for start in range(0, len(entries), args.batch_size):
+            chunk = entries[start:start + args.batch_size]
+            images = list(pool.map(read_image, [path for _, path in chunk]))
+            results = enroll_voters([name for name, _ in chunk], images)
+            for result in results:
+                status = "OK  " if result["success"] else "FAIL"
+                print(f"{status} {result['name']}: {result['message']}")
+            registered += sum(1 for result in results if result["success"])
+
+    print(f"Registered {registered} of {len(entries)} voters")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
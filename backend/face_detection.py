@@ -0,0 +1,206 @@
+import os
+import threading
+import logging
+import cv2
+import numpy as np
+from typing import Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+Box = Tuple[int, int, int, int]  # x, y, width, height
+
+def _largest(boxes: List[Box]) -> Optional[Box]:
+    return max(boxes, key=lambda box: box[2] * box[3]) if boxes else None
+
+def _clamp(box: Box, shape) -> Optional[Box]:
+    """Clip a box to the image; MTCNN can return negative corners"""
+    height, width = shape[:2]
+    x, y, w, h = box
+    x0, y0 = max(0, int(x)), max(0, int(y))
+    x1, y1 = min(width, int(x + w)), min(height, int(y + h))
+    if x1 <= x0 or y1 <= y0:
+        return None
+    return x0, y0, x1 - x0, y1 - y0
+
+class HaarPrefilter:
+    """OpenCV Haar cascade run on a small grayscale copy of the frame"""
+
+    kind = "haar"
+
+    def __init__(self, width: int = 320, cascade_path: str = None,
+                 scale_factor: float = 1.1, min_neighbors: int = 4):
+        cascade_path = cascade_path or os.path.join(cv2.data.haarcascades, "haarcascade_frontalface_default.xml")
+        self.width = width
+        self.scale_factor = scale_factor
+        self.min_neighbors = min_neighbors
+        self._cascade_path = cascade_path
+        # CascadeClassifier is not thread-safe, so each inference thread gets its own
+        self._local = threading.local()
+
+    def _cascade(self):
+        cascade = getattr(self._local, "cascade", None)
+        if cascade is None:
+            cascade = cv2.CascadeClassifier(self._cascade_path)
+            if cascade.empty():
+                raise ValueError(f"Could not load Haar cascade {self._cascade_path}")
+            self._local.cascade = cascade
+        return cascade
+
+    def propose(self, image) -> List[Box]:
+        height, width = image.shape[:2]
+        scale = min(1.0, self.width / width)
+        small = cv2.resize(image, (round(width * scale), round(height * scale)), interpolation=cv2.INTER_AREA) \
+            if scale < 1.0 else image
+        gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        gray = cv2.equalizeHist(gray)
+        faces = self._cascade().detectMultiScale(
+            gray, scaleFactor=self.scale_factor, minNeighbors=self.min_neighbors, minSize=(24, 24)
+        )
+        return [tuple(int(round(v / scale)) for v in face) for face in faces]
+
+class DNNPrefilter:
+    """OpenCV's ResNet-10 SSD face detector (res10_300x300 Caffe model)"""
+
+    kind = "dnn"
+
+    def __init__(self, prototxt_path: str, model_path: str, confidence: float = 0.5):
+        self.prototxt_path = prototxt_path
+        self.model_path = model_path
+        self.confidence = confidence
+        self._local = threading.local()
+
+    def _net(self):
+        net = getattr(self._local, "net", None)
+        if net is None:
+            net = cv2.dnn.readNetFromCaffe(self.prototxt_path, self.model_path)
+            self._local.net = net
+        return net
+
+    def propose(self, image) -> List[Box]:
+        height, width = image.shape[:2]
+        blob = cv2.dnn.blobFromImage(cv2.resize(image, (300, 300)), 1.0, (300, 300), (104.0, 177.0, 123.0))
+        net = self._net()
+        net.setInput(blob)
+        detections = net.forward()[0, 0]
+        boxes = []
+        for detection in detections:
+            if detection[2] < self.confidence:
+                continue
+            x0, y0, x1, y1 = detection[3:7] * np.array([width, height, width, height])
+            boxes.append((int(x0), int(y0), int(x1 - x0), int(y1 - y0)))
+        return boxes
+
+class FaceDetectionPipeline:
+    """Finds the largest face in a frame, optionally behind a cheap pre-filter.
+
+    Without a pre-filter every frame goes through full-frame MTCNN. With
+    one, frames where the pre-filter finds nothing are rejected outright,
+    and MTCNN only refines a margin-padded crop around the largest
+    proposal. If MTCNN finds nothing in the crop it falls back to the
+    full frame, so the pre-filter can only cost recall on frames it
+    rejects.
+    """
+
+    def __init__(self, detect_faces: Callable, prefilter=None, roi_margin: float = 0.4,
+                 fallback_to_full_frame: bool = True):
+        self.detect_faces = detect_faces
+        self.prefilter = prefilter
+        self.roi_margin = roi_margin
+        self.fallback_to_full_frame = fallback_to_full_frame
+        self._lock = threading.Lock()
+        self._counts = {"frames": 0, "rejected": 0, "roi_hits": 0, "fallbacks": 0, "tracked": 0}
+
+    @property
+    def kind(self) -> str:
+        return self.prefilter.kind if self.prefilter else "mtcnn"
+
+    def _count(self, key: str):
+        with self._lock:
+            self._counts[key] += 1
+
+    def _mtcnn(self, image) -> Optional[Box]:
+        faces = self.detect_faces(image)
+        return _largest([tuple(face['box']) for face in faces])
+
+    def _roi(self, box: Box, shape) -> Box:
+        x, y, w, h = box
+        pad_x, pad_y = int(w * self.roi_margin), int(h * self.roi_margin)
+        return _clamp((x - pad_x, y - pad_y, w + 2 * pad_x, h + 2 * pad_y), shape)
+
+    def detect(self, image) -> Optional[Box]:
+        """Return the largest face box (x, y, w, h) in ``image``, or None"""
+        self._count("frames")
+        if self.prefilter is None:
+            box = self._mtcnn(image)
+            return _clamp(box, image.shape) if box else None
+
+        proposal = _largest([box for box in self.prefilter.propose(image) if _clamp(box, image.shape)])
+        if proposal is None:
+            self._count("rejected")
+            return None
+
+        rx, ry, rw, rh = self._roi(proposal, image.shape)
+        box = self._mtcnn(image[ry:ry + rh, rx:rx + rw])
+        if box is not None:
+            self._count("roi_hits")
+            x, y, w, h = box
+            return _clamp((x + rx, y + ry, w, h), image.shape)
+
+        if not self.fallback_to_full_frame:
+            return None
+        self._count("fallbacks")
+        box = self._mtcnn(image)
+        return _clamp(box, image.shape) if box else None
+
+    def detect_near(self, image, box: Box) -> Optional[Box]:
+        """Re-find a face last seen at ``box``, running MTCNN on the padded region first.
+
+        Falls back to ``detect`` (the full pipeline) when the face has left the region.
+        """
+        region = self._roi(box, image.shape)
+        if region is not None:
+            rx, ry, rw, rh = region
+            found = self._mtcnn(image[ry:ry + rh, rx:rx + rw])
+            if found is not None:
+                self._count("tracked")
+                x, y, w, h = found
+                return _clamp((x + rx, y + ry, w, h), image.shape)
+        return self.detect(image)
+
+    @staticmethod
+    def crop_box(image, box: Box, size: int = 160):
+        """The face at ``box`` resized to ``size`` x ``size``"""
+        x, y, w, h = box
+        return cv2.resize(image[y:y + h, x:x + w], (size, size))
+
+    def crop(self, image, size: int = 160):
+        """Detect the largest face and return it resized to ``size`` x ``size``"""
+        box = self.detect(image)
+        if box is None:
+            return None
+        return self.crop_box(image, box, size)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._counts, kind=self.kind)
+
+def create_detector(kind: str, detect_faces: Callable, **options) -> FaceDetectionPipeline:
+    """Build a detection pipeline by name: 'mtcnn' (full frame), 'haar' or 'dnn' pre-filter.
+
+    ``options``: ``width`` (Haar input width), ``prototxt``/``model`` (DNN
+    files), ``confidence`` (DNN threshold), ``roi_margin`` and
+    ``fallback_to_full_frame``.
+    """
+    pipeline_options = {key: options[key] for key in ("roi_margin", "fallback_to_full_frame") if key in options}
+    if kind == "mtcnn":
+        return FaceDetectionPipeline(detect_faces, **pipeline_options)
+    if kind == "haar":
+        prefilter = HaarPrefilter(width=options.get("width", 320))
+    elif kind == "dnn":
+        if not options.get("prototxt") or not options.get("model"):
+            raise ValueError("The dnn face detector needs FACE_DNN_PROTOTXT and FACE_DNN_MODEL")
+        prefilter = DNNPrefilter(options["prototxt"], options["model"], confidence=options.get("confidence", 0.5))
+    else:
+        raise ValueError(f"Unknown face detector type: {kind}")
+    logger.info(f"Face detection uses a {kind} pre-filter before MTCNN")
+    return FaceDetectionPipeline(detect_faces, prefilter, **pipeline_options)
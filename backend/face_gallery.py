@@ -0,0 +1,251 @@
+import threading
+import numpy as np
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+from face_index import ExactIndex
+
+EMBEDDING_DIM = 512
+
+def normalize_embedding(embedding):
+    """Return an L2-normalized float32 copy of an embedding"""
+    vector = np.asarray(embedding, dtype=np.float32).reshape(-1)
+    norm = np.linalg.norm(vector)
+    if norm > 0:
+        vector = vector / norm
+    return vector
+
+def normalize_templates(templates) -> np.ndarray:
+    """Return L2-normalized float32 rows of a (k, dim) template array"""
+    matrix = np.asarray(templates, dtype=np.float32)
+    matrix = matrix.reshape(-1, matrix.shape[-1])
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.where(norms > 0, norms, 1)
+
+def template_centroid(templates) -> np.ndarray:
+    """Normalized mean of a voter's normalized templates"""
+    return normalize_embedding(normalize_templates(templates).mean(axis=0))
+
+def merge_template(templates, embedding, max_templates: int, min_distance: float = 0.05) -> Optional[np.ndarray]:
+    """Add ``embedding`` to ``templates``, or None if it adds nothing new.
+
+    Probes within ``min_distance`` of an existing template are skipped.
+    Once ``max_templates`` is reached the new template replaces the one
+    most similar to it, which keeps the set as varied as possible.
+    """
+    templates = normalize_templates(templates)
+    probe = normalize_embedding(embedding)
+    distances = 1.0 - templates @ probe
+    if len(templates) and distances.min() < min_distance:
+        return None
+    if len(templates) < max_templates:
+        return np.vstack([templates, probe])
+    merged = templates.copy()
+    merged[int(np.argmin(distances))] = probe
+    return merged
+
+class FaceGallery:
+    """Resident matrix of L2-normalized face embeddings for fast matching.
+
+    Rows are kept contiguous: removing a voter moves the last row into the
+    freed slot, so a match is always a single matrix-vector product over
+    ``matrix[:size]``. An optional index (see face_index.py) narrows the
+    rows that are scored; the scoring itself is always exact.
+
+    Each row is a voter's centroid. Voters enrolled with several templates
+    also keep those templates: a match first finds the
+    ``template_rerank_k`` nearest centroids and then re-ranks just those
+    voters by their closest template.
+    """
+
+    def __init__(self, dim: int = EMBEDDING_DIM, capacity: int = 1024, index=None, template_rerank_k: int = 10):
+        self.dim = dim
+        self.index = index if index is not None else ExactIndex()
+        self.template_rerank_k = template_rerank_k
+        self._templates: Dict[str, np.ndarray] = {}
+        self._matrix = np.zeros((max(capacity, 1), dim), dtype=np.float32)
+        self._names: List[str] = []
+        self._rows: Dict[str, int] = {}
+        self._lock = threading.RLock()
+
+    @classmethod
+    def from_embeddings(cls, user_embeddings: Dict[str, list], dim: int = EMBEDDING_DIM, index=None):
+        """Build a gallery from {voter_name: embedding or [embedding, ...]}.
+
+        A voter given several embeddings keeps all of them as templates.
+        """
+        gallery = cls(dim=dim, capacity=len(user_embeddings), index=index)
+        for name, embeddings in user_embeddings.items():
+            templates = normalize_templates(embeddings)
+            gallery.add(name, template_centroid(templates), templates)
+        return gallery
+
+    @classmethod
+    def from_store(cls, voter_store, dim: int = EMBEDDING_DIM, index=None):
+        """Build a gallery from the embeddings held in a VoterStore"""
+        gallery = cls(dim=dim, capacity=voter_store.voter_count(), index=index)
+        for name, embedding in voter_store.iter_embeddings():
+            gallery.add(name, embedding)
+        for name, templates in voter_store.iter_templates():
+            if name in gallery._rows:
+                gallery._templates[name] = normalize_templates(templates)
+        return gallery
+
+    def __len__(self):
+        return len(self._names)
+
+    def __contains__(self, name):
+        return name in self._rows
+
+    @property
+    def names(self) -> List[str]:
+        with self._lock:
+            return list(self._names)
+
+    @property
+    def matrix(self) -> np.ndarray:
+        """View of the populated rows"""
+        return self._matrix[:len(self._names)]
+
+    def _grow(self, min_capacity: int):
+        capacity = self._matrix.shape[0]
+        while capacity < min_capacity:
+            capacity *= 2
+        grown = np.zeros((capacity, self.dim), dtype=np.float32)
+        grown[:len(self._names)] = self._matrix[:len(self._names)]
+        self._matrix = grown
+
+    def add(self, name: str, embedding, templates=None) -> int:
+        """Insert or replace a voter's embedding (centroid) and return its row.
+
+        ``templates`` are the voter's individual enrollment embeddings; a
+        single template needs no re-ranking and is not kept.
+        """
+        vector = normalize_embedding(embedding)
+        with self._lock:
+            if templates is not None and len(templates) > 1:
+                self._templates[name] = normalize_templates(templates)
+            else:
+                self._templates.pop(name, None)
+            row = self._rows.get(name)
+            if row is None:
+                row = len(self._names)
+                if row >= self._matrix.shape[0]:
+                    self._grow(row + 1)
+                self._names.append(name)
+                self._rows[name] = row
+            else:
+                self.index.remove(row)
+            self._matrix[row] = vector
+            if self.index.needs_training(len(self._names)):
+                self.index.train(self.matrix)
+            else:
+                self.index.add(row, vector)
+            return row
+
+    def remove(self, name: str) -> bool:
+        """Remove a voter, filling the hole with the last row"""
+        with self._lock:
+            row = self._rows.pop(name, None)
+            if row is None:
+                return False
+            self._templates.pop(name, None)
+            last = len(self._names) - 1
+            self.index.remove(row)
+            if row != last:
+                self.index.move(last, row)
+                moved_name = self._names[last]
+                self._matrix[row] = self._matrix[last]
+                self._names[row] = moved_name
+                self._rows[moved_name] = row
+            self._names.pop()
+            self._matrix[last] = 0
+            return True
+
+    @contextmanager
+    def updating_store(self):
+        """Hold the gallery while the voter store and the gallery are updated together.
+
+        Wrap the store write and the matching ``add``/``remove`` so no match
+        sees one without the other.
+        """
+        with self._lock:
+            yield
+
+    def search(self, embedding, k: int = 1) -> List[Tuple[str, float]]:
+        """Return up to ``k`` (voter_name, cosine_distance) pairs, nearest first.
+
+        Ties are broken by name so the result does not depend on insertion order.
+        """
+        query = normalize_embedding(embedding)
+        with self._lock:
+            if not self._names:
+                return []
+            rows = self.index.candidates(query, k)
+            if rows is None:
+                scores = 1.0 - self.matrix @ query
+                rows = np.arange(len(scores))
+            else:
+                scores = 1.0 - self._matrix[rows] @ query
+            if len(rows) > k:
+                top = np.argpartition(scores, k - 1)[:k]
+                rows, scores = rows[top], scores[top]
+            ranked = sorted((float(score), self._names[row]) for row, score in zip(rows, scores))
+            return [(name, score) for score, name in ranked]
+
+    @property
+    def has_templates(self) -> bool:
+        return bool(self._templates)
+
+    def _templates_for(self, name: str) -> Optional[np.ndarray]:
+        return self._templates.get(name)
+
+    def best_match(self, embedding) -> Tuple[Optional[str], float]:
+        """Return (voter_name, cosine_distance) of the closest voter.
+
+        With multi-template voters the distance is to the voter's closest
+        template or centroid, whichever is nearer.
+        """
+        if not self.has_templates:
+            results = self.search(embedding, k=1)
+            if not results:
+                return None, float("inf")
+            return results[0]
+
+        candidates = self.search(embedding, k=self.template_rerank_k)
+        if not candidates:
+            return None, float("inf")
+        query = normalize_embedding(embedding)
+        reranked = []
+        for name, score in candidates:
+            templates = self._templates_for(name)
+            if templates is not None and len(templates):
+                score = min(score, float((1.0 - templates @ query).min()))
+            reranked.append((score, name))
+        score, name = min(reranked)
+        return name, score
+
+    def best_matches(self, embeddings) -> List[Tuple[Optional[str], float]]:
+        """Vectorized best_match for a batch of embeddings"""
+        queries = np.asarray(embeddings, dtype=np.float32).reshape(-1, self.dim)
+        with self._lock:
+            if not self._names:
+                return [(None, float("inf"))] * len(queries)
+            if self.has_templates or self.index.candidates(normalize_embedding(queries[0])) is not None:
+                return [self.best_match(query) for query in queries]
+            norms = np.linalg.norm(queries, axis=1, keepdims=True)
+            queries = queries / np.where(norms > 0, norms, 1)
+            # Bound the (queries x gallery) score block to ~64 MB of float32
+            chunk = max(1, (16 * 1024 * 1024) // len(self._names))
+            results = []
+            for start in range(0, len(queries), chunk):
+                scores = 1.0 - queries[start:start + chunk] @ self.matrix.T
+                rows = np.argmin(scores, axis=1)
+                results.extend((self._names[row], float(scores[i, row])) for i, row in enumerate(rows))
+            return results
+
+    def find_duplicate(self, embedding, similarity_threshold: float) -> Optional[str]:
+        """Return the nearest voter within ``similarity_threshold`` cosine distance, if any"""
+        name, score = self.best_match(embedding)
+        if name is not None and score < similarity_threshold:
+            return name
+        return None
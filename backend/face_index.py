@@ -0,0 +1,176 @@
+import os
+import logging
+import numpy as np
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+class ExactIndex:
+    """Brute-force index: every gallery row is a candidate"""
+
+    kind = "exact"
+
+    def needs_training(self, size: int) -> bool:
+        return False
+
+    def train(self, matrix: np.ndarray):
+        pass
+
+    def add(self, row: int, vector: np.ndarray):
+        pass
+
+    def remove(self, row: int):
+        pass
+
+    def move(self, src: int, dst: int):
+        pass
+
+    def candidates(self, query: np.ndarray, min_candidates: int = 1) -> Optional[np.ndarray]:
+        """Rows to score exactly, or None to scan the whole gallery"""
+        return None
+
+    def save(self, path: str):
+        pass
+
+    def load(self, path: str) -> bool:
+        return False
+
+class IVFIndex:
+    """Inverted-file index over spherical k-means centroids.
+
+    Until the gallery reaches ``train_threshold`` rows the index is
+    untrained and searches fall back to an exact scan. Once trained, a
+    query probes the ``nprobe`` closest lists (widening until at least
+    ``rerank_k`` rows are found) and the gallery re-scores those rows
+    exactly in float32.
+    """
+
+    kind = "ivf"
+
+    def __init__(self, nlist: int = 0, nprobe: int = 8, rerank_k: int = 32,
+                 train_threshold: int = 20000, kmeans_iterations: int = 10,
+                 path: str = None, seed: int = 0):
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.rerank_k = rerank_k
+        self.train_threshold = train_threshold
+        self.kmeans_iterations = kmeans_iterations
+        self.path = path
+        self.seed = seed
+        self.centroids: Optional[np.ndarray] = None
+        self._lists: List[List[int]] = []
+        self._positions: Dict[int, Tuple[int, int]] = {}  # row -> (list, slot)
+
+    @property
+    def trained(self) -> bool:
+        return self.centroids is not None
+
+    def needs_training(self, size: int) -> bool:
+        return not self.trained and size >= self.train_threshold
+
+    def _reset_lists(self):
+        self._lists = [[] for _ in range(len(self.centroids))]
+        self._positions = {}
+
+    def train(self, matrix: np.ndarray):
+        """Cluster the gallery rows and assign every row to a list"""
+        size = len(matrix)
+        if size == 0:
+            return
+        nlist = self.nlist or int(4 * np.sqrt(size))
+        nlist = max(1, min(nlist, size))
+        rng = np.random.default_rng(self.seed)
+        sample_size = min(size, nlist * 64)
+        sample = matrix[rng.choice(size, sample_size, replace=False)]
+        centroids = sample[rng.choice(sample_size, nlist, replace=False)].copy()
+
+        for _ in range(self.kmeans_iterations):
+            assignment = np.argmax(sample @ centroids.T, axis=1)
+            for list_id in range(nlist):
+                members = sample[assignment == list_id]
+                if len(members):
+                    centroid = members.sum(axis=0)
+                    norm = np.linalg.norm(centroid)
+                    if norm > 0:
+                        centroids[list_id] = centroid / norm
+
+        self.centroids = centroids.astype(np.float32)
+        self._reset_lists()
+        self._assign_all(matrix)
+        logger.info(f"Trained IVF index with {nlist} lists on {sample_size} of {size} embeddings")
+        if self.path:
+            self.save(self.path)
+
+    def _assign_all(self, matrix: np.ndarray, chunk: int = 65536):
+        for start in range(0, len(matrix), chunk):
+            block = matrix[start:start + chunk]
+            for offset, list_id in enumerate(np.argmax(block @ self.centroids.T, axis=1)):
+                self._append(start + offset, int(list_id))
+
+    def _append(self, row: int, list_id: int):
+        members = self._lists[list_id]
+        self._positions[row] = (list_id, len(members))
+        members.append(row)
+
+    def add(self, row: int, vector: np.ndarray):
+        if not self.trained:
+            return
+        self._append(row, int(np.argmax(self.centroids @ vector)))
+
+    def remove(self, row: int):
+        position = self._positions.pop(row, None)
+        if position is None:
+            return
+        list_id, slot = position
+        members = self._lists[list_id]
+        last_row = members.pop()
+        if last_row != row:
+            members[slot] = last_row
+            self._positions[last_row] = (list_id, slot)
+
+    def move(self, src: int, dst: int):
+        position = self._positions.pop(src, None)
+        if position is None:
+            return
+        list_id, slot = position
+        self._lists[list_id][slot] = dst
+        self._positions[dst] = position
+
+    def candidates(self, query: np.ndarray, min_candidates: int = 1) -> Optional[np.ndarray]:
+        if not self.trained:
+            return None
+        wanted = max(min_candidates, self.rerank_k)
+        order = np.argsort(-(self.centroids @ query))
+        probe = min(self.nprobe, len(order))
+        while True:
+            rows = [row for list_id in order[:probe] for row in self._lists[list_id]]
+            if len(rows) >= wanted or probe >= len(order):
+                return np.fromiter(rows, dtype=np.int64, count=len(rows))
+            probe = min(probe * 2, len(order))
+
+    def save(self, path: str):
+        if self.trained:
+            np.save(path, self.centroids)
+
+    def load(self, path: str) -> bool:
+        """Load persisted centroids; rows are re-assigned as they are added"""
+        if not os.path.exists(path):
+            return False
+        self.centroids = np.load(path).astype(np.float32)
+        self._reset_lists()
+        logger.info(f"Loaded IVF index with {len(self.centroids)} lists from {path}")
+        return True
+
+def create_index(kind: str = "exact", path: str = None, **options):
+    """Build a face index by name ('exact' or 'ivf'), restoring it from ``path`` if present.
+
+    ``options`` are IVF tuning knobs and are ignored by the exact index.
+    """
+    if kind == "exact":
+        return ExactIndex()
+    if kind == "ivf":
+        index = IVFIndex(path=path, **options)
+        if path:
+            index.load(path)
+        return index
+    raise ValueError(f"Unknown face index type: {kind}")
@@ -0,0 +1,120 @@
+import cv2
+import numpy as np
+from typing import List, Optional, Tuple
+
+from face_detection import Box, FaceDetectionPipeline
+from face_gallery import normalize_embedding
+
+def sharpness(image, box: Box, size: int = 160) -> float:
+    """Variance of the Laplacian over the face, resized to ``size`` so scores compare across distances"""
+    x, y, w, h = box
+    gray = cv2.cvtColor(cv2.resize(image[y:y + h, x:x + w], (size, size)), cv2.COLOR_BGR2GRAY)
+    return float(cv2.Laplacian(gray, cv2.CV_64F).var())
+
+class FaceTracker:
+    """Follows one face box across a frame stream, re-running MTCNN only when needed.
+
+    A frame whose face region barely differs from the last detected frame
+    (mean absolute difference of a small grayscale thumbnail) reuses the
+    previous box. Otherwise the face is re-found near its last position,
+    and detection is forced every ``redetect_every`` frames.
+    """
+
+    def __init__(self, pipeline: FaceDetectionPipeline, motion_threshold: float = 8.0, redetect_every: int = 10):
+        self.pipeline = pipeline
+        self.motion_threshold = motion_threshold
+        self.redetect_every = redetect_every
+        self.box: Optional[Box] = None
+        self._thumbnail = None
+        self._shape = None
+        self._since_detect = 0
+        self.detections = 0
+        self.reused = 0
+
+    @staticmethod
+    def _region_thumbnail(image, box: Box):
+        x, y, w, h = box
+        gray = cv2.cvtColor(image[y:y + h, x:x + w], cv2.COLOR_BGR2GRAY)
+        return cv2.resize(gray, (32, 32), interpolation=cv2.INTER_AREA).astype(np.float32)
+
+    def locate(self, image) -> Optional[Box]:
+        """The face box in ``image``, or None when no face is visible"""
+        tracking = self.box is not None and image.shape == self._shape
+        if tracking and self._since_detect < self.redetect_every:
+            motion = np.abs(self._region_thumbnail(image, self.box) - self._thumbnail).mean()
+            if motion < self.motion_threshold:
+                self._since_detect += 1
+                self.reused += 1
+                return self.box
+
+        self.detections += 1
+        box = self.pipeline.detect_near(image, self.box) if tracking else self.pipeline.detect(image)
+        self.box, self._shape, self._since_detect = box, image.shape, 0
+        self._thumbnail = self._region_thumbnail(image, box) if box is not None else None
+        return box
+
+class AuthenticationStream:
+    """Per-connection state for streamed authentication.
+
+    Sampled frames are located with a FaceTracker and scored for
+    sharpness; the sharpest crop of every ``window`` usable frames is
+    queued for embedding, up to ``max_embeddings``. Matching uses the
+    normalized mean of the embeddings gathered so far.
+    """
+
+    def __init__(self, pipeline: FaceDetectionPipeline, min_sharpness: float = 40.0, window: int = 4,
+                 max_embeddings: int = 3, crop_size: int = 160, **tracker_options):
+        self.tracker = FaceTracker(pipeline, **tracker_options)
+        self.min_sharpness = min_sharpness
+        self.window = window
+        self.max_embeddings = max_embeddings
+        self.crop_size = crop_size
+        self.frames = 0
+        self.faces = 0
+        self.blurry = 0
+        self.embeddings: List[np.ndarray] = []
+        self._candidates: List[Tuple[float, np.ndarray]] = []
+
+    @property
+    def wants_frames(self) -> bool:
+        return len(self.embeddings) < self.max_embeddings
+
+    def add_frame(self, image) -> dict:
+        """Track the face in a decoded frame and keep its crop if it is sharp enough"""
+        self.frames += 1
+        box = self.tracker.locate(image)
+        if box is None:
+            return {"face": False}
+        self.faces += 1
+        score = sharpness(image, box, self.crop_size)
+        if score < self.min_sharpness:
+            self.blurry += 1
+            return {"face": True, "sharpness": score, "sharp": False}
+        x, y, w, h = box
+        self._candidates.append((score, cv2.resize(image[y:y + h, x:x + w], (self.crop_size, self.crop_size))))
+        return {"face": True, "sharpness": score, "sharp": True}
+
+    def next_crop(self, flush: bool = False):
+        """The sharpest pending crop once a window is full (or any pending crop when ``flush``)"""
+        if not self._candidates or not self.wants_frames:
+            return None
+        if len(self._candidates) < self.window and not flush:
+            return None
+        _, crop = max(self._candidates, key=lambda candidate: candidate[0])
+        self._candidates = []
+        return crop
+
+    def add_embedding(self, embedding) -> np.ndarray:
+        """Record an embedding and return the normalized mean of all embeddings so far"""
+        self.embeddings.append(normalize_embedding(embedding))
+        return normalize_embedding(np.mean(self.embeddings, axis=0))
+
+    def stats(self) -> dict:
+        return {
+            "frames_processed": self.frames,
+            "frames_with_face": self.faces,
+            "blurry_frames": self.blurry,
+            "detections": self.tracker.detections,
+            "tracked_frames": self.tracker.reused,
+            "embeddings": len(self.embeddings),
+        }
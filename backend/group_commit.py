@@ -0,0 +1,140 @@
+import asyncio
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future, InvalidStateError
+from typing import Any, Callable, Dict, List, Optional
+
+from metrics import Histogram
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+class GroupCommitter:
+    """Commits records from concurrent callers together in one durable write.
+
+    A background thread takes the first queued record, gathers more for
+    at most ``max_wait_ms`` or until ``max_batch_size``, and passes the
+    batch to ``commit_batch_fn`` (one transaction / one fsync for all of
+    them). A caller is acknowledged only once the batch holding its
+    record has committed, so durability per record is unchanged. If a
+    batch fails, its records are retried one by one so a bad record fails
+    only its own caller. A caller that stops waiting (e.g. a cancelled
+    request) does not stop its record from being committed.
+    ``max_batch_size`` 1 commits each record on its own, still on the
+    writer thread so ``commit_async`` never blocks the event loop.
+    """
+
+    def __init__(self, commit_batch_fn: Callable[[List[Any]], Any], max_batch_size: int = 64,
+                 max_wait_ms: float = 2.0, name: str = "group-commit", batch_sizes: Optional[Histogram] = None):
+        self.commit_batch_fn = commit_batch_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.batch_sizes = batch_sizes
+        self._queue: "queue.Queue" = queue.Queue()
+        self._stats_lock = threading.Lock()
+        self._batches = 0
+        self._records = 0
+        self._failed_batches = 0
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def submit(self, record) -> Future:
+        """Queue a record; the future resolves once it is committed"""
+        future: Future = Future()
+        self._queue.put((record, future))
+        return future
+
+    def commit(self, record):
+        """Commit a record, blocking until its batch is durable"""
+        return self.submit(record).result()
+
+    async def commit_async(self, record):
+        """Commit a record without blocking the event loop"""
+        return await asyncio.wrap_future(self.submit(record))
+
+    def _collect(self):
+        first = self._queue.get()
+        if first is _STOP:
+            return None
+        batch = [first]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _STOP:
+                # Finish this batch, then stop
+                self._queue.put(_STOP)
+                break
+            batch.append(item)
+        return batch
+
+    @staticmethod
+    def _resolve(future: Future, error: Optional[BaseException] = None):
+        """Report a record's outcome to its caller, unless the caller has given up"""
+        if future.done():
+            return
+        try:
+            if error is None:
+                future.set_result(None)
+            else:
+                future.set_exception(error)
+        except InvalidStateError:
+            # Cancelled between the check and the call
+            pass
+
+    def _commit(self, batch):
+        try:
+            self.commit_batch_fn([record for record, _ in batch])
+        except Exception as e:
+            if len(batch) == 1:
+                self._resolve(batch[0][1], e)
+                return
+            logger.warning(f"Group commit of {len(batch)} records failed ({str(e)}); committing them one by one")
+            with self._stats_lock:
+                self._failed_batches += 1
+            for item in batch:
+                self._commit([item])
+            return
+        with self._stats_lock:
+            self._batches += 1
+            self._records += len(batch)
+        if self.batch_sizes is not None:
+            self.batch_sizes.observe(len(batch))
+        for _, future in batch:
+            self._resolve(future)
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            if batch is None:
+                return
+            try:
+                self._commit(batch)
+            except Exception as e:
+                # Keep the writer alive; callers still waiting get the error
+                logger.error(f"Group commit writer failed: {str(e)}")
+                for _, future in batch:
+                    self._resolve(future, e)
+
+    def stop(self, timeout: float = 10.0):
+        """Commit everything already queued, then stop the writer thread"""
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            return {
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait * 1000.0,
+                "batches": self._batches,
+                "records": self._records,
+                "mean_batch_size": self._records / self._batches if self._batches else 0.0,
+                "failed_batches": self._failed_batches,
+                "queue_depth": self._queue.qsize(),
+            }
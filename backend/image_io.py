@@ -0,0 +1,45 @@
+import os
+import base64
+import cv2
+import numpy as np
+
+# Longest side, in pixels, an uploaded image is reduced to before face detection
+MAX_IMAGE_SIDE = int(os.environ.get("MAX_IMAGE_SIDE", "1280"))
+
+class ImageDecodeError(ValueError):
+    """Uploaded data is not a readable image"""
+
+def base64_to_bytes(base64_string: str) -> bytes:
+    """Decode a base64 image string, with or without a data URL prefix"""
+    if base64_string.startswith('data:image'):
+        base64_string = base64_string.split(',', 1)[1]
+    try:
+        return base64.b64decode(base64_string)
+    except ValueError:
+        raise ImageDecodeError("Image data is not valid base64")
+
+def downscale_image(image, max_side: int = MAX_IMAGE_SIDE):
+    """Shrink ``image`` so its longest side is at most ``max_side``"""
+    height, width = image.shape[:2]
+    longest = max(height, width)
+    if max_side <= 0 or longest <= max_side:
+        return image
+    scale = max_side / longest
+    return cv2.resize(image, (round(width * scale), round(height * scale)), interpolation=cv2.INTER_AREA)
+
+def decode_image_bytes(image_bytes, max_side: int = MAX_IMAGE_SIDE):
+    """Decode JPEG/PNG/etc. bytes straight into a 3-channel BGR image.
+
+    The bytes are wrapped without copying and decoded once by OpenCV;
+    alpha and grayscale inputs are converted to BGR. Raises
+    ImageDecodeError if the data is not a readable image.
+    """
+    buffer = np.frombuffer(image_bytes, dtype=np.uint8)
+    image = cv2.imdecode(buffer, cv2.IMREAD_COLOR) if buffer.size else None
+    if image is None:
+        raise ImageDecodeError("Image could not be decoded")
+    return downscale_image(image, max_side)
+
+def base64_to_opencv_image(base64_string: str, max_side: int = MAX_IMAGE_SIDE):
+    """Convert base64 string to OpenCV image"""
+    return decode_image_bytes(base64_to_bytes(base64_string), max_side)
@@ -0,0 +1,196 @@
+import asyncio
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+_DEFAULT_TIMEOUT = object()
+
+class InferenceBusyError(Exception):
+    """Raised when the inference queue is full"""
+
+class InferenceTimeoutError(Exception):
+    """Raised when an inference job does not finish within its timeout"""
+
+class InferenceExecutor:
+    """Bounded worker pool that keeps MTCNN/FaceNet work off the event loop.
+
+    At most ``max_workers`` jobs run at once and at most ``max_queue`` more
+    wait for a worker; anything beyond that is rejected immediately with
+    InferenceBusyError so callers can answer 503 instead of piling up.
+    A job's slot is only released when its thread actually finishes, even
+    if the awaiting request already timed out.
+    """
+
+    def __init__(self, max_workers: int = 2, max_queue: int = 16, timeout: Optional[float] = 30.0):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="inference")
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._rejected = 0
+        self._timed_out = 0
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    @property
+    def running(self) -> int:
+        """Jobs currently on a worker"""
+        return min(self._in_flight, self.max_workers)
+
+    @property
+    def queue_depth(self) -> int:
+        """Jobs waiting for a free worker"""
+        return max(0, self._in_flight - self.max_workers)
+
+    def _release(self, _future):
+        with self._lock:
+            self._in_flight -= 1
+
+    async def run(self, fn: Callable, *args, timeout: Any = _DEFAULT_TIMEOUT):
+        """Run ``fn(*args)`` on the pool and await its result (``timeout=None`` waits indefinitely)"""
+        with self._lock:
+            if self._in_flight >= self.max_workers + self.max_queue:
+                self._rejected += 1
+                raise InferenceBusyError(f"Inference queue is full ({self._in_flight} jobs in flight)")
+            self._in_flight += 1
+
+        future = self._pool.submit(fn, *args)
+        future.add_done_callback(self._release)
+
+        if timeout is _DEFAULT_TIMEOUT:
+            timeout = self.timeout
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+        except asyncio.TimeoutError:
+            # Drops the job if it has not started yet; a running job finishes in the background
+            future.cancel()
+            with self._lock:
+                self._timed_out += 1
+            raise InferenceTimeoutError(f"Inference did not finish within {timeout}s")
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "max_workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "in_flight": self._in_flight,
+            "queue_depth": self.queue_depth,
+            "rejected": self._rejected,
+            "timed_out": self._timed_out,
+        }
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+class EmbeddingBatcher:
+    """Coalesces single-face embedding calls from concurrent threads into batches.
+
+    Callers block in ``embed`` while a background thread gathers up to
+    ``max_batch_size`` crops, waiting at most ``max_wait_ms`` after the
+    first one arrives, and runs one batched forward pass through
+    ``embed_batch_fn`` (e.g. ``FaceNet.embeddings``).
+
+    ``active_callers`` returns how many threads could be calling ``embed``
+    right now (the running inference jobs); once that many crops are in
+    the batch it is run without waiting further, so a lone request pays
+    no batching delay. A caller gives up after ``timeout`` seconds with
+    InferenceTimeoutError.
+    """
+
+    def __init__(self, embed_batch_fn: Callable[[List[Any]], Any],
+                 max_batch_size: int = 8, max_wait_ms: float = 5.0,
+                 active_callers: Optional[Callable[[], int]] = None, timeout: Optional[float] = 30.0):
+        self.embed_batch_fn = embed_batch_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.active_callers = active_callers
+        self.timeout = timeout
+        self._queue: "queue.Queue" = queue.Queue()
+        self._stats_lock = threading.Lock()
+        self._batches = 0
+        self._items = 0
+        self._batch_sizes: Dict[int, int] = {}
+        self._total_wait = 0.0
+        self._max_wait_seen = 0.0
+        self._thread = None
+        if max_batch_size > 1:
+            self._thread = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+            self._thread.start()
+
+    def embed(self, crop):
+        """Return the embedding for one face crop"""
+        if self._thread is None:
+            self._record([0.0])
+            return self.embed_batch_fn([crop])[0]
+        future: Future = Future()
+        self._queue.put((crop, future, time.perf_counter()))
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            # Skipped by the batcher if it has not been picked up yet
+            future.cancel()
+            raise InferenceTimeoutError(f"Embedding did not finish within {self.timeout}s")
+
+    def _batch_full(self, size: int) -> bool:
+        if size >= self.max_batch_size:
+            return True
+        # Every thread that could add a crop is already waiting on this batch
+        return self.active_callers is not None and size >= self.active_callers()
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        deadline = time.perf_counter() + self.max_wait
+        while not self._batch_full(len(batch)):
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = [item for item in self._collect() if item[1].set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            started = time.perf_counter()
+            self._record([started - enqueued for _, _, enqueued in batch])
+            try:
+                embeddings = self.embed_batch_fn([crop for crop, _, _ in batch])
+            except Exception as e:
+                for _, future, _ in batch:
+                    future.set_exception(e)
+                continue
+            for (_, future, _), embedding in zip(batch, embeddings):
+                future.set_result(embedding)
+
+    def _record(self, waits: List[float]):
+        with self._stats_lock:
+            self._batches += 1
+            self._items += len(waits)
+            self._batch_sizes[len(waits)] = self._batch_sizes.get(len(waits), 0) + 1
+            self._total_wait += sum(waits)
+            self._max_wait_seen = max(self._max_wait_seen, max(waits))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            return {
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait * 1000.0,
+                "batches": self._batches,
+                "items": self._items,
+                "mean_batch_size": self._items / self._batches if self._batches else 0.0,
+                "batch_size_counts": dict(sorted(self._batch_sizes.items())),
+                "mean_queue_wait_ms": 1000.0 * self._total_wait / self._items if self._items else 0.0,
+                "max_queue_wait_ms": 1000.0 * self._max_wait_seen,
+                "queue_depth": self._queue.qsize(),
+            }
@@ -1,21 +1,41 @@
 import cv2
 import os
 import numpy as np
-import pickle
-import base64
-import io
-from PIL import Image
-from fastapi import FastAPI, HTTPException, Depends, status
+from fastapi import FastAPI, HTTPException, Depends, Request, Response, WebSocket, WebSocketDisconnect, status
+from fastapi.responses import JSONResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import HTTPBasic, HTTPBasicCredentials
 from pydantic import BaseModel
-from mtcnn import MTCNN
-from keras_facenet import FaceNet
-from scipy.spatial.distance import cosine
-from web3 import Web3
+from web3 import Web3, AsyncWeb3
+from model_registry import models
+from face_gallery import FaceGallery, merge_template, normalize_templates, template_centroid
+from shared_gallery import SharedFaceGallery
+from quantized_gallery import QuantizedFaceGallery
+from face_index import create_index
+from face_detection import create_detector
+from face_stream import AuthenticationStream
+from embedding_cache import EmbeddingCache, FaceResult
+from image_io import ImageDecodeError, base64_to_bytes, base64_to_opencv_image, decode_image_bytes
+from voter_store import SQLiteVoterStore, VoteAlreadyRecordedError, VoterAlreadyRegisteredError
+from vote_journal import VoteJournal
+from group_commit import GroupCommitter
+from vote_outbox import VoteOutbox, VoteSubmitter, VoteBatcher, QUEUED, PENDING, RETRYING
+from tx_manager import NonceManager, SharedNonceManager, GasPriceOracle
+from rpc_client import RPCEndpoints, PooledHTTPProvider, AsyncPooledHTTPProvider, RPCHealthProbe, parse_rpc_urls
+from tally_cache import TallyCache, VoteEventPoller
+from starlette.concurrency import run_in_threadpool
+from inference import InferenceExecutor, InferenceBusyError, InferenceTimeoutError, EmbeddingBatcher
+from metrics import registry as metrics_registry, request_seconds, timed, call_profiled
 import secrets
+import fcntl
+import time
+import threading
 import logging
+import asyncio
+import json
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime
+from typing import List, NamedTuple, Optional, Tuple
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -30,8 +50,24 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag"],
 )
 
+@app.middleware("http")
+async def record_request_latency(request: Request, call_next):
+    started = time.perf_counter()
+    status_code = 500
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+        return response
+    finally:
+        # Label by route template so /vote-status/{voter_name} is one series
+        route = request.scope.get("route")
+        request_seconds.observe(
+            time.perf_counter() - started, request.method, route.path if route else "unmatched", str(status_code)
+        )
+
 # Admin authentication
 security = HTTPBasic()
 ADMIN_USERNAME = "admin"
@@ -56,39 +92,183 @@ def get_admin_user(credentials: HTTPBasicCredentials = Depends(security)):
         )
     return credentials.username
 
-# Initialize models
-detector = MTCNN()
-embedder = FaceNet()
+# Bounded pool for MTCNN/FaceNet so inference never blocks the event loop
+inference_workers = int(os.environ.get("INFERENCE_WORKERS", "2"))
+inference_timeout = float(os.environ.get("INFERENCE_TIMEOUT", "30"))
+inference_executor = InferenceExecutor(
+    max_workers=inference_workers,
+    max_queue=int(os.environ.get("INFERENCE_MAX_QUEUE", "16")),
+    timeout=inference_timeout,
+)
 
-# Create directory to store embeddings
-face_data_dir = "face_embeddings"
-if not os.path.exists(face_data_dir):
-    os.makedirs(face_data_dir)
+# Coalesce concurrent single-face FaceNet calls into batched forward passes.
+# Embeddings are only computed on inference workers, so no batch can hold more
+# crops than there are workers, and one is run as soon as every running job is in it.
+embedding_batcher = EmbeddingBatcher(
+    lambda crops: models.embedder.embeddings(crops),
+    max_batch_size=int(os.environ.get("EMBEDDING_BATCH_SIZE", str(inference_workers))),
+    max_wait_ms=float(os.environ.get("EMBEDDING_BATCH_WAIT_MS", "5")),
+    active_callers=lambda: inference_executor.running,
+    timeout=inference_timeout,
+)
 
-# Load voted users with timestamps for security tracking
-voted_users_file = "voted_users.pkl"
-if os.path.exists(voted_users_file):
-    with open(voted_users_file, "rb") as file:
-        voted_users = pickle.load(file)
-else:
-    voted_users = {}  # Changed to dict to store timestamps: {voter_name: timestamp}
+# Face detection: full-frame MTCNN, or a Haar/DNN pre-filter that rejects
+# empty frames and lets MTCNN refine only the proposed region
+face_detector = create_detector(
+    os.environ.get("FACE_DETECTOR", "mtcnn"),
+    lambda image: models.detector.detect_faces(image),
+    width=int(os.environ.get("FACE_PREFILTER_WIDTH", "320")),
+    prototxt=os.environ.get("FACE_DNN_PROTOTXT"),
+    model=os.environ.get("FACE_DNN_MODEL"),
+    roi_margin=float(os.environ.get("FACE_ROI_MARGIN", "0.4")),
+)
+
+# Append-only vote log (backup of the recorded votes, indexed by voter name)
+vote_journal = VoteJournal(
+    os.environ.get("VOTE_JOURNAL", "votes.jsonl"),
+    compact_min_records=int(os.environ.get("VOTE_JOURNAL_COMPACT_MIN", "1000")),
+    fsync=os.environ.get("VOTE_JOURNAL_FSYNC", "1") == "1",
+)
+vote_journal.import_legacy_log("votes.txt")
+
+# Face results of recent uploads, so byte-identical client retries skip inference.
+# Deletions are picked up through the store, since /delete-voter may run in another worker
+embedding_cache = EmbeddingCache(
+    max_bytes=int(float(os.environ.get("EMBEDDING_CACHE_MAX_MB", "8")) * 1024 * 1024),
+    ttl=float(os.environ.get("EMBEDDING_CACHE_TTL", "300")),
+    deletion_version=lambda: voter_store.deletion_version(),
+)
+
+# Voter registry and vote records (SQLite, one row per voter)
+voter_store = SQLiteVoterStore(
+    os.environ.get("VOTER_DB", "securevote.db"),
+    reservation_ttl=float(os.environ.get("VOTE_RESERVATION_TTL", "300")),
+)
 
-# Create registry file to track face-to-name mappings for fraud prevention
+# Import data written by earlier versions that kept everything in pickle files
+face_data_dir = "face_embeddings"
+voted_users_file = "voted_users.pkl"
 face_registry_file = "face_registry.pkl"
-if os.path.exists(face_registry_file):
-    with open(face_registry_file, "rb") as file:
-        face_registry = pickle.load(file)
+voter_store.migrate_from_pickles(face_registry_file, face_data_dir, voted_users_file)
+
+def repair_vote_journal() -> int:
+    """Append votes the store holds but the journal lacks (after a failed journal write); returns how many"""
+    missing = [vote for vote in voter_store.iter_votes() if vote[0] not in vote_journal]
+    if missing:
+        vote_journal.append_many(missing)
+        logger.warning(f"Repaired the vote journal with {len(missing)} votes from the store")
+    return len(missing)
+
+journal_repair_needed = threading.Event()
+if voter_store.vote_count() > len(vote_journal):
+    journal_repair_needed.set()
+
+def commit_votes(records):
+    """Write ((voter_name, candidate_id, tx_hash, voted_at), outbox_statements) records to the store, then the journal"""
+    votes = [vote for vote, _ in records]
+    # The votes and their outbox transactions commit in one SQLite transaction, so a
+    # signed vote is never sent without its local record. The store rejects a second
+    # vote for a voter (VoteAlreadyRecordedError); only accepted votes reach the
+    # append-only journal, so a rejected or retried batch leaves no stray records there
+    voter_store.record_votes(votes, [statement for _, statements in records for statement in statements])
+    # From here on the votes are recorded: a journal failure must not fail them (a retry
+    # would hit the stored rows), so the journal, a backup, is repaired from the store
+    try:
+        if journal_repair_needed.is_set():
+            journal_repair_needed.clear()
+            repair_vote_journal()
+        vote_journal.append_many(votes)
+    except Exception as e:
+        journal_repair_needed.set()
+        logger.error(f"Vote journal write failed, will repair it from the store: {str(e)}")
+
+# Concurrent /cast-vote requests share one journal fsync and one SQLite commit
+vote_committer = GroupCommitter(
+    commit_votes,
+    max_batch_size=int(os.environ.get("VOTE_COMMIT_BATCH_SIZE", "64")),
+    max_wait_ms=float(os.environ.get("VOTE_COMMIT_WAIT_MS", "2")),
+    name="vote-commit",
+    batch_sizes=metrics_registry.histogram(
+        "securevote_vote_commit_batch_size", "Votes written per group commit",
+        buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256)
+    ),
+)
+
+# Face index used to narrow gallery searches ("exact" or "ivf")
+face_index_file = "face_index.npy"
+face_index = create_index(
+    os.environ.get("FACE_INDEX", "exact"),
+    path=face_index_file,
+    nprobe=int(os.environ.get("FACE_INDEX_NPROBE", "8")),
+    rerank_k=int(os.environ.get("FACE_INDEX_RERANK_K", "32")),
+    train_threshold=int(os.environ.get("FACE_INDEX_TRAIN_THRESHOLD", "20000")),
+)
+
+# Multi-template enrollment and opt-in adaptive template updates
+MAX_TEMPLATES_PER_VOTER = int(os.environ.get("MAX_TEMPLATES_PER_VOTER", "5"))
+TEMPLATE_CONSISTENCY_THRESHOLD = float(os.environ.get("TEMPLATE_CONSISTENCY_THRESHOLD", "0.4"))
+ADAPTIVE_TEMPLATES = os.environ.get("ADAPTIVE_TEMPLATES", "0") == "1"
+ADAPTIVE_UPDATE_THRESHOLD = float(os.environ.get("ADAPTIVE_UPDATE_THRESHOLD", "0.2"))
+
+# Streamed authentication over /ws/authenticate
+STREAM_MAX_SECONDS = float(os.environ.get("STREAM_MAX_SECONDS", "15"))
+STREAM_MAX_FRAMES = int(os.environ.get("STREAM_MAX_FRAMES", "60"))
+STREAM_MAX_FRAME_BYTES = int(os.environ.get("STREAM_MAX_FRAME_BYTES", str(2 * 1024 * 1024)))
+STREAM_FRAME_INTERVAL_MS = float(os.environ.get("STREAM_FRAME_INTERVAL_MS", "100"))
+STREAM_MIN_SHARPNESS = float(os.environ.get("STREAM_MIN_SHARPNESS", "40"))
+STREAM_SELECT_WINDOW = int(os.environ.get("STREAM_SELECT_WINDOW", "4"))
+STREAM_MAX_EMBEDDINGS = int(os.environ.get("STREAM_MAX_EMBEDDINGS", "3"))
+STREAM_ACCEPT_DISTANCE = float(os.environ.get("STREAM_ACCEPT_DISTANCE", "0.25"))
+STREAM_REJECT_DISTANCE = float(os.environ.get("STREAM_REJECT_DISTANCE", "0.6"))
+
+# Number of uvicorn worker processes; with more than one, workers share the
+# gallery through memory-mapped files and allocate nonces through SQLite
+api_workers = int(os.environ.get("API_WORKERS", "1"))
+
+# Resident embedding matrix used for authentication, loaded once at startup.
+# GALLERY_QUANTIZATION=float16|int8 keeps compact codes (memory-mapped from a
+# snapshot) and re-ranks the best candidates against the float32 store.
+gallery_quantization = os.environ.get("GALLERY_QUANTIZATION", "none")
+gallery_snapshot_path = os.environ.get("GALLERY_SNAPSHOT_PATH", "face_gallery_snapshot")
+if api_workers > 1:
+    if gallery_quantization != "none":
+        logger.warning("GALLERY_QUANTIZATION is ignored with API_WORKERS > 1; workers share a float32 gallery")
+    face_gallery = SharedFaceGallery.open(
+        os.environ.get("SHARED_GALLERY_PATH", "face_gallery"), voter_store, index=face_index
+    )
+elif gallery_quantization != "none":
+    face_gallery = QuantizedFaceGallery.open(
+        gallery_snapshot_path, voter_store, index=face_index, mode=gallery_quantization,
+        rerank_depth=int(os.environ.get("QUANTIZED_RERANK_DEPTH", "32")),
+    )
 else:
-    face_registry = {}  # {voter_name: embedding}
+    face_gallery = FaceGallery.from_store(voter_store, index=face_index)
+face_gallery.template_rerank_k = int(os.environ.get("TEMPLATE_RERANK_K", "10"))
+logger.info(f"Loaded {len(face_gallery)} face embeddings into gallery")
+
+class PreparedVote(NamedTuple):
+    """A signed (or batch-queued) vote whose outbox row is not stored yet"""
+    result: dict
+    outbox_statements: List[Tuple[str, tuple]]
+    nonce: Optional[int]
 
 # Blockchain configuration
 class BlockchainService:
     def __init__(self):
-        self.rpc_url = "https://rpc.sepolia.org"
+        # Settings from the environment let every worker process start configured
+        # (rpc_url may list failover endpoints, comma-separated)
+        self.rpc_url = os.environ.get("BLOCKCHAIN_RPC_URL", "https://rpc.sepolia.org")
         self.web3 = None
-        self.contract_address = ""
-        self.private_key = ""
-        self.account_address = ""
+        self.async_web3 = None
+        self.async_contract = None
+        self.rpc_endpoints = None
+        self.async_rpc = os.environ.get("BLOCKCHAIN_ASYNC_RPC", "0") == "1"
+        self.rpc_timeout = float(os.environ.get("RPC_TIMEOUT", "10"))
+        self.rpc_pool_size = int(os.environ.get("RPC_POOL_SIZE", "16"))
+        self.rpc_failback_after = float(os.environ.get("RPC_FAILBACK_AFTER", "60"))
+        self.contract_address = os.environ.get("CONTRACT_ADDRESS", "")
+        self.private_key = os.environ.get("SIGNER_PRIVATE_KEY", "")
+        self.account_address = os.environ.get("SIGNER_ADDRESS", "")
         self.contract_abi = [
             {
                 "inputs": [
@@ -100,6 +280,16 @@ class BlockchainService:
                 "stateMutability": "nonpayable",
                 "type": "function"
             },
+            {
+                "inputs": [
+                    {"internalType": "string[]", "name": "_voterNames", "type": "string[]"},
+                    {"internalType": "string[]", "name": "_candidateIds", "type": "string[]"}
+                ],
+                "name": "castVotes",
+                "outputs": [{"internalType": "uint256", "name": "recorded", "type": "uint256"}],
+                "stateMutability": "nonpayable",
+                "type": "function"
+            },
             {
                 "inputs": [{"internalType": "string", "name": "", "type": "string"}],
                 "name": "hasVoted",
@@ -126,66 +316,314 @@ class BlockchainService:
             }
         ]
         self.contract = None
+        self.chain_id = None
+        
+        # Cached reachability check so status polls do not each hit the node
+        self.health = RPCHealthProbe(
+            lambda: self.web3.eth.block_number,
+            self._async_block_number if self.async_rpc else None,
+            ttl=float(os.environ.get("RPC_HEALTH_TTL", "5")),
+        )
+        
+        # Signed transactions waiting to be sent or confirmed
+        self.outbox = VoteOutbox(os.environ.get("VOTER_DB", "securevote.db"))
+        
+        # Local nonce allocation and cached gas pricing for the signing account
+        get_chain_nonce = lambda: self.web3.eth.get_transaction_count(
+            Web3.to_checksum_address(self.account_address), "pending"
+        )
+        if api_workers > 1:
+            self.nonce_manager = SharedNonceManager(
+                get_chain_nonce, os.environ.get("VOTER_DB", "securevote.db"), self.outbox.next_nonce
+            )
+        else:
+            self.nonce_manager = NonceManager(get_chain_nonce, self.outbox.next_nonce)
+        self.gas_oracle = GasPriceOracle(
+            lambda: self.web3.eth.gas_price,
+            ttl=float(os.environ.get("GAS_PRICE_TTL", "15")),
+            fallback=Web3.to_wei(20, 'gwei')
+        )
+        self.cast_vote_gas = None
+        
+        self.submitter = VoteSubmitter(
+            self.outbox,
+            lambda: self.web3 if self.contract is not None else None,
+            poll_interval=float(os.environ.get("TX_POLL_INTERVAL", "2")),
+            max_attempts=int(os.environ.get("TX_MAX_ATTEMPTS", "5")),
+            rebroadcast_after=float(os.environ.get("TX_REBROADCAST_AFTER", "60")),
+            nonce_manager=self.nonce_manager,
+            resign=self._resign_vote,
+            resign_batch=self._resign_batch,
+        )
+        
+        # With VOTE_BATCH_SIZE > 1 votes are queued and sent many per castVotes transaction
+        self.batcher = None
+        vote_batch_size = int(os.environ.get("VOTE_BATCH_SIZE", "1"))
+        self.vote_batch_wait = float(os.environ.get("VOTE_BATCH_WAIT_MS", "2000")) / 1000.0
+        if vote_batch_size > 1:
+            self.batcher = VoteBatcher(
+                self.outbox,
+                self._sign_batch,
+                self.nonce_manager,
+                lambda: self.contract is not None,
+                max_batch_size=vote_batch_size,
+                max_wait=self.vote_batch_wait,
+                batch_sizes=metrics_registry.histogram(
+                    "securevote_tx_batch_size", "Votes per castVotes transaction",
+                    buckets=(1, 2, 5, 10, 20, 50, 100, 200)
+                ),
+            )
     
     def initialize_web3(self):
         try:
-            self.web3 = Web3(Web3.HTTPProvider(self.rpc_url))
+            self.rpc_endpoints = RPCEndpoints(parse_rpc_urls(self.rpc_url), failback_after=self.rpc_failback_after)
+            if self.web3 is None:
+                # Pooled keep-alive providers, shared by request handlers and background workers
+                self.web3 = Web3(PooledHTTPProvider(
+                    self.rpc_endpoints, timeout=self.rpc_timeout, pool_size=self.rpc_pool_size
+                ))
+                if self.async_rpc:
+                    self.async_web3 = AsyncWeb3(AsyncPooledHTTPProvider(
+                        self.rpc_endpoints, timeout=self.rpc_timeout, pool_size=self.rpc_pool_size
+                    ))
+            else:
+                # Reconfiguration keeps the open connection pools and swaps the endpoints
+                self.web3.provider.endpoints = self.rpc_endpoints
+                if self.async_web3 is not None:
+                    self.async_web3.provider.endpoints = self.rpc_endpoints
+            self.health.invalidate()
+            self.chain_id = self.web3.eth.chain_id
+            self.nonce_manager.set_signer(self.chain_id, self.account_address)
+            self.gas_oracle.invalidate()
+            self.cast_vote_gas = None
             if self.contract_address and self.web3:
                 self.contract = self.web3.eth.contract(
                     address=Web3.to_checksum_address(self.contract_address),
                     abi=self.contract_abi
                 )
+                if self.async_web3 is not None:
+                    self.async_contract = self.async_web3.eth.contract(
+                        address=Web3.to_checksum_address(self.contract_address),
+                        abi=self.contract_abi
+                    )
                 logger.info("Blockchain initialized successfully")
         except Exception as e:
             logger.error(f"Failed to initialize blockchain: {str(e)}")
     
-    def is_connected(self):
-        try:
-            return self.web3 and self.web3.is_connected()
-        except:
-            return False
+    async def _async_block_number(self) -> int:
+        return await self.async_web3.eth.block_number
     
-    def cast_vote(self, voter_name: str, candidate_id: str):
-        try:
-            if not self.contract or not self.is_connected():
-                return {"success": False, "message": "Blockchain not configured"}
-            
-            # Build transaction with proper gas estimation
+    def is_connected(self) -> bool:
+        """Whether the node answered the last health probe (re-probed at most every RPC_HEALTH_TTL)"""
+        return self.web3 is not None and self.health.check()
+    
+    async def is_connected_async(self) -> bool:
+        return self.web3 is not None and await self.health.check_async()
+    
+    def rpc_status(self):
+        """Health probe and failover state, without the endpoint URLs (they may hold API keys)"""
+        status = self.health.stats()
+        status["async"] = self.async_web3 is not None
+        if self.rpc_endpoints is not None:
+            status["endpoints"] = len(self.rpc_endpoints.urls)
+            status["current_endpoint"] = self.rpc_endpoints.current_index
+            status["failovers"] = self.rpc_endpoints.failovers
+        return status
+    
+    async def close_async(self):
+        if self.async_web3 is not None:
+            await self.async_web3.provider.close()
+    
+    def _gas_limit(self, voter_name: str, candidate_id: str) -> int:
+        """Gas limit for castVote, estimated once and reused with headroom"""
+        if self.cast_vote_gas is None:
+            try:
+                estimate = self.contract.functions.castVote(voter_name, candidate_id).estimate_gas({
+                    'from': Web3.to_checksum_address(self.account_address)
+                })
+                self._set_gas_limit(estimate)
+            except Exception as e:
+                logger.warning(f"castVote gas estimation failed, using default limit: {str(e)}")
+                return 300000
+        return self.cast_vote_gas
+    
+    def _set_gas_limit(self, estimate: int):
+        # Longer names cost more calldata and storage than the sample vote
+        self.cast_vote_gas = int(estimate * 1.5)
+        logger.info(f"castVote gas estimate {estimate}, using limit {self.cast_vote_gas}")
+    
+    async def _prefetch_async(self, voter_name: str, candidate_id: str):
+        """Fetch the gas limit and price over the async client so signing does not wait on the node"""
+        if self.cast_vote_gas is None:
+            self._set_gas_limit(await self.async_contract.functions.castVote(voter_name, candidate_id).estimate_gas({
+                'from': Web3.to_checksum_address(self.account_address)
+            }))
+        if self.gas_oracle.stale:
+            self.gas_oracle.update(await self.async_web3.eth.gas_price)
+    
+    def _sign_vote(self, voter_name: str, candidate_id: str, nonce: int):
+        """Build and sign a castVote transaction locally; returns (tx_hash, raw_tx)"""
+        with timed("tx_build"):
             transaction = self.contract.functions.castVote(voter_name, candidate_id).build_transaction({
                 'from': Web3.to_checksum_address(self.account_address),
-                'gas': 300000,  # Increased gas limit
-                'gasPrice': self.web3.to_wei('20', 'gwei'),
-                'nonce': self.web3.eth.get_transaction_count(Web3.to_checksum_address(self.account_address)),
+                'chainId': self.chain_id,
+                'gas': self._gas_limit(voter_name, candidate_id),
+                'gasPrice': self.gas_oracle.get_price(),
+                'nonce': nonce,
             })
-            
-            # Sign and send transaction
+        with timed("tx_sign"):
             signed_txn = self.web3.eth.account.sign_transaction(transaction, private_key=self.private_key)
-            tx_hash = self.web3.eth.send_raw_transaction(signed_txn.rawTransaction)
-            
-            # Wait for transaction receipt
-            tx_receipt = self.web3.eth.wait_for_transaction_receipt(tx_hash, timeout=120)
+        return signed_txn.hash.hex(), bytes(signed_txn.rawTransaction)
+    
+    def _sign_batch(self, votes, nonce: int):
+        """Build and sign one castVotes transaction for [(voter_name, candidate_id)]; returns (tx_hash, raw_tx)"""
+        sender = Web3.to_checksum_address(self.account_address)
+        call = self.contract.functions.castVotes(
+            [voter_name for voter_name, _ in votes], [candidate_id for _, candidate_id in votes]
+        )
+        with timed("tx_build"):
+            try:
+                # Gas depends on the batch size and name lengths, so every batch is estimated
+                gas = int(call.estimate_gas({'from': sender}) * 1.2)
+            except Exception as e:
+                gas = 100000 + 150000 * len(votes)
+                logger.warning(f"castVotes gas estimation failed, using limit {gas}: {str(e)}")
+            transaction = call.build_transaction({
+                'from': sender,
+                'chainId': self.chain_id,
+                'gas': gas,
+                'gasPrice': self.gas_oracle.get_price(),
+                'nonce': nonce,
+            })
+        with timed("tx_sign"):
+            signed_txn = self.web3.eth.account.sign_transaction(transaction, private_key=self.private_key)
+        return signed_txn.hash.hex(), bytes(signed_txn.rawTransaction)
+    
+    def _resign_batch(self, votes):
+        nonce = self.nonce_manager.allocate()
+        try:
+            tx_hash, raw_tx = self._sign_batch(votes, nonce)
+        except Exception:
+            self.nonce_manager.release(nonce)
+            raise
+        return tx_hash, raw_tx, nonce
+    
+    def _resign_vote(self, voter_name: str, candidate_id: str):
+        nonce = self.nonce_manager.allocate()
+        try:
+            tx_hash, raw_tx = self._sign_vote(voter_name, candidate_id, nonce)
+        except Exception:
+            self.nonce_manager.release(nonce)
+            raise
+        return tx_hash, raw_tx, nonce
+    
+    def prepare_vote(self, voter_name: str, candidate_id: str) -> PreparedVote:
+        """Sign a castVote transaction and build its outbox row, without storing it.
+        
+        The caller commits ``outbox_statements`` in the same transaction as
+        the local vote record, then calls ``vote_stored``, or
+        ``discard_vote`` if that commit fails. Once stored, the background
+        VoteSubmitter sends the transaction and tracks the receipt. With
+        batching on, the vote is only queued and the VoteBatcher signs it
+        into a castVotes transaction with other votes.
+        """
+        try:
+            if not self.contract:
+                return PreparedVote({"success": False, "message": "Blockchain not configured"}, [], None)
             
-            if tx_receipt.status == 1:
-                return {
+            if self.batcher is not None:
+                statement = self.outbox.enqueue_for_batch_statement(
+                    voter_name, candidate_id, time.time() + self.vote_batch_wait
+                )
+                return PreparedVote({
                     "success": True,
-                    "message": "Vote cast successfully on Sepolia blockchain",
-                    "tx_hash": tx_hash.hex(),
-                    "block_number": tx_receipt.blockNumber
-                }
-            else:
-                return {"success": False, "message": "Transaction failed", "tx_hash": tx_hash.hex()}
+                    "status": QUEUED,
+                    "message": "Vote queued for the next batch transaction on Sepolia blockchain",
+                    "tx_hash": None
+                }, [statement], None)
+            
+            nonce = self.nonce_manager.allocate()
+            try:
+                tx_hash, raw_tx = self._sign_vote(voter_name, candidate_id, nonce)
+            except Exception:
+                # Hand the nonce to the next vote so no gap is left on chain
+                self.nonce_manager.release(nonce)
+                raise
+            
+            return PreparedVote({
+                "success": True,
+                "status": "pending",
+                "message": "Vote transaction submitted to Sepolia blockchain, awaiting confirmation",
+                "tx_hash": tx_hash
+            }, [self.outbox.enqueue_statement(voter_name, candidate_id, tx_hash, raw_tx, nonce)], nonce)
                 
         except Exception as e:
             logger.error(f"Blockchain vote failed: {str(e)}")
-            return {"success": False, "message": f"Blockchain error: {str(e)}"}
+            return PreparedVote({"success": False, "message": f"Blockchain error: {str(e)}"}, [], None)
+    
+    async def prepare_vote_async(self, voter_name: str, candidate_id: str) -> PreparedVote:
+        """``prepare_vote`` for the event loop; in async RPC mode the node is queried without a thread"""
+        if self.async_contract is not None and self.batcher is None:
+            try:
+                await self._prefetch_async(voter_name, candidate_id)
+            except Exception as e:
+                # prepare_vote fetches them itself (or falls back) on the threadpool
+                logger.warning(f"Async gas prefetch failed: {str(e)}")
+        return await run_in_threadpool(self.prepare_vote, voter_name, candidate_id)
+    
+    def vote_stored(self, prepared: PreparedVote):
+        """The prepared vote's outbox row is committed; a full batch is signed right away"""
+        if self.batcher is not None and prepared.outbox_statements:
+            self.batcher.wake()
+    
+    def discard_vote(self, voter_name: str, prepared: PreparedVote):
+        """The prepared vote's commit failed; its signed transaction is dropped unsent"""
+        if prepared.nonce is None:
+            return
+        stored = self.outbox.get(voter_name)
+        if stored is not None and stored["tx_hash"] == prepared.result.get("tx_hash"):
+            # The outbox row was committed after all, so the nonce is in use
+            logger.warning(f"Vote commit for {voter_name} reported a failure but its transaction is stored")
+            return
+        # Hand the nonce to the next vote so no gap is left on chain
+        self.nonce_manager.release(prepared.nonce)
 
 blockchain_service = BlockchainService()
 
+# Results tally kept current from VoteCast events instead of per-request getResults() calls
+tally_cache = TallyCache()
+vote_event_poller = VoteEventPoller(
+    tally_cache,
+    lambda: blockchain_service.contract,
+    poll_interval=float(os.environ.get("TALLY_POLL_INTERVAL", "5")),
+)
+
+# Gauges read at scrape time
+metrics_registry.gauge("securevote_gallery_size", "Face embeddings in the gallery", lambda: len(face_gallery))
+metrics_registry.gauge("securevote_inference_queue_depth", "Inference jobs waiting for a worker",
+                       lambda: inference_executor.queue_depth)
+metrics_registry.gauge("securevote_inference_in_flight", "Inference jobs running", lambda: inference_executor.in_flight)
+metrics_registry.gauge("securevote_embedding_cache_hits", "Uploads answered from the embedding cache",
+                       lambda: embedding_cache.stats()["hits"])
+metrics_registry.gauge("securevote_embedding_cache_misses", "Uploads that needed face inference",
+                       lambda: embedding_cache.stats()["misses"])
+metrics_registry.gauge("securevote_embedding_cache_bytes", "Approximate embedding cache size",
+                       lambda: embedding_cache.stats()["bytes"])
+metrics_registry.gauge("securevote_rpc_failovers", "Times the RPC client switched to a fallback endpoint",
+                       lambda: blockchain_service.rpc_endpoints.failovers if blockchain_service.rpc_endpoints else 0)
+metrics_registry.gauge("securevote_pending_transactions", "Vote transactions not yet confirmed or failed",
+                       lambda: sum(count for state, count in blockchain_service.outbox.counts().items()
+                                   if state in (QUEUED, PENDING, RETRYING)))
+
 # Pydantic models
 class VoterRegistration(BaseModel):
     name: str
     email: str
     image_data: str
+    images: List[str] = []  # optional extra frames for multi-template enrollment
+
+class VoterBatchRegistration(BaseModel):
+    voters: List[VoterRegistration]
 
 class FaceAuthentication(BaseModel):
     image_data: str
@@ -204,44 +642,279 @@ class AdminLogin(BaseModel):
     username: str
     password: str
 
-def base64_to_opencv_image(base64_string):
-    """Convert base64 string to OpenCV image"""
-    if base64_string.startswith('data:image'):
-        base64_string = base64_string.split(',')[1]
+async def read_image_uploads(request: Request, fields: List[str], max_images: int = 1):
+    """Read images and form fields from a JSON, multipart or raw image request.
+    
+    - ``application/json``: fields plus a base64 ``image_data`` string and/or an ``images`` list
+    - ``multipart/form-data``: fields plus one or more ``image`` file parts
+    - ``image/*`` or ``application/octet-stream``: the body is the image, fields come from the query string
+    
+    Returns ``(values, [image_bytes, ...])``; raises 400/422 for malformed requests.
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
     
-    image_bytes = base64.b64decode(base64_string)
-    pil_image = Image.open(io.BytesIO(image_bytes))
-    opencv_image = cv2.cvtColor(np.array(pil_image), cv2.COLOR_RGB2BGR)
+    if content_type == "multipart/form-data":
+        form = await request.form()
+        uploads = [upload for upload in form.getlist("image") if not isinstance(upload, str)]
+        if not uploads:
+            raise HTTPException(status_code=422, detail="Multipart requests need an 'image' file field")
+        images = [await upload.read() for upload in uploads[:max_images + 1]]
+        values = {field: form.get(field) for field in fields}
+    elif content_type.startswith("image/") or content_type == "application/octet-stream":
+        images = [await request.body()]
+        values = {field: request.query_params.get(field) for field in fields}
+    else:
+        try:
+            payload = await request.json()
+        except ValueError:
+            raise HTTPException(status_code=422, detail="Expected JSON with image_data, a multipart upload or an image body")
+        if not isinstance(payload, dict):
+            raise HTTPException(status_code=422, detail="Missing field: image_data")
+        encoded = payload.get("images") or []
+        if payload.get("image_data"):
+            encoded = [payload["image_data"]] + encoded
+        if not encoded or not isinstance(encoded, list) or not all(isinstance(item, str) for item in encoded):
+            raise HTTPException(status_code=422, detail="Missing field: image_data")
+        try:
+            images = [base64_to_bytes(item) for item in encoded[:max_images + 1]]
+        except ImageDecodeError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        values = {field: payload.get(field) for field in fields}
     
-    return opencv_image
+    missing = [field for field, value in values.items() if not isinstance(value, str)]
+    if missing:
+        raise HTTPException(status_code=422, detail=f"Missing field: {', '.join(missing)}")
+    if len(images) > max_images:
+        raise HTTPException(status_code=422, detail=f"At most {max_images} image(s) per request")
+    if not all(images):
+        raise HTTPException(status_code=422, detail="Image is empty")
+    return values, images
 
-def extract_face_embedding(image):
-    """Extract face embedding from image using MTCNN and FaceNet"""
-    faces = detector.detect_faces(image)
+@timed("detect")
+def detect_face(image):
+    """Detect the largest face; returns its box and the crop resized to FaceNet's 160x160 input"""
+    box = face_detector.detect(image)
+    if box is None:
+        return None, None
+    return box, face_detector.crop_box(image, box)
+
+def extract_face(image):
+    """Detect and embed the largest face with MTCNN and FaceNet"""
+    box, resized_face = detect_face(image)
+    
+    if resized_face is None:
+        return FaceResult(None, None)
     
-    if not faces:
-        return None
+    # Extract FaceNet embedding (batched with concurrent requests)
+    with timed("embed"):
+        embedding = embedding_batcher.embed(resized_face)
     
-    # Get the largest face
-    largest_face = max(faces, key=lambda x: x['box'][2] * x['box'][3])
-    x, y, w, h = largest_face['box']
+    return FaceResult(embedding, box)
+
+def extract_faces_batch(images):
+    """Detect faces in many images and embed them with a single batched FaceNet pass.
     
-    # Crop and resize face
-    cropped_face = image[y:y+h, x:x+w]
-    resized_face = cv2.resize(cropped_face, (160, 160))
+    Returns a FaceResult per image, in order; empty where no face was found.
+    """
+    detections = [detect_face(image) if image is not None else (None, None) for image in images]
+    found = [i for i, (_, crop) in enumerate(detections) if crop is not None]
     
-    # Extract FaceNet embedding
-    embedding = embedder.embeddings([resized_face])[0]
+    faces = [FaceResult(None, None)] * len(images)
+    if found:
+        with timed("embed"):
+            batch = models.embedder.embeddings([detections[i][1] for i in found])
+        for i, embedding in zip(found, batch):
+            faces[i] = FaceResult(embedding, detections[i][0])
+    return faces
+
+def embedding_list(face):
+    return face.embedding.tolist() if face.embedding is not None else None
+
+def extract_face_embeddings_batch(images):
+    """Extract embeddings for many images with a single batched FaceNet pass.
+    
+    Returns a list aligned with ``images``; entries are None where no face was found.
+    """
+    return [embedding_list(face) for face in extract_faces_batch(images)]
+
+def decode_and_extract_face(image_bytes):
+    with timed("decode"):
+        image = decode_image_bytes(image_bytes)
+    return extract_face(image)
+
+def image_bytes_to_embedding(image_bytes):
+    """Decode an uploaded image and extract its face embedding, reusing the result for a repeated upload"""
+    return embedding_list(embedding_cache.get_or_compute(image_bytes, lambda: decode_and_extract_face(image_bytes)))
+
+def images_to_embeddings(images_bytes):
+    """Embeddings for several uploaded frames of one voter (None where no face was found)"""
+    if len(images_bytes) == 1:
+        return [image_bytes_to_embedding(images_bytes[0])]
+    keys = [embedding_cache.key(image_bytes) for image_bytes in images_bytes]
+    faces = [embedding_cache.get(key) for key in keys]
+    missing = [i for i, face in enumerate(faces) if face is None]
+    if missing:
+        with timed("decode"):
+            images = [decode_image_bytes(images_bytes[i]) for i in missing]
+        for i, face in zip(missing, extract_faces_batch(images)):
+            faces[i] = embedding_cache.put(keys[i], face)
+    return [embedding_list(face) for face in faces]
+
+def process_stream_frame(session, frame_bytes, flush=False):
+    """Decode and track one streamed frame; embed the sharpest recent crop once one is due"""
+    frame = {}
+    if frame_bytes is not None:
+        with timed("decode"):
+            image = decode_image_bytes(frame_bytes)
+        with timed("detect"):
+            frame = session.add_frame(image)
+    crop = session.next_crop(flush)
+    if crop is not None:
+        with timed("embed"):
+            frame["embedding"] = embedding_batcher.embed(crop)
+    return frame
+
+def update_voter_templates(voter_name, embedding):
+    """Fold a confidently matched probe into the voter's templates (opt-in adaptive update)"""
+    try:
+        templates = voter_store.get_templates(voter_name)
+        if templates is None:
+            return
+        merged = merge_template(templates, embedding, MAX_TEMPLATES_PER_VOTER)
+        if merged is None:
+            return
+        with face_gallery.updating_store():
+            centroid = voter_store.set_templates(voter_name, merged)
+            face_gallery.add(voter_name, centroid, merged)
+        logger.info(f"Adaptive template update for {voter_name}: {len(merged)} templates")
+    except Exception as e:
+        logger.error(f"Adaptive template update failed for {voter_name}: {str(e)}")
+
+def authentication_result(best_match, best_score, embedding, similarity_threshold=0.35):
+    """Turn a gallery match into the authentication response, refusing voters who already voted"""
+    # Enhanced security: stricter threshold and more detailed logging
+    if best_match and best_score < similarity_threshold:
+        similarity_percentage = 1 - best_score
+        
+        # CRITICAL SECURITY CHECK: Has this voter already voted?
+        with timed("voted_check"):
+            vote_timestamp = voter_store.get_vote_timestamp(best_match)
+        
+        if vote_timestamp is not None:
+            logger.warning(f"VOTING FRAUD ATTEMPT: {best_match} tried to vote again. Original vote: {vote_timestamp}")
+            return {
+                "success": False,
+                "message": f"{best_match} has already voted on {vote_timestamp}",
+                "voter_name": best_match,
+                "has_voted": True,
+                "similarity_score": similarity_percentage,
+                "fraud_attempt": True
+            }
+        
+        logger.info(f"Voter authenticated: {best_match} (confidence: {similarity_percentage:.2%})")
+        
+        if ADAPTIVE_TEMPLATES and best_score < ADAPTIVE_UPDATE_THRESHOLD:
+            # Off the request path: the voter does not wait for the template write
+            asyncio.get_running_loop().run_in_executor(None, update_voter_templates, best_match, embedding)
+        return {
+            "success": True,
+            "message": f"Voter authenticated as {best_match}",
+            "voter_name": best_match,
+            "has_voted": False,
+            "similarity_score": similarity_percentage
+        }
     
-    return embedding.tolist()
+    logger.warning(f"Authentication failed: best match {best_match} with score {best_score} (threshold: {similarity_threshold})")
+    return {
+        "success": False,
+        "message": "Face not recognized. Please ensure you are registered to vote and your face is clearly visible.",
+        "voter_name": None,
+        "has_voted": False,
+        "similarity_score": 0 if not best_match else (1 - best_score)
+    }
 
-def check_face_duplicate(new_embedding, similarity_threshold=0.3):
-    """Check if a face embedding matches any existing registered face"""
-    for registered_name, registered_embedding in face_registry.items():
-        similarity_score = cosine(new_embedding, registered_embedding)
-        if similarity_score < similarity_threshold:
-            return registered_name
-    return None
+async def run_inference(fn, *args, **kwargs):
+    """Run face inference on the worker pool, answering 503 when it is saturated or too slow"""
+    try:
+        # Sampled cProfile capture runs in the worker thread doing the inference
+        return await inference_executor.run(call_profiled, fn.__name__, fn, *args, **kwargs)
+    except InferenceBusyError:
+        logger.warning("Inference queue full, rejecting request")
+        raise HTTPException(
+            status_code=503,
+            detail="Face recognition is busy. Please try again in a moment.",
+            headers={"Retry-After": "1"}
+        )
+    except InferenceTimeoutError:
+        logger.warning("Inference timed out")
+        raise HTTPException(
+            status_code=503,
+            detail="Face recognition timed out. Please try again.",
+            headers={"Retry-After": "1"}
+        )
+
+def enroll_voters(names, images, emails=None, similarity_threshold=0.3):
+    """Register a batch of voters and commit the face registry once.
+    
+    ``images`` are decoded OpenCV images (None for undecodable inputs). Duplicate
+    faces are checked against the gallery and within the batch in one pass.
+    Returns one result dict per voter, in input order.
+    """
+    emails = emails or [None] * len(names)
+    results = [{"name": name, "success": False} for name in names]
+    embeddings = extract_face_embeddings_batch(images)
+    
+    pending = []
+    seen_names = set()
+    for i, (name, embedding) in enumerate(zip(names, embeddings)):
+        if images[i] is None:
+            results[i]["message"] = "Image could not be decoded"
+        elif name in seen_names or voter_store.is_registered(name):
+            results[i]["message"] = f"Voter with name '{name}' is already registered"
+        elif embedding is None:
+            results[i]["message"] = "No face detected in the image"
+        else:
+            seen_names.add(name)
+            pending.append(i)
+    
+    if pending:
+        batch = np.asarray([embeddings[i] for i in pending], dtype=np.float32)
+        with timed("match"):
+            gallery_matches = face_gallery.best_matches(batch)
+        
+        normalized = batch / np.linalg.norm(batch, axis=1, keepdims=True)
+        batch_distances = 1.0 - normalized @ normalized.T
+        
+        accepted = []
+        for position, i in enumerate(pending):
+            match_name, match_score = gallery_matches[position]
+            if match_name is not None and match_score < similarity_threshold:
+                results[i]["message"] = f"This face is already registered under the name '{match_name}'"
+                continue
+            earlier = [j for j in accepted if batch_distances[position, j] < similarity_threshold]
+            if earlier:
+                results[i]["message"] = f"This face appears more than once in the batch (also '{names[pending[earlier[0]]]}')"
+                continue
+            accepted.append(position)
+        
+        with timed("persist"), face_gallery.updating_store():
+            # Names registered by a concurrent request since the check above are skipped
+            conflicts = set(voter_store.register_voters(
+                (names[pending[position]], emails[pending[position]], embeddings[pending[position]])
+                for position in accepted
+            ))
+            for position in accepted:
+                if names[pending[position]] in conflicts:
+                    results[pending[position]]["message"] = f"Voter with name '{names[pending[position]]}' is already registered"
+            accepted = [position for position in accepted if names[pending[position]] not in conflicts]
+            for position in accepted:
+                face_gallery.add(names[pending[position]], embeddings[pending[position]])
+        for position in accepted:
+            i = pending[position]
+            results[i]["success"] = True
+            results[i]["message"] = f"Voter {names[i]} registered successfully with biometric verification"
+    
+    return results
 
 @app.post("/admin-login")
 async def admin_login(credentials: AdminLogin):
@@ -252,142 +925,299 @@ async def admin_login(credentials: AdminLogin):
         raise HTTPException(status_code=401, detail="Invalid admin credentials")
 
 @app.post("/register-voter")
-async def register_voter(registration: VoterRegistration):
-    """Register a new voter with face embedding and fraud prevention"""
+async def register_voter(request: Request):
+    """Register a new voter with face embedding and fraud prevention.
+    
+    Accepts the JSON ``VoterRegistration`` body, a multipart form with
+    ``name``, ``email`` and an ``image`` file, or a raw image body with
+    ``?name=&email=`` query parameters. Several frames (JSON ``images`` or
+    repeated ``image`` parts, up to MAX_TEMPLATES_PER_VOTER) enroll the
+    voter with one template per frame.
+    """
     try:
+        values, images_bytes = await read_image_uploads(request, ["name", "email"], MAX_TEMPLATES_PER_VOTER)
+        registration = VoterRegistration(name=values["name"], email=values["email"], image_data="")
+        
         # Check if name already exists
-        if registration.name in face_registry:
+        if voter_store.is_registered(registration.name):
             raise HTTPException(status_code=400, detail=f"Voter with name '{registration.name}' is already registered")
         
-        # Convert base64 image to OpenCV format
-        image = base64_to_opencv_image(registration.image_data)
-        
-        # Extract face embedding
-        embedding = extract_face_embedding(image)
+        # Decode the images and extract the face embeddings on the inference pool
+        embeddings = await run_inference(images_to_embeddings, images_bytes)
+        templates = [embedding for embedding in embeddings if embedding is not None]
         
-        if embedding is None:
+        if not templates:
             raise HTTPException(status_code=400, detail="No face detected in the image")
         
-        # Check for face duplicates (fraud prevention)
-        duplicate_name = check_face_duplicate(embedding)
-        if duplicate_name:
+        centroid = template_centroid(templates)
+        if len(templates) > 1:
+            spread = float((1.0 - normalize_templates(templates) @ centroid).max())
+            if spread > TEMPLATE_CONSISTENCY_THRESHOLD:
+                raise HTTPException(status_code=400, detail="The enrollment images do not all show the same person")
+        
+        # Another request may have registered this name while inference was running
+        if voter_store.is_registered(registration.name):
+            raise HTTPException(status_code=400, detail=f"Voter with name '{registration.name}' is already registered")
+        
+        # Check every template for face duplicates (fraud prevention)
+        with timed("match"):
+            duplicates = [
+                name for name, score in face_gallery.best_matches(np.asarray(templates, dtype=np.float32))
+                if name is not None and score < 0.3
+            ]
+        if duplicates:
             raise HTTPException(
                 status_code=400, 
-                detail=f"This face is already registered under the name '{duplicate_name}'. Each person can only register once."
+                detail=f"This face is already registered under the name '{duplicates[0]}'. Each person can only register once."
             )
         
-        # Save embedding to file
-        user_face_file = os.path.join(face_data_dir, f"{registration.name}.pkl")
-        with open(user_face_file, "wb") as file:
-            pickle.dump([embedding], file)
-        
-        # Add to face registry for fraud prevention
-        face_registry[registration.name] = embedding
-        with open(face_registry_file, "wb") as file:
-            pickle.dump(face_registry, file)
+        # Persist the voter and add them to the gallery for fraud prevention
+        with timed("persist"), face_gallery.updating_store():
+            voter_store.register_voter(registration.name, registration.email, np.asarray(templates, dtype=np.float32))
+            face_gallery.add(registration.name, centroid, templates)
+        for image_bytes in images_bytes:
+            embedding_cache.tag(image_bytes, registration.name)
         
         return {
             "success": True,
             "message": f"Voter {registration.name} registered successfully with biometric verification",
-            "embedding": embedding
+            "embedding": centroid.tolist(),
+            "templates": len(templates)
         }
     
     except HTTPException:
         raise
+    except (ImageDecodeError, VoterAlreadyRegisteredError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Registration failed: {str(e)}")
 
+@app.post("/register-voters/batch")
+async def register_voters_batch(batch: VoterBatchRegistration, admin: str = Depends(get_admin_user)):
+    """Register many voters in one request with a single registry commit (Admin only)"""
+    try:
+        def decode(image_data):
+            try:
+                return base64_to_opencv_image(image_data)
+            except Exception:
+                return None
+        
+        def decode_and_enroll():
+            with ThreadPoolExecutor() as pool:
+                images = list(pool.map(decode, [voter.image_data for voter in batch.voters]))
+            return enroll_voters(
+                [voter.name for voter in batch.voters],
+                images,
+                emails=[voter.email for voter in batch.voters]
+            )
+        
+        # A whole batch can legitimately take longer than the per-request timeout
+        results = await run_inference(decode_and_enroll, timeout=None)
+        registered = sum(1 for result in results if result["success"])
+        logger.info(f"Batch registration: {registered}/{len(results)} voters registered")
+        
+        return {
+            "success": True,
+            "registered": registered,
+            "failed": len(results) - registered,
+            "results": results
+        }
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Batch registration failed: {str(e)}")
+
 @app.post("/authenticate-voter")
-async def authenticate_voter(auth_request: FaceAuthentication):
-    """Authenticate voter using face recognition with enhanced security"""
+async def authenticate_voter(request: Request):
+    """Authenticate voter using face recognition with enhanced security.
+    
+    Accepts the JSON ``FaceAuthentication`` body, a multipart form with an
+    ``image`` file, or a raw image body.
+    """
     try:
-        # Convert base64 image to OpenCV format
-        image = base64_to_opencv_image(auth_request.image_data)
+        _, (image_bytes,) = await read_image_uploads(request, [])
         
-        # Extract face embedding
-        test_embedding = extract_face_embedding(image)
+        # Decode the image and extract the face embedding on the inference pool
+        test_embedding = await run_inference(image_bytes_to_embedding, image_bytes)
         
         if test_embedding is None:
             logger.warning("No face detected in authentication attempt")
             raise HTTPException(status_code=400, detail="No face detected in the image. Please ensure your face is clearly visible and well-lit.")
         
-        # Load all stored embeddings
-        user_embeddings = {}
-        for filename in os.listdir(face_data_dir):
-            if filename.endswith('.pkl'):
-                voter_name = filename.replace(".pkl", "")
-                with open(os.path.join(face_data_dir, filename), "rb") as file:
-                    user_embeddings[voter_name] = pickle.load(file)
-        
-        # Compare with stored embeddings using Cosine Similarity
-        best_match = None
-        best_score = float("inf")
-        
-        for user, embeddings in user_embeddings.items():
-            for stored_embedding in embeddings:
-                score = cosine(test_embedding, stored_embedding)
-                if score < best_score:
-                    best_score = score
-                    best_match = user
-        
-        # Enhanced security: stricter threshold and more detailed logging
-        similarity_threshold = 0.35  # Stricter threshold for better security
-        
-        if best_match and best_score < similarity_threshold:
-            similarity_percentage = 1 - best_score
+        # Compare with the resident gallery using Cosine Similarity
+        with timed("match"):
+            best_match, best_score = face_gallery.best_match(test_embedding)
+        if best_match is not None:
+            embedding_cache.tag(image_bytes, best_match)
+        
+        return authentication_result(best_match, best_score, test_embedding)
+    
+    except HTTPException:
+        raise
+    except ImageDecodeError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Authentication error: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Authentication failed: {str(e)}")
+
+@app.websocket("/ws/authenticate")
+async def authenticate_voter_stream(websocket: WebSocket):
+    """Authenticate from a stream of camera frames sent as binary WebSocket messages.
+    
+    Frames that arrive while one is being processed are dropped, so the
+    server samples the newest frame at most every STREAM_FRAME_INTERVAL_MS.
+    The face box is tracked between frames and only the sharpest crops are
+    embedded. The server answers with ``progress`` messages and a final
+    ``result`` message (the /authenticate-voter response) as soon as the
+    match is confident either way, then closes. The client may send the
+    text message ``end`` to ask for a decision from the frames so far.
+    """
+    await websocket.accept()
+    started = time.perf_counter()
+    session = AuthenticationStream(
+        face_detector, min_sharpness=STREAM_MIN_SHARPNESS, window=STREAM_SELECT_WINDOW,
+        max_embeddings=STREAM_MAX_EMBEDDINGS,
+    )
+    inbox = {"frame": None, "received": 0, "dropped": 0, "ended": False, "disconnected": False}
+    frame_ready = asyncio.Event()
+    
+    async def receive_frames():
+        try:
+            while True:
+                message = await websocket.receive()
+                if message["type"] == "websocket.disconnect":
+                    inbox["disconnected"] = True
+                    break
+                if message.get("text") == "end":
+                    break
+                frame = message.get("bytes")
+                if not frame or len(frame) > STREAM_MAX_FRAME_BYTES:
+                    continue
+                inbox["received"] += 1
+                if inbox["frame"] is not None:
+                    inbox["dropped"] += 1
+                inbox["frame"] = frame
+                frame_ready.set()
+        finally:
+            inbox["ended"] = True
+            frame_ready.set()
+    
+    reader = asyncio.create_task(receive_frames())
+    match = None  # (best_match, best_score, query) for the latest embedding
+    result = None
+    outcome = "result"
+    try:
+        deadline = time.monotonic() + STREAM_MAX_SECONDS
+        flush = False
+        while result is None and not inbox["disconnected"]:
+            out_of_frames = session.frames >= STREAM_MAX_FRAMES or time.monotonic() >= deadline
+            if out_of_frames or (inbox["ended"] and inbox["frame"] is None):
+                if flush:
+                    break
+                # No more frames: embed any sharp crop still waiting for its window to fill
+                flush = True
+                frame_bytes = None
+            elif inbox["frame"] is None:
+                frame_ready.clear()
+                try:
+                    await asyncio.wait_for(frame_ready.wait(), max(0.0, deadline - time.monotonic()))
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            else:
+                frame_bytes, inbox["frame"] = inbox["frame"], None
             
-            # CRITICAL SECURITY CHECK: Has this voter already voted?
-            has_voted = best_match in voted_users
+            frame_started = time.monotonic()
+            try:
+                frame = await run_inference(process_stream_frame, session, frame_bytes, flush)
+            except ImageDecodeError:
+                frame = {"error": "Frame could not be decoded"}
             
-            if has_voted:
-                vote_timestamp = voted_users.get(best_match, 'Unknown time')
-                logger.warning(f"VOTING FRAUD ATTEMPT: {best_match} tried to vote again. Original vote: {vote_timestamp}")
-                return {
+            embedding = frame.pop("embedding", None)
+            if embedding is not None:
+                query = session.add_embedding(embedding)
+                with timed("match"):
+                    best_match, best_score = face_gallery.best_match(query)
+                match = (best_match, best_score, query)
+                confident = best_match is not None and best_score < STREAM_ACCEPT_DISTANCE
+                # Reject early only once a second embedding agrees
+                rejected = len(session.embeddings) >= 2 and (best_match is None or best_score >= STREAM_REJECT_DISTANCE)
+                if confident or rejected or not session.wants_frames:
+                    result = authentication_result(best_match, best_score, query)
+                    break
+            
+            await websocket.send_json({"type": "progress", **frame, **session.stats()})
+            # Sample: frames arriving during this pause replace one another
+            await asyncio.sleep(max(0.0, STREAM_FRAME_INTERVAL_MS / 1000 - (time.monotonic() - frame_started)))
+        
+        if inbox["disconnected"]:
+            outcome = "disconnect"
+            return
+        if result is None:
+            if match is None:
+                result = {
                     "success": False,
-                    "message": f"{best_match} has already voted on {vote_timestamp}",
-                    "voter_name": best_match,
-                    "has_voted": True,
-                    "similarity_score": similarity_percentage,
-                    "fraud_attempt": True
+                    "message": "No clear face detected in the video. Please ensure your face is clearly visible and well-lit.",
+                    "voter_name": None,
+                    "has_voted": False,
+                    "similarity_score": 0
                 }
-            
-            logger.info(f"Voter authenticated: {best_match} (confidence: {similarity_percentage:.2%})")
-            return {
-                "success": True,
-                "message": f"Voter authenticated as {best_match}",
-                "voter_name": best_match,
-                "has_voted": False,
-                "similarity_score": similarity_percentage
-            }
-        else:
-            logger.warning(f"Authentication failed: best match {best_match} with score {best_score} (threshold: {similarity_threshold})")
-            return {
-                "success": False,
-                "message": "Face not recognized. Please ensure you are registered to vote and your face is clearly visible.",
-                "voter_name": None,
-                "has_voted": False,
-                "similarity_score": 0 if not best_match else (1 - best_score)
-            }
+            else:
+                result = authentication_result(*match)
+        await websocket.send_json({
+            "type": "result", **result, **session.stats(),
+            "frames_received": inbox["received"], "frames_dropped": inbox["dropped"],
+        })
+        await websocket.close()
     
+    except WebSocketDisconnect:
+        outcome = "disconnect"
+    except HTTPException as e:
+        # Inference pool saturated or timed out
+        outcome = "error"
+        await websocket.send_json({"type": "error", "detail": e.detail})
+        await websocket.close(code=1013)
     except Exception as e:
-        logger.error(f"Authentication error: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Authentication failed: {str(e)}")
+        outcome = "error"
+        if not inbox["disconnected"]:
+            logger.error(f"Streamed authentication error: {str(e)}")
+            await websocket.close(code=1011)
+    finally:
+        reader.cancel()
+        request_seconds.observe(time.perf_counter() - started, "WS", "/ws/authenticate", outcome)
 
 @app.post("/cast-vote")
 async def cast_vote(vote_request: VoteRequest):
-    """Record a vote with enhanced security checks"""
+    """Record a vote with enhanced security checks.
+    
+    The voter is reserved with an atomic check-and-set in the voter store
+    before the vote is signed, so requests for different voters run fully
+    concurrently while requests for the same voter (in any worker) cannot
+    both get past the double-vote check.
+    """
+    reserved = False
+    submitted = False
     try:
         # CRITICAL SECURITY CHECK: Prevent multiple voting
-        if vote_request.voter_name in voted_users:
-            vote_timestamp = voted_users[vote_request.voter_name]
+        with timed("voted_check"):
+            reserved = await run_in_threadpool(voter_store.reserve_vote, vote_request.voter_name)
+        if not reserved:
             logger.warning(f"FRAUD ATTEMPT: {vote_request.voter_name} tried to vote multiple times")
+            vote_timestamp = await run_in_threadpool(voter_store.get_vote_timestamp, vote_request.voter_name)
+            if vote_timestamp is None:
+                # Another request for this voter is still being recorded
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"SECURITY VIOLATION: a vote for {vote_request.voter_name} is already being recorded. Multiple voting is not allowed."
+                )
             raise HTTPException(
                 status_code=400, 
                 detail=f"SECURITY VIOLATION: {vote_request.voter_name} has already cast their vote on {vote_timestamp}. Multiple voting is not allowed."
             )
         
         # Verify voter is registered
-        if vote_request.voter_name not in face_registry:
+        if not voter_store.is_registered(vote_request.voter_name):
             logger.warning(f"Unregistered voter attempted to vote: {vote_request.voter_name}")
             raise HTTPException(
                 status_code=400,
@@ -397,28 +1227,36 @@ async def cast_vote(vote_request: VoteRequest):
         # Record vote timestamp for security tracking
         vote_timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         
-        # Try to cast vote on blockchain first
-        blockchain_result = blockchain_service.cast_vote(vote_request.voter_name, vote_request.candidate_id)
-        
-        # Record the vote locally (as backup) with detailed logging
-        with open("votes.txt", "a") as file:
-            tx_info = f"tx: {blockchain_result.get('tx_hash', 'failed')}"
-            file.write(f"{vote_timestamp} - {vote_request.voter_name}: {vote_request.candidate_id} ({tx_info})\n")
+        # Sign the vote transaction (does not wait for mining)
+        prepared = await blockchain_service.prepare_vote_async(
+            vote_request.voter_name, vote_request.candidate_id
+        )
+        blockchain_result = prepared.result
         
-        # Mark user as voted with timestamp
-        voted_users[vote_request.voter_name] = vote_timestamp
-        with open(voted_users_file, "wb") as file:
-            pickle.dump(voted_users, file)
+        # Mark the user as voted, queue the transaction in the outbox and back up the
+        # vote in the journal, committed together with concurrent votes
+        commit = vote_committer.submit(((
+            vote_request.voter_name,
+            vote_request.candidate_id,
+            blockchain_result.get("tx_hash"),
+            vote_timestamp
+        ), prepared.outbox_statements))
+        submitted = True
+        commit.add_done_callback(lambda done: settle_vote_commit(done, vote_request.voter_name, prepared))
+        with timed("persist"):
+            # Shielded: a client disconnecting here must not cancel the commit's outcome
+            await asyncio.shield(asyncio.wrap_future(commit))
+        blockchain_service.vote_stored(prepared)
         
         logger.info(f"Vote recorded: {vote_request.voter_name} -> {vote_request.candidate_id} at {vote_timestamp}")
         
         if blockchain_result["success"]:
             return {
                 "success": True,
-                "message": f"Vote recorded successfully for {vote_request.voter_name} on blockchain",
+                "message": f"Vote recorded for {vote_request.voter_name} and submitted to blockchain",
                 "blockchain_result": blockchain_result,
+                "status": blockchain_result["status"],
                 "tx_hash": blockchain_result.get("tx_hash"),
-                "block_number": blockchain_result.get("block_number"),
                 "timestamp": vote_timestamp
             }
         else:
@@ -432,9 +1270,34 @@ async def cast_vote(vote_request: VoteRequest):
     
     except HTTPException:
         raise
+    except VoteAlreadyRecordedError:
+        # A vote was recorded after the reservation was taken (e.g. an expired reservation)
+        logger.warning(f"FRAUD ATTEMPT: {vote_request.voter_name} tried to vote multiple times")
+        raise HTTPException(
+            status_code=400,
+            detail=f"SECURITY VIOLATION: {vote_request.voter_name} has already cast their vote. Multiple voting is not allowed."
+        )
     except Exception as e:
         logger.error(f"Vote recording error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Vote recording failed: {str(e)}")
+    finally:
+        if reserved and not submitted:
+            # Let the voter try again; once the vote is submitted, settle_vote_commit decides
+            voter_store.release_vote(vote_request.voter_name)
+
+def settle_vote_commit(commit: Future, voter_name: str, prepared: PreparedVote):
+    """Undo a submitted vote's reservation and signed transaction if its commit failed.
+    
+    Runs when the commit finishes rather than when the request does, since a
+    vote submitted by a client that then disconnects is still recorded, and
+    its voter must not be free to vote again in the meantime.
+    """
+    if commit.exception() is None:
+        # Recording the vote clears the reservation itself
+        return
+    # Nothing was stored, so the signed transaction must never be sent
+    blockchain_service.discard_vote(voter_name, prepared)
+    voter_store.release_vote(voter_name)
 
 @app.delete("/delete-voter/{voter_name}")
 async def delete_voter(voter_name: str, admin: str = Depends(get_admin_user)):
@@ -442,39 +1305,31 @@ async def delete_voter(voter_name: str, admin: str = Depends(get_admin_user)):
     try:
         deleted_items = []
         
-        # Remove from face registry
-        if voter_name in face_registry:
-            del face_registry[voter_name]
-            with open(face_registry_file, "wb") as file:
-                pickle.dump(face_registry, file)
-            deleted_items.append("face_registry")
+        # Outbox row first, so a queued vote can no longer be put in a batch
+        if blockchain_service.outbox.delete(voter_name):
+            deleted_items.append("blockchain_outbox")
+        elif blockchain_service.outbox.in_flight(voter_name):
+            # Its receipt is still tracked (and its nonce held) through the outbox row
+            raise HTTPException(
+                status_code=409,
+                detail=f"Voter {voter_name} has a vote transaction in flight; retry once it is confirmed or failed"
+            )
         
-        # Remove face embedding file
-        user_face_file = os.path.join(face_data_dir, f"{voter_name}.pkl")
-        if os.path.exists(user_face_file):
-            os.remove(user_face_file)
-            deleted_items.append("face_embedding_file")
-        
-        # Remove from voted users if present
-        if voter_name in voted_users:
-            del voted_users[voter_name]
-            with open(voted_users_file, "wb") as file:
-                pickle.dump(voted_users, file)
+        # Remove the voter and any vote record in one transaction
+        with face_gallery.updating_store():
+            removed = voter_store.delete_voter(voter_name)
+            face_gallery.remove(voter_name)
+        if removed["voter"]:
+            deleted_items.append("face_registry")
+        if removed["vote"]:
             deleted_items.append("vote_record")
         
-        # Remove from votes.txt file
-        if os.path.exists("votes.txt"):
-            with open("votes.txt", "r") as file:
-                lines = file.readlines()
-            
-            # Filter out lines containing the voter name
-            filtered_lines = [line for line in lines if not f"- {voter_name}:" in line]
-            
-            with open("votes.txt", "w") as file:
-                file.writelines(filtered_lines)
-            
-            if len(filtered_lines) < len(lines):
-                deleted_items.append("vote_log")
+        if embedding_cache.invalidate_voter(voter_name):
+            deleted_items.append("embedding_cache")
+        
+        # Tombstone the vote in the vote journal
+        if vote_journal.tombstone(voter_name):
+            deleted_items.append("vote_log")
         
         logger.info(f"Admin deleted voter: {voter_name} (removed: {', '.join(deleted_items)})")
         
@@ -484,37 +1339,50 @@ async def delete_voter(voter_name: str, admin: str = Depends(get_admin_user)):
             "deleted_items": deleted_items
         }
     
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Delete voter error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to delete voter: {str(e)}")
 
 @app.post("/configure-blockchain")
 async def configure_blockchain(config: BlockchainConfig, admin: str = Depends(get_admin_user)):
-    """Configure blockchain connection parameters (Admin only)"""
+    """Configure blockchain connection parameters (Admin only).
+    
+    Only this process would pick the settings up, so with API_WORKERS > 1
+    the endpoint is refused and the environment settings are used instead.
+    """
+    if api_workers > 1:
+        raise HTTPException(
+            status_code=409,
+            detail="Blockchain settings cannot be changed at runtime with API_WORKERS > 1; set BLOCKCHAIN_RPC_URL, "
+                   "CONTRACT_ADDRESS, SIGNER_PRIVATE_KEY and SIGNER_ADDRESS and restart"
+        )
     try:
         blockchain_service.contract_address = config.contract_address
         blockchain_service.rpc_url = config.rpc_url or "https://rpc.sepolia.org"
         blockchain_service.private_key = config.private_key
         blockchain_service.account_address = config.account_address
         
-        blockchain_service.initialize_web3()
+        await run_in_threadpool(blockchain_service.initialize_web3)
         
         return {
             "success": True,
             "message": "Blockchain configuration updated successfully",
-            "connected": blockchain_service.is_connected()
+            "connected": await blockchain_service.is_connected_async()
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Configuration failed: {str(e)}")
 
 @app.get("/blockchain-status")
 async def get_blockchain_status():
-    """Get blockchain connection status"""
+    """Get blockchain connection status (from the cached health probe)"""
     try:
         return {
-            "connected": blockchain_service.is_connected(),
+            "connected": await blockchain_service.is_connected_async(),
             "contract_configured": blockchain_service.contract is not None,
-            "contract_address": blockchain_service.contract_address
+            "contract_address": blockchain_service.contract_address,
+            "rpc": blockchain_service.rpc_status()
         }
     except Exception as e:
         return {
@@ -524,39 +1392,173 @@ async def get_blockchain_status():
             "error": str(e)
         }
 
+def tally_response():
+    """Results payload served from the tally cache"""
+    snapshot = tally_cache.snapshot()
+    return {
+        "success": True,
+        "results": snapshot["results"],
+        "total_votes": snapshot["total_votes"],
+        "block_number": snapshot["block_number"]
+    }
+
 @app.get("/blockchain-results")
-async def get_blockchain_results():
-    """Get voting results from blockchain"""
+async def get_blockchain_results(request: Request):
+    """Get voting results from blockchain (cached; supports If-None-Match)"""
     try:
         if not blockchain_service.contract:
             return {"success": False, "message": "Contract not configured"}
         
-        candidates, vote_counts = blockchain_service.contract.functions.getResults().call()
+        if not tally_cache.ready:
+            # First request after configuration: seed the cache now rather than wait for the poller
+            await run_in_threadpool(vote_event_poller.poll)
         
-        results = {}
-        for i, candidate in enumerate(candidates):
-            results[candidate] = int(vote_counts[i])
+        etag = tally_cache.etag
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=304, headers={"ETag": etag})
         
-        return {
-            "success": True,
-            "results": results,
-            "total_votes": sum(vote_counts)
-        }
+        return JSONResponse(tally_response(), headers={"ETag": etag})
         
     except Exception as e:
         return {"success": False, "message": str(e)}
 
+@app.get("/blockchain-results/stream")
+async def stream_blockchain_results(request: Request):
+    """Server-sent events stream that pushes the results whenever the tally changes"""
+    async def events():
+        version = None
+        idle = 0.0
+        while not await request.is_disconnected():
+            if tally_cache.ready and tally_cache.version != version:
+                version = tally_cache.version
+                idle = 0.0
+                yield f"id: {version}\nevent: results\ndata: {json.dumps(tally_response())}\n\n"
+            elif idle >= 15:
+                # Comment line keeps proxies from closing an idle stream
+                idle = 0.0
+                yield ": keep-alive\n\n"
+            await asyncio.sleep(0.5)
+            idle += 0.5
+    
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+@app.get("/vote-status/{voter_name}")
+async def get_vote_status(voter_name: str):
+    """Get the blockchain submission state of a voter's vote"""
+    vote_timestamp = voter_store.get_vote_timestamp(voter_name)
+    transaction = blockchain_service.outbox.get(voter_name)
+    
+    if vote_timestamp is None and transaction is None:
+        raise HTTPException(status_code=404, detail=f"No vote recorded for {voter_name}")
+    
+    return {
+        "success": True,
+        "voter_name": voter_name,
+        "voted_at": vote_timestamp,
+        "status": transaction["status"] if transaction else "local_only",
+        "tx_hash": transaction["tx_hash"] if transaction else None,
+        "block_number": transaction["block_number"] if transaction else None,
+        "log_index": transaction["log_index"] if transaction else None,
+        "attempts": transaction["attempts"] if transaction else 0,
+        "error": transaction["error"] if transaction else None
+    }
+
+@app.get("/vote-journal")
+async def export_vote_journal(include_deleted: bool = False, admin: str = Depends(get_admin_user)):
+    """Stream the vote journal as JSON lines for audits (Admin only).
+    
+    ``include_deleted`` also returns superseded votes and deletion tombstones.
+    """
+    records = vote_journal.iter_records(include_deleted=include_deleted)
+    # A sync generator is iterated on the threadpool, so file reads do not block the event loop
+    return StreamingResponse(
+        (json.dumps(record) + "\n" for record in records), media_type="application/x-ndjson"
+    )
+
+submitter_lock_fd = None
+
+def acquire_submitter_lock() -> bool:
+    """Elect one worker per host to drain the vote outbox"""
+    global submitter_lock_fd
+    fd = os.open(os.environ.get("VOTER_DB", "securevote.db") + ".submitter.lock", os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        os.close(fd)
+        return False
+    submitter_lock_fd = fd
+    return True
+
+@app.on_event("startup")
+def start_background_workers():
+    # Load and trace the face models without holding up liveness checks
+    models.start_warm_up()
+    if blockchain_service.contract_address:
+        blockchain_service.initialize_web3()
+    if acquire_submitter_lock():
+        blockchain_service.submitter.start()
+        if blockchain_service.batcher is not None:
+            blockchain_service.batcher.start()
+    else:
+        logger.info("Vote submitter running in another worker")
+    vote_event_poller.start()
+
+@app.on_event("shutdown")
+def shutdown_background_workers():
+    if isinstance(face_gallery, QuantizedFaceGallery):
+        version = voter_store.change_version()
+        if version != face_gallery.snapshot_version:
+            # Next start maps the snapshot instead of re-quantizing every voter
+            face_gallery.save(gallery_snapshot_path, version)
+    vote_event_poller.stop()
+    if blockchain_service.batcher is not None:
+        # Votes still queued stay in the outbox and are batched after the restart
+        blockchain_service.batcher.stop()
+    blockchain_service.submitter.stop()
+    inference_executor.shutdown()
+    vote_committer.stop()
+    vote_journal.close()
+
+@app.on_event("shutdown")
+async def close_rpc_sessions():
+    # aiohttp sessions must be closed on the loop that opened them
+    await blockchain_service.close_async()
+
 @app.get("/health")
 async def health_check():
-    """Health check endpoint"""
+    """Liveness check: the API process is up (models may still be loading)"""
     return {"status": "healthy", "message": "SecureVote API is running"}
 
+@app.get("/ready")
+async def readiness_check():
+    """Readiness check: face models are loaded and warmed up"""
+    model_status = models.status()
+    if not models.ready:
+        return JSONResponse(status_code=503, content={"ready": False, "models": model_status})
+    return {"ready": True, "models": model_status}
+
+@app.get("/metrics")
+async def get_metrics():
+    """Prometheus metrics: per-stage latency histograms and queue/gallery gauges"""
+    return Response(metrics_registry.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/inference-stats")
+async def get_inference_stats():
+    """Get inference pool, embedding micro-batch and embedding cache statistics"""
+    return {
+        "success": True,
+        "executor": inference_executor.stats(),
+        "embedding_batcher": embedding_batcher.stats(),
+        "face_detector": face_detector.stats(),
+        "embedding_cache": embedding_cache.stats()
+    }
+
 @app.get("/voter-stats")
 async def get_voter_stats():
     """Get statistics about registered voters and votes cast"""
     try:
-        total_registered = len(face_registry)
-        total_voted = len(voted_users)
+        total_registered = voter_store.voter_count()
+        total_voted = voter_store.vote_count()
         
         return {
             "success": True,
@@ -576,4 +1578,8 @@ if __name__ == "__main__":
     print("Admin credentials: username=admin, password=securevote123")
     print("Frontend should run on: http://localhost:8080")
     print("Backend API available at: http://localhost:8000")
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    if api_workers > 1:
+        # Workers import the app themselves, so it must be passed as a string
+        uvicorn.run("main:app", host="0.0.0.0", port=8000, workers=api_workers)
+    else:
+        uvicorn.run(app, host="0.0.0.0", port=8000)
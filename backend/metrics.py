@@ -0,0 +1,181 @@
+import os
+import time
+import random
+import cProfile
+import threading
+import logging
+from contextlib import ContextDecorator, contextmanager
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Seconds; covers sub-millisecond gallery scans up to multi-second receipt waits
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _format_labels(labels: Tuple[Tuple[str, str], ...], extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+    pairs = labels + extra
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in pairs) + "}"
+
+class Histogram:
+    """Cumulative-bucket histogram with optional labels, in Prometheus' layout"""
+
+    def __init__(self, name: str, help_text: str, labelnames: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = labelnames
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        self._series: Dict[Tuple[str, ...], List] = {}  # labels -> [bucket counts, sum, count]
+
+    def observe(self, value: float, *labels: str):
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+                    break
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = {labels: (list(counts), total, count) for labels, (counts, total, count) in self._series.items()}
+        for labels, (counts, total, count) in sorted(series.items()):
+            label_pairs = tuple(zip(self.labelnames, labels))
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                lines.append(f"{self.name}_bucket{_format_labels(label_pairs, (('le', repr(bound)),))} {cumulative}")
+            lines.append(f"{self.name}_bucket{_format_labels(label_pairs, (('le', '+Inf'),))} {count}")
+            lines.append(f"{self.name}_sum{_format_labels(label_pairs)} {total}")
+            lines.append(f"{self.name}_count{_format_labels(label_pairs)} {count}")
+        return lines
+
+class Gauge:
+    """Gauge whose value is read from a callback at scrape time"""
+
+    def __init__(self, name: str, help_text: str, read: Callable[[], float]):
+        self.name = name
+        self.help_text = help_text
+        self.read = read
+
+    def render(self) -> List[str]:
+        try:
+            value = float(self.read())
+        except Exception as e:
+            logger.warning(f"Gauge {self.name} could not be read: {str(e)}")
+            return []
+        return [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} gauge", f"{self.name} {value}"]
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, object] = {}
+
+    def histogram(self, name: str, help_text: str, labelnames: Tuple[str, ...] = (), **options) -> Histogram:
+        with self._lock:
+            if name not in self._metrics:
+                self._metrics[name] = Histogram(name, help_text, labelnames, **options)
+            return self._metrics[name]
+
+    def gauge(self, name: str, help_text: str, read: Callable[[], float]) -> Gauge:
+        with self._lock:
+            self._metrics[name] = Gauge(name, help_text, read)
+            return self._metrics[name]
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+registry = MetricsRegistry()
+
+stage_seconds = registry.histogram(
+    "securevote_stage_seconds", "Time spent in each request pipeline stage", ("stage",)
+)
+request_seconds = registry.histogram(
+    "securevote_request_seconds", "HTTP request latency by route", ("method", "route", "status")
+)
+
+class timed(ContextDecorator):
+    """Record the duration of a block or function as ``securevote_stage_seconds{stage=...}``.
+
+    Usable as ``with timed("detect"):`` or as a ``@timed("detect")`` decorator.
+    """
+
+    def __init__(self, stage: str, histogram: Histogram = stage_seconds):
+        self.stage = stage
+        self.histogram = histogram
+
+    def __enter__(self):
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(time.perf_counter() - self._started, self.stage)
+        return False
+
+    def _recreate_cm(self):
+        # A fresh timer per decorated call, so concurrent calls do not share a start time
+        return timed(self.stage, self.histogram)
+
+def observe_stage(stage: str, seconds: float):
+    stage_seconds.observe(seconds, stage)
+
+# Sampled cProfile capture for slow work
+PROFILE_SAMPLE_RATE = float(os.environ.get("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_SLOW_MS = float(os.environ.get("PROFILE_SLOW_MS", "1000"))
+PROFILE_DIR = os.environ.get("PROFILE_DIR", "profiles")
+
+# cProfile allows one active profiler per interpreter on recent Pythons
+_profile_lock = threading.Lock()
+
+@contextmanager
+def profiled(name: str, sample_rate: Optional[float] = None, slow_ms: Optional[float] = None):
+    """Profile a sample of calls and keep the ``.prof`` dump when one is slower than ``slow_ms``.
+
+    Profiles only the calling thread, so wrap the work where it actually
+    runs (e.g. inside an inference job). Costs nothing when sampling is
+    off, and never blocks waiting for another profile to finish.
+    """
+    sample_rate = PROFILE_SAMPLE_RATE if sample_rate is None else sample_rate
+    slow_ms = PROFILE_SLOW_MS if slow_ms is None else slow_ms
+    if sample_rate <= 0 or random.random() >= sample_rate or not _profile_lock.acquire(blocking=False):
+        yield
+        return
+
+    profiler = cProfile.Profile()
+    started = time.perf_counter()
+    try:
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        if elapsed_ms >= slow_ms:
+            os.makedirs(PROFILE_DIR, exist_ok=True)
+            path = os.path.join(PROFILE_DIR, f"{name}-{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}.prof")
+            profiler.dump_stats(path)
+            logger.info(f"Slow {name} ({elapsed_ms:.0f} ms) profiled to {path}")
+    finally:
+        _profile_lock.release()
+
+def call_profiled(name: str, fn: Callable, *args):
+    """Call ``fn(*args)`` under ``profiled(name)``; handy for submitting to a thread pool"""
+    with profiled(name):
+        return fn(*args)
@@ -0,0 +1,52 @@
+"""Convert legacy pickle embeddings into the compact quantized gallery format.
+
+Usage (from the backend directory):
+    python migrate_gallery.py --mode int8
+    python migrate_gallery.py --mode float16 --db securevote.db --output face_gallery_snapshot
+
+Reads ``face_embeddings/*.pkl`` and ``face_registry.pkl`` into the SQLite
+voter store (which keeps the exact float32 embeddings used for re-ranking)
+and writes a memory-mappable float16/int8 snapshot that the API loads
+with GALLERY_QUANTIZATION set to the same mode.
+"""
+import argparse
+import os
+import sys
+
+from quantized_gallery import MODES, QuantizedFaceGallery
+from voter_store import SQLiteVoterStore
+
+def file_size(path):
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    if os.path.isdir(path):
+        return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+    return 0
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert pickle embeddings to a quantized gallery snapshot")
+    parser.add_argument("--mode", choices=MODES, default="int8")
+    parser.add_argument("--db", default=os.environ.get("VOTER_DB", "securevote.db"), help="SQLite voter store")
+    parser.add_argument("--output", default="face_gallery_snapshot", help="Snapshot directory")
+    parser.add_argument("--face-data-dir", default="face_embeddings")
+    parser.add_argument("--registry", default="face_registry.pkl")
+    parser.add_argument("--voted-users", default="voted_users.pkl")
+    args = parser.parse_args(argv)
+
+    store = SQLiteVoterStore(args.db)
+    # No-op when the store already imported the pickles
+    store.migrate_from_pickles(args.registry, args.face_data_dir, args.voted_users)
+
+    gallery = QuantizedFaceGallery.from_store(store, mode=args.mode)
+    gallery.save(args.output, store.change_version())
+
+    legacy_bytes = file_size(args.registry) + file_size(args.face_data_dir)
+    snapshot_bytes = file_size(args.output)
+    print(f"Wrote {len(gallery)} voters to {args.output} ({args.mode}, {snapshot_bytes / 1e6:.1f} MB)")
+    if legacy_bytes:
+        print(f"Legacy pickle files: {legacy_bytes / 1e6:.1f} MB")
+    print(f"Start the API with GALLERY_QUANTIZATION={args.mode} GALLERY_SNAPSHOT_PATH={args.output}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,95 @@
+import threading
+import time
+import logging
+import numpy as np
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+class ModelRegistry:
+    """Single, lazily loaded copy of the MTCNN detector and FaceNet embedder.
+
+    Importing this module is cheap: TensorFlow and the model weights are
+    only loaded on first use or by ``start_warm_up``, which also runs a
+    dummy inference so the first real request does not pay for graph
+    tracing. ``ready`` reports whether that has finished.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._detector = None
+        self._embedder = None
+        self._state = "cold"  # cold -> loading -> loaded -> ready, or failed
+        self._error: Optional[str] = None
+        self._load_seconds: Optional[float] = None
+        self._warm_up_seconds: Optional[float] = None
+        self._warm_up_thread = None
+
+    def _load(self):
+        with self._lock:
+            if self._detector is not None:
+                return
+            self._state = "loading"
+            started = time.perf_counter()
+            try:
+                # Heavy imports (TensorFlow) happen here rather than at module import
+                from mtcnn import MTCNN
+                from keras_facenet import FaceNet
+                self._detector = MTCNN()
+                self._embedder = FaceNet()
+            except Exception as e:
+                self._state = "failed"
+                self._error = str(e)
+                raise
+            self._load_seconds = time.perf_counter() - started
+            self._state = "loaded"
+            logger.info(f"Face models loaded in {self._load_seconds:.1f}s")
+
+    @property
+    def detector(self):
+        if self._detector is None:
+            self._load()
+        return self._detector
+
+    @property
+    def embedder(self):
+        if self._embedder is None:
+            self._load()
+        return self._embedder
+
+    def warm_up(self):
+        """Load the models and run one dummy detection and embedding"""
+        try:
+            self._load()
+            started = time.perf_counter()
+            blank = np.zeros((160, 160, 3), dtype=np.uint8)
+            self._detector.detect_faces(blank)
+            self._embedder.embeddings([blank])
+            self._warm_up_seconds = time.perf_counter() - started
+            self._state = "ready"
+            logger.info(f"Face models warmed up in {self._warm_up_seconds:.1f}s")
+        except Exception as e:
+            self._state = "failed"
+            self._error = str(e)
+            logger.error(f"Face model warm-up failed: {str(e)}")
+
+    def start_warm_up(self):
+        """Warm up in a background thread so the API can answer liveness checks meanwhile"""
+        if self._warm_up_thread is None:
+            self._warm_up_thread = threading.Thread(target=self.warm_up, name="model-warm-up", daemon=True)
+            self._warm_up_thread.start()
+
+    @property
+    def ready(self) -> bool:
+        return self._state == "ready"
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "state": self._state,
+            "error": self._error,
+            "load_seconds": self._load_seconds,
+            "warm_up_seconds": self._warm_up_seconds,
+        }
+
+# Shared model instance for every module in the process
+models = ModelRegistry()
@@ -0,0 +1,226 @@
+import os
+import json
+import logging
+import numpy as np
+from typing import Callable, Dict, List, Optional, Tuple
+
+from face_gallery import FaceGallery, EMBEDDING_DIM, normalize_embedding, normalize_templates
+from face_index import ExactIndex
+
+logger = logging.getLogger(__name__)
+
+MODES = ("float16", "int8")
+SNAPSHOT_FORMAT = 1
+
+def quantize(vectors: np.ndarray, mode: str) -> Tuple[np.ndarray, np.ndarray]:
+    """Encode normalized float32 rows as (codes, per-row scales)"""
+    vectors = np.asarray(vectors, dtype=np.float32).reshape(-1, vectors.shape[-1])
+    if mode == "float16":
+        return vectors.astype(np.float16), np.ones(len(vectors), dtype=np.float32)
+    if mode == "int8":
+        scales = np.abs(vectors).max(axis=1) / 127.0
+        scales = np.where(scales > 0, scales, 1.0).astype(np.float32)
+        codes = np.clip(np.rint(vectors / scales[:, None]), -127, 127).astype(np.int8)
+        return codes, scales
+    raise ValueError(f"Unknown gallery quantization mode: {mode}")
+
+class QuantizedFaceGallery(FaceGallery):
+    """FaceGallery holding float16 or int8 codes instead of float32 rows.
+
+    int8 rows use symmetric per-row scales (value = code * scale); float16
+    rows are stored as-is. Searches score every row approximately, take the
+    ``rerank_depth`` best and re-score those exactly in float32 using
+    vectors from ``exact_source`` (normally the voter store), so reported
+    distances are exact. Gallery memory is 1/2 (float16) or about 1/4
+    (int8) of the float32 gallery.
+
+    ``save``/``load`` write a snapshot directory of ``.npy`` files that
+    is memory-mapped on load, so startup does not decode every embedding;
+    the arrays are copied into memory on the first change.
+    """
+
+    def __init__(self, dim: int = EMBEDDING_DIM, capacity: int = 1024, index=None, mode: str = "int8",
+                 exact_source: Optional[Callable[[List[str]], Dict[str, np.ndarray]]] = None,
+                 rerank_depth: int = 32, template_rerank_k: int = 10):
+        if mode not in MODES:
+            raise ValueError(f"Unknown gallery quantization mode: {mode}")
+        if index is not None and not isinstance(index, ExactIndex):
+            logger.warning("Quantized gallery only supports the exact index; ignoring the configured index")
+        super().__init__(dim=dim, capacity=1, index=ExactIndex(), template_rerank_k=template_rerank_k)
+        self.mode = mode
+        self.exact_source = exact_source
+        self.rerank_depth = rerank_depth
+        capacity = max(capacity, 1)
+        self._matrix = np.zeros((capacity, dim), dtype=np.float16 if mode == "float16" else np.int8)
+        self._scales = np.ones(capacity, dtype=np.float32)
+        self.snapshot_version: Optional[int] = None
+
+    @classmethod
+    def from_store(cls, voter_store, dim: int = EMBEDDING_DIM, index=None, mode: str = "int8", **options):
+        """Quantize the embeddings held in a VoterStore, re-ranking against the same store"""
+        gallery = cls(dim=dim, capacity=voter_store.voter_count(), index=index, mode=mode,
+                      exact_source=voter_store.get_embeddings, **options)
+        for name, embedding in voter_store.iter_embeddings():
+            gallery.add(name, embedding)
+        for name, templates in voter_store.iter_templates():
+            if name in gallery._rows:
+                gallery._templates[name] = normalize_templates(templates)
+        return gallery
+
+    @classmethod
+    def open(cls, path: str, voter_store, dim: int = EMBEDDING_DIM, index=None, mode: str = "int8", **options):
+        """Load the snapshot at ``path`` if it matches the store, else rebuild it from the store and save it"""
+        version = voter_store.change_version()
+        gallery = cls.load(path, mode=mode, expected_version=version,
+                           exact_source=voter_store.get_embeddings, **options)
+        if gallery is None:
+            logger.info(f"Rebuilding {mode} gallery snapshot {path} from the voter store")
+            gallery = cls.from_store(voter_store, dim=dim, index=index, mode=mode, **options)
+            gallery.save(path, version)
+        else:
+            for name, templates in voter_store.iter_templates():
+                if name in gallery._rows:
+                    gallery._templates[name] = normalize_templates(templates)
+        return gallery
+
+    @property
+    def matrix(self) -> np.ndarray:
+        """Decoded float32 view of the populated rows (approximate)"""
+        size = len(self._names)
+        return self._matrix[:size].astype(np.float32) * self._scales[:size, None]
+
+    def _ensure_writable(self):
+        # Snapshot arrays are read-only memory maps until the first change
+        if not self._matrix.flags.writeable:
+            self._matrix = np.array(self._matrix)
+            self._scales = np.array(self._scales)
+
+    def _grow(self, min_capacity: int):
+        capacity = self._matrix.shape[0]
+        while capacity < min_capacity:
+            capacity *= 2
+        size = len(self._names)
+        grown = np.zeros((capacity, self.dim), dtype=self._matrix.dtype)
+        grown[:size] = self._matrix[:size]
+        scales = np.ones(capacity, dtype=np.float32)
+        scales[:size] = self._scales[:size]
+        self._matrix, self._scales = grown, scales
+
+    def add(self, name: str, embedding, templates=None) -> int:
+        vector = normalize_embedding(embedding)
+        codes, scales = quantize(vector[None, :], self.mode)
+        with self._lock:
+            self._ensure_writable()
+            if templates is not None and len(templates) > 1:
+                self._templates[name] = normalize_templates(templates)
+            else:
+                self._templates.pop(name, None)
+            row = self._rows.get(name)
+            if row is None:
+                row = len(self._names)
+                if row >= self._matrix.shape[0]:
+                    self._grow(row + 1)
+                self._names.append(name)
+                self._rows[name] = row
+            self._matrix[row] = codes[0]
+            self._scales[row] = scales[0]
+            return row
+
+    def remove(self, name: str) -> bool:
+        with self._lock:
+            self._ensure_writable()
+            row = self._rows.get(name)
+            last = len(self._names) - 1
+            removed = super().remove(name)
+            if removed and row != last:
+                self._scales[row] = self._scales[last]
+            return removed
+
+    def _approximate_scores(self, query: np.ndarray) -> np.ndarray:
+        """Approximate cosine distance to every row, decoded in blocks to bound memory"""
+        size = len(self._names)
+        scores = np.empty(size, dtype=np.float32)
+        block = 65536
+        for start in range(0, size, block):
+            stop = min(size, start + block)
+            similarities = self._matrix[start:stop].astype(np.float32) @ query
+            scores[start:stop] = 1.0 - similarities * self._scales[start:stop]
+        return scores
+
+    def search(self, embedding, k: int = 1) -> List[Tuple[str, float]]:
+        """Return up to ``k`` (voter_name, cosine_distance) pairs, nearest first.
+
+        Candidates come from the quantized scores; their distances are
+        recomputed in float32 when an exact source is available.
+        """
+        query = normalize_embedding(embedding)
+        with self._lock:
+            if not self._names:
+                return []
+            scores = self._approximate_scores(query)
+            depth = min(len(scores), max(k, self.rerank_depth))
+            rows = np.argpartition(scores, depth - 1)[:depth] if depth < len(scores) else np.arange(len(scores))
+            candidates = {self._names[row]: float(scores[row]) for row in rows}
+
+        if self.exact_source is not None:
+            exact = self.exact_source(list(candidates))
+            for name, vector in exact.items():
+                candidates[name] = float(1.0 - normalize_embedding(vector) @ query)
+        ranked = sorted((score, name) for name, score in candidates.items())[:k]
+        return [(name, score) for score, name in ranked]
+
+    def best_matches(self, embeddings) -> List[Tuple[Optional[str], float]]:
+        queries = np.asarray(embeddings, dtype=np.float32).reshape(-1, self.dim)
+        return [self.best_match(query) for query in queries]
+
+    def save(self, path: str, version: int):
+        """Write a snapshot directory; ``version`` is the store's change_version at this state"""
+        os.makedirs(path, exist_ok=True)
+        meta_path = os.path.join(path, "meta.json")
+        # Invalidate first so a crash mid-save leaves no snapshot that looks current
+        if os.path.exists(meta_path):
+            os.remove(meta_path)
+        with self._lock:
+            size = len(self._names)
+            arrays = {
+                "names.npy": np.array(self._names, dtype=str),
+                "codes.npy": np.ascontiguousarray(self._matrix[:size]),
+                "scales.npy": np.ascontiguousarray(self._scales[:size]),
+            }
+            # Write beside and rename: the current arrays may be memory maps of these very files
+            for filename, array in arrays.items():
+                with open(os.path.join(path, filename + ".tmp"), "wb") as file:
+                    np.save(file, array)
+                os.replace(os.path.join(path, filename + ".tmp"), os.path.join(path, filename))
+            meta = {"format": SNAPSHOT_FORMAT, "mode": self.mode, "dim": self.dim, "size": size, "version": version}
+        with open(meta_path + ".tmp", "w") as file:
+            json.dump(meta, file)
+        os.replace(meta_path + ".tmp", meta_path)
+        self.snapshot_version = version
+
+    @classmethod
+    def load(cls, path: str, mode: str = None, expected_version: int = None, **options):
+        """Memory-map a snapshot; None if it is missing, another mode, or stale"""
+        meta_path = os.path.join(path, "meta.json")
+        if not os.path.exists(meta_path):
+            return None
+        with open(meta_path) as file:
+            meta = json.load(file)
+        if meta.get("format") != SNAPSHOT_FORMAT or (mode and meta["mode"] != mode):
+            return None
+        if expected_version is not None and meta["version"] != expected_version:
+            return None
+        if meta["size"] == 0:
+            # Nothing to map; an empty gallery is rebuilt instantly
+            return None
+
+        gallery = cls(dim=meta["dim"], capacity=1, mode=meta["mode"], **options)
+        names = np.load(os.path.join(path, "names.npy"))
+        gallery._matrix = np.load(os.path.join(path, "codes.npy"), mmap_mode="r")
+        gallery._scales = np.load(os.path.join(path, "scales.npy"), mmap_mode="r")
+        gallery._names = names.tolist()
+        gallery._rows = {name: row for row, name in enumerate(gallery._names)}
+        if len(gallery._names) != meta["size"] or len(gallery._matrix) != meta["size"]:
+            return None
+        gallery.snapshot_version = meta["version"]
+        return gallery
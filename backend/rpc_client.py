@@ -0,0 +1,258 @@
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import aiohttp
+import requests
+from requests.adapters import HTTPAdapter
+from web3.providers.async_base import AsyncJSONBaseProvider
+from web3.providers.base import JSONBaseProvider
+from web3.types import RPCEndpoint, RPCResponse
+
+logger = logging.getLogger(__name__)
+
+HEADERS = {"Content-Type": "application/json"}
+
+# Responses worth retrying on another endpoint; a JSON-RPC error reply is not one
+FAILOVER_STATUS_CODES = (429, 500, 502, 503, 504)
+
+def parse_rpc_urls(value: str) -> List[str]:
+    """Comma-separated RPC URLs, primary first"""
+    return [url.strip() for url in value.split(",") if url.strip()]
+
+class RPCEndpoints:
+    """Ordered RPC URLs shared by the sync and async providers.
+
+    Calls go to the current endpoint; on a connection error, timeout or
+    5xx/429 the call is retried on the next one, which becomes current.
+    After ``failback_after`` seconds calls return to the primary.
+    """
+
+    def __init__(self, urls: List[str], failback_after: float = 60.0):
+        if not urls:
+            raise ValueError("At least one RPC URL is required")
+        self.urls = list(urls)
+        self.failback_after = failback_after
+        self._lock = threading.Lock()
+        self._index = 0
+        self._failed_over_at = 0.0
+        self.failovers = 0
+
+    @property
+    def current_index(self) -> int:
+        with self._lock:
+            if self._index and time.monotonic() - self._failed_over_at > self.failback_after:
+                self._index = 0
+            return self._index
+
+    def order(self) -> List[str]:
+        """URLs to try for one call, current endpoint first"""
+        index = self.current_index
+        return self.urls[index:] + self.urls[:index]
+
+    def mark_failed(self, url: str, error: Exception):
+        with self._lock:
+            failed = self.urls.index(url)
+            if len(self.urls) == 1 or failed != self._index:
+                return
+            self._index = (failed + 1) % len(self.urls)
+            self._failed_over_at = time.monotonic()
+            self.failovers += 1
+            index = self._index
+        # Endpoint numbers rather than URLs, which often carry API keys
+        logger.warning(f"RPC endpoint #{failed} failed ({str(error)}); failing over to endpoint #{index}")
+
+class RPCUnavailableError(Exception):
+    """Every configured RPC endpoint failed for one call"""
+
+class PooledHTTPProvider(JSONBaseProvider):
+    """Blocking JSON-RPC over one keep-alive ``requests`` session shared by all threads.
+
+    Holds up to ``pool_size`` open connections per endpoint, bounds every
+    call by ``timeout`` seconds and fails over between ``endpoints``.
+    """
+
+    def __init__(self, endpoints: RPCEndpoints, timeout: float = 10.0, pool_size: int = 16):
+        super().__init__()
+        self.endpoints = endpoints
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=10, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def post(self, payload: bytes) -> bytes:
+        errors = []
+        for url in self.endpoints.order():
+            try:
+                response = self.session.post(url, data=payload, headers=HEADERS, timeout=self.timeout)
+            except requests.RequestException as e:
+                errors.append(e)
+                self.endpoints.mark_failed(url, e)
+                continue
+            if response.status_code in FAILOVER_STATUS_CODES:
+                error = RPCUnavailableError(f"HTTP {response.status_code}")
+                errors.append(error)
+                self.endpoints.mark_failed(url, error)
+                continue
+            response.raise_for_status()
+            return response.content
+        raise RPCUnavailableError(f"All {len(errors)} RPC endpoints failed: {str(errors[-1])}")
+
+    def make_request(self, method: RPCEndpoint, params: Any) -> RPCResponse:
+        return self.decode_rpc_response(self.post(self.encode_rpc_request(method, params)))
+
+    def close(self):
+        self.session.close()
+
+class AsyncPooledHTTPProvider(AsyncJSONBaseProvider):
+    """Non-blocking JSON-RPC for ``AsyncWeb3`` over a keep-alive aiohttp session.
+
+    One session (and connection pool of ``pool_size``) is kept per event
+    loop, since aiohttp sessions cannot be shared between loops. Timeouts
+    and failover behave as in ``PooledHTTPProvider``.
+    """
+
+    def __init__(self, endpoints: RPCEndpoints, timeout: float = 10.0, pool_size: int = 16):
+        super().__init__()
+        self.endpoints = endpoints
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self._lock = threading.Lock()
+        self._sessions: Dict[asyncio.AbstractEventLoop, aiohttp.ClientSession] = {}
+
+    def _session(self) -> aiohttp.ClientSession:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            session = self._sessions.get(loop)
+            if session is None or session.closed:
+                # Forget sessions of loops that have gone away
+                for stale in [other for other in self._sessions if other.is_closed()]:
+                    del self._sessions[stale]
+                session = aiohttp.ClientSession(
+                    connector=aiohttp.TCPConnector(limit=self.pool_size),
+                    timeout=aiohttp.ClientTimeout(total=self.timeout),
+                )
+                self._sessions[loop] = session
+            return session
+
+    async def post(self, payload: bytes) -> bytes:
+        session = self._session()
+        errors = []
+        for url in self.endpoints.order():
+            try:
+                async with session.post(url, data=payload, headers=HEADERS) as response:
+                    status = response.status
+                    body = await response.read()
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                errors.append(e)
+                self.endpoints.mark_failed(url, e)
+                continue
+            if status in FAILOVER_STATUS_CODES:
+                error = RPCUnavailableError(f"HTTP {status}")
+                errors.append(error)
+                self.endpoints.mark_failed(url, error)
+                continue
+            if status >= 400:
+                raise RPCUnavailableError(f"HTTP {status} from RPC endpoint")
+            return body
+        raise RPCUnavailableError(f"All {len(errors)} RPC endpoints failed: {str(errors[-1]) or type(errors[-1]).__name__}")
+
+    async def make_request(self, method: RPCEndpoint, params: Any) -> RPCResponse:
+        return self.decode_rpc_response(await self.post(self.encode_rpc_request(method, params)))
+
+    async def close(self):
+        """Close the session of the running loop (sessions of other loops close with their loop)"""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            session = self._sessions.pop(loop, None)
+        if session is not None:
+            await session.close()
+
+class RPCHealthProbe:
+    """Cached answer to "is the node reachable?".
+
+    At most one ``eth_blockNumber`` probe per ``ttl`` seconds, however many
+    callers poll. ``probe`` returns the head block number (blocking);
+    ``probe_async`` is the awaitable equivalent, and without it async
+    callers run ``probe`` on the default executor. Callers arriving while
+    a probe is in flight wait for its answer instead of probing again.
+    """
+
+    def __init__(self, probe: Callable[[], int], probe_async: Optional[Callable[[], Awaitable[int]]] = None,
+                 ttl: float = 5.0):
+        self.probe = probe
+        self.probe_async = probe_async
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._inflight_lock = threading.Lock()
+        self._inflight: Optional[Future] = None
+        self._healthy = False
+        self._checked_at = 0.0
+        self._block_number: Optional[int] = None
+        self._latency = None
+        self._error: Optional[str] = None
+
+    def _fresh(self) -> bool:
+        return self._checked_at > 0 and time.monotonic() - self._checked_at < self.ttl
+
+    def _record(self, started: float, block_number: Optional[int] = None, error: Optional[Exception] = None):
+        self._healthy = error is None
+        self._block_number = block_number if error is None else self._block_number
+        self._error = str(error) if error is not None else None
+        self._latency = time.monotonic() - started
+        self._checked_at = time.monotonic()
+        if error is not None:
+            logger.warning(f"RPC health probe failed: {str(error)}")
+
+    def check(self) -> bool:
+        with self._lock:
+            if not self._fresh():
+                started = time.monotonic()
+                try:
+                    self._record(started, block_number=self.probe())
+                except Exception as e:
+                    self._record(started, error=e)
+            return self._healthy
+
+    async def check_async(self) -> bool:
+        if self._fresh():
+            return self._healthy
+        if self.probe_async is None:
+            return await asyncio.get_running_loop().run_in_executor(None, self.check)
+        with self._inflight_lock:
+            inflight = self._inflight
+            owner = inflight is None
+            if owner:
+                # A thread-safe future, so callers on other event loops can wait on it too
+                inflight = self._inflight = Future()
+        if not owner:
+            # Shielded so a cancelled waiter cannot cancel the probe others share
+            return await asyncio.shield(asyncio.wrap_future(inflight))
+        started = time.monotonic()
+        try:
+            self._record(started, block_number=await self.probe_async())
+        except Exception as e:
+            self._record(started, error=e)
+        finally:
+            with self._inflight_lock:
+                self._inflight = None
+            if not inflight.done():
+                inflight.set_result(self._healthy)
+        return self._healthy
+
+    def invalidate(self):
+        with self._lock:
+            self._checked_at = 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "healthy": self._healthy,
+            "block_number": self._block_number,
+            "latency_ms": self._latency * 1000.0 if self._latency is not None else None,
+            "age_seconds": time.monotonic() - self._checked_at if self._checked_at else None,
+            "error": self._error,
+        }
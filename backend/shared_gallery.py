@@ -0,0 +1,270 @@
+import fcntl
+import mmap
+import os
+import logging
+import numpy as np
+from contextlib import contextmanager
+from typing import List
+
+from face_gallery import FaceGallery, EMBEDDING_DIM, normalize_templates
+from face_index import ExactIndex
+
+logger = logging.getLogger(__name__)
+
+NAME_BYTES = 128
+HEADER_FIELDS = 6  # magic, generation, size, capacity, dim, store version
+MAGIC = 0x53564741_4C4C5931  # "SVGALLY1"
+NEVER_REBUILT = 2 ** 64 - 1  # store version of a gallery not yet loaded from the store
+CHANGE_LOG_SLOTS = 64  # generations whose changed rows are kept for incremental syncs
+CHANGE_ROWS = 2  # rows recorded per generation; an add writes one, a remove two
+ALL_ROWS = 2 ** 64 - 2  # change-log marker: too many rows changed, reload the name table
+NO_ROW = 2 ** 64 - 1
+HEADER_WORDS = HEADER_FIELDS + CHANGE_LOG_SLOTS * (1 + CHANGE_ROWS)
+
+class SharedFaceGallery(FaceGallery):
+    """FaceGallery whose rows live in memory-mapped files shared by every worker.
+
+    ``<path>.hdr`` holds a generation counter, the row count and capacity,
+    the voter store's ``change_version`` the gallery matches, and a ring
+    of the rows each recent generation changed; ``<path>.names`` holds fixed-width UTF-8 names; ``<path>.f32`` holds
+    the float32 matrix. All workers map the same pages, so the gallery is
+    stored once per host regardless of the number of workers.
+
+    Writers take an exclusive ``flock`` and bump the generation; readers
+    take a shared lock and, when the generation has moved, re-read the
+    header and the changed names before searching. A registration in one worker
+    is therefore visible to all others on their next request.
+
+    Multi-template voters' templates are read from the voter store when a
+    match is re-ranked, so template updates are shared the same way.
+    """
+
+    def __init__(self, path: str, dim: int = EMBEDDING_DIM, capacity: int = 1024, index=None):
+        if index is not None and not isinstance(index, ExactIndex):
+            logger.warning("Shared gallery only supports the exact index; ignoring the configured index")
+        super().__init__(dim=dim, capacity=1, index=ExactIndex())
+        self.path = path
+        self._generation = -1
+        self._mapped_capacity = 0
+        self._lock_depth = 0
+        self._dirty_rows = set()
+        self.voter_store = None
+        self._header_fd = os.open(f"{path}.hdr", os.O_RDWR | os.O_CREAT, 0o644)
+        self._names_fd = os.open(f"{path}.names", os.O_RDWR | os.O_CREAT, 0o644)
+        self._matrix_fd = os.open(f"{path}.f32", os.O_RDWR | os.O_CREAT, 0o644)
+
+        fcntl.flock(self._header_fd, fcntl.LOCK_EX)
+        try:
+            header_bytes = HEADER_WORDS * 8
+            if os.fstat(self._header_fd).st_size < header_bytes:
+                os.ftruncate(self._header_fd, header_bytes)
+                self._map_header()
+                self._header[:HEADER_FIELDS] = [MAGIC, 1, 0, 0, dim, NEVER_REBUILT]
+                self._change_log[:] = NO_ROW
+                self._resize_files(max(capacity, 1))
+            else:
+                self._map_header()
+                if int(self._header[0]) != MAGIC or int(self._header[4]) != dim:
+                    raise ValueError(f"{path}.hdr is not a {dim}-d SecureVote gallery")
+            self._sync()
+        finally:
+            fcntl.flock(self._header_fd, fcntl.LOCK_UN)
+
+    @classmethod
+    def open(cls, path: str, voter_store, dim: int = EMBEDDING_DIM, index=None):
+        """Open the shared gallery, rebuilding it from ``voter_store`` if the store changed since the last rebuild.
+
+        Any insert, update or delete moves the store's version, including
+        re-enrollments that keep the voter's name, so those are caught too.
+        """
+        gallery = cls(path, dim=dim, capacity=max(voter_store.voter_count(), 1024), index=index)
+        gallery.voter_store = voter_store
+        with gallery._shared(exclusive=True):
+            # Read before the rebuild: a change committed meanwhile is rebuilt
+            # now and again at the next open, never missed
+            version = voter_store.change_version()
+            if int(gallery._header[5]) != version:
+                logger.info(f"Rebuilding shared gallery {path} from the voter store")
+                gallery._clear()
+                for name, embedding in voter_store.iter_embeddings():
+                    FaceGallery.add(gallery, name, embedding)
+                gallery._write_names(range(len(gallery._names)))
+                gallery._header[5] = version
+        return gallery
+
+    def _map_header(self):
+        header_map = mmap.mmap(self._header_fd, HEADER_WORDS * 8)
+        words = np.ndarray((HEADER_WORDS,), dtype=np.uint64, buffer=header_map)
+        self._header = words[:HEADER_FIELDS]
+        # One (generation, row, row) entry per slot, indexed by generation
+        self._change_log = words[HEADER_FIELDS:].reshape(CHANGE_LOG_SLOTS, 1 + CHANGE_ROWS)
+
+    def _map_data(self, capacity: int):
+        names_map = mmap.mmap(self._names_fd, capacity * NAME_BYTES)
+        matrix_map = mmap.mmap(self._matrix_fd, capacity * self.dim * 4)
+        self._name_table = np.ndarray((capacity,), dtype=f"S{NAME_BYTES}", buffer=names_map)
+        self._matrix = np.ndarray((capacity, self.dim), dtype=np.float32, buffer=matrix_map)
+        self._mapped_capacity = capacity
+
+    def _resize_files(self, capacity: int):
+        os.ftruncate(self._names_fd, capacity * NAME_BYTES)
+        os.ftruncate(self._matrix_fd, capacity * self.dim * 4)
+        self._header[3] = capacity
+        self._map_data(capacity)
+
+    def _changed_rows(self, generation: int):
+        """Rows written since the local view's generation, or None if the change log no longer covers them"""
+        if self._generation < 0 or generation - self._generation > CHANGE_LOG_SLOTS:
+            return None
+        rows = set()
+        for seen in range(self._generation + 1, generation + 1):
+            entry = self._change_log[seen % CHANGE_LOG_SLOTS]
+            if int(entry[0]) != seen:
+                return None
+            for row in entry[1:].tolist():
+                if row == ALL_ROWS:
+                    return None
+                if row != NO_ROW:
+                    rows.add(row)
+        return rows
+
+    def _sync(self):
+        """Refresh the local view if another worker changed the gallery"""
+        generation = int(self._header[1])
+        if generation == self._generation:
+            return
+        capacity = int(self._header[3])
+        if capacity != self._mapped_capacity:
+            self._map_data(capacity)
+        size = int(self._header[2])
+        changed = self._changed_rows(generation)
+        if changed is None:
+            self._names = [raw.decode("utf-8") for raw in self._name_table[:size].tolist()]
+            self._rows = {name: row for row, name in enumerate(self._names)}
+        else:
+            changed.update(range(size, len(self._names)))
+            for row in changed:
+                if row < len(self._names) and self._rows.get(self._names[row]) == row:
+                    del self._rows[self._names[row]]
+            del self._names[size:]
+            self._names.extend([""] * (size - len(self._names)))
+            for row in changed:
+                if row < size:
+                    name = self._name_table[row].decode("utf-8")
+                    self._names[row] = name
+                    self._rows[name] = row
+        self._generation = generation
+
+    @contextmanager
+    def _shared(self, exclusive: bool = False):
+        with self._lock:
+            if self._lock_depth:
+                # flock is not re-entrant: a nested call would release the outer lock
+                self._lock_depth += 1
+                try:
+                    yield
+                finally:
+                    self._lock_depth -= 1
+                return
+            fcntl.flock(self._header_fd, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            self._lock_depth = 1
+            try:
+                self._sync()
+                yield
+                if exclusive:
+                    generation = int(self._header[1]) + 1
+                    entry = self._change_log[generation % CHANGE_LOG_SLOTS]
+                    rows = sorted(self._dirty_rows)
+                    if len(rows) > CHANGE_ROWS:
+                        rows = [ALL_ROWS]
+                    entry[1:] = rows + [NO_ROW] * (CHANGE_ROWS - len(rows))
+                    entry[0] = generation
+                    self._header[2] = len(self._names)
+                    self._header[1] = generation
+                    self._generation = generation
+            finally:
+                self._dirty_rows.clear()
+                self._lock_depth = 0
+                fcntl.flock(self._header_fd, fcntl.LOCK_UN)
+
+    def _grow(self, min_capacity: int):
+        capacity = self._mapped_capacity
+        while capacity < min_capacity:
+            capacity *= 2
+        self._resize_files(capacity)
+
+    def _clear(self):
+        self._matrix[:len(self._names)] = 0
+        self._names = []
+        self._rows = {}
+
+    def _write_names(self, rows):
+        for row in rows:
+            self._dirty_rows.add(row)
+            if row < len(self._names):
+                encoded = self._names[row].encode("utf-8")
+                if len(encoded) > NAME_BYTES:
+                    raise ValueError(f"Voter name longer than {NAME_BYTES} bytes")
+                self._name_table[row] = encoded
+            else:
+                self._name_table[row] = b""
+
+    def __len__(self):
+        with self._shared():
+            return len(self._names)
+
+    def __contains__(self, name):
+        with self._shared():
+            return name in self._rows
+
+    @property
+    def names(self) -> List[str]:
+        with self._shared():
+            return list(self._names)
+
+    @property
+    def has_templates(self) -> bool:
+        return self.voter_store is not None and self.voter_store.template_voter_count() > 0
+
+    def _templates_for(self, name: str):
+        if self.voter_store is None:
+            return None
+        templates = self.voter_store.get_templates(name)
+        return normalize_templates(templates) if templates is not None else None
+
+    def add(self, name: str, embedding, templates=None) -> int:
+        with self._shared(exclusive=True):
+            row = super().add(name, embedding, templates)
+            self._write_names([row])
+            return row
+
+    def remove(self, name: str) -> bool:
+        with self._shared(exclusive=True):
+            row = self._rows.get(name)
+            last = len(self._names) - 1
+            removed = super().remove(name)
+            if removed:
+                self._write_names([row, last])
+            return removed
+
+    @contextmanager
+    def updating_store(self):
+        """Hold the exclusive lock across a voter store write and the matching gallery update.
+
+        If the gallery matched the store before the write, it matches it
+        after, so the store version in the header is moved along and the
+        next ``open`` does not rebuild.
+        """
+        with self._shared(exclusive=True):
+            current = self.voter_store is not None and int(self._header[5]) == self.voter_store.change_version()
+            yield
+            if current:
+                self._header[5] = self.voter_store.change_version()
+
+    def search(self, embedding, k: int = 1):
+        with self._shared():
+            return super().search(embedding, k)
+
+    def best_matches(self, embeddings):
+        with self._shared():
+            return super().best_matches(embeddings)
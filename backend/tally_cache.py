@@ -0,0 +1,156 @@
+import threading
+import logging
+from typing import Any, Callable, Dict, List, Optional
+
+from web3 import Web3
+
+logger = logging.getLogger(__name__)
+
+VOTE_CAST_TOPIC = Web3.keccak(text="VoteCast(string,string,uint256,bytes32)")
+
+class TallyCache:
+    """In-memory vote tally with a version number for ETags and change streams"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._results: Dict[str, int] = {}
+        self._version = 0
+        self._ready = False
+        self.block_number: Optional[int] = None
+
+    @property
+    def ready(self) -> bool:
+        return self._ready
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    @property
+    def etag(self) -> str:
+        return f'"tally-{self._version}"'
+
+    def seed(self, candidates: List[str], vote_counts: List[int], block_number: Optional[int] = None):
+        """Replace the tally with a full snapshot"""
+        with self._lock:
+            self._results = {candidate: int(count) for candidate, count in zip(candidates, vote_counts)}
+            self.block_number = block_number
+            self._ready = True
+            self._version += 1
+
+    def add_votes(self, candidate_ids: List[str], block_number: Optional[int] = None):
+        """Count votes for the given candidates (one entry per vote)"""
+        with self._lock:
+            for candidate_id in candidate_ids:
+                self._results[candidate_id] = self._results.get(candidate_id, 0) + 1
+            if block_number is not None:
+                self.block_number = block_number
+            if candidate_ids:
+                self._version += 1
+
+    def reset(self):
+        with self._lock:
+            self._results = {}
+            self.block_number = None
+            self._ready = False
+            self._version += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "results": dict(self._results),
+                "total_votes": sum(self._results.values()),
+                "block_number": self.block_number,
+                "version": self._version,
+            }
+
+class VoteEventPoller:
+    """Keeps a TallyCache current from the contract's VoteCast events.
+
+    The cache is seeded from ``getResults()`` at a fixed block and then
+    advanced with ``eth_getLogs`` from the following block. VoteCast
+    indexes candidateId, so logs carry its keccak hash; hashes are mapped
+    back to names using the seeded candidate list, and an unknown hash
+    triggers a re-seed.
+    """
+
+    def __init__(self, cache: TallyCache, get_contract: Callable, poll_interval: float = 5.0,
+                 confirmations: int = 0, max_block_range: int = 2000):
+        self.cache = cache
+        self.get_contract = get_contract
+        self.poll_interval = poll_interval
+        self.confirmations = confirmations
+        self.max_block_range = max_block_range
+        self._candidate_hashes: Dict[bytes, str] = {}
+        self._contract_address = None
+        self._poll_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="vote-event-poller", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=self.poll_interval * 2)
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.poll()
+            except Exception as e:
+                logger.error(f"Vote event polling failed: {str(e)}")
+            self._stop.wait(self.poll_interval)
+
+    def _seed(self, contract, block_number: int):
+        candidates, vote_counts = contract.functions.getResults().call(block_identifier=block_number)
+        self._candidate_hashes = {bytes(Web3.keccak(text=candidate)): candidate for candidate in candidates}
+        self.cache.seed(candidates, vote_counts, block_number)
+        logger.info(f"Tally cache seeded at block {block_number}")
+
+    def poll(self):
+        """Advance the cache to the current head; safe to call from any thread"""
+        with self._poll_lock:
+            self._poll()
+
+    def _poll(self):
+        contract = self.get_contract()
+        if contract is None:
+            if self.cache.ready:
+                self.cache.reset()
+            self._contract_address = None
+            return
+
+        web3 = contract.w3
+        head = web3.eth.block_number - self.confirmations
+        if not self.cache.ready or contract.address != self._contract_address:
+            self._contract_address = contract.address
+            self._seed(contract, head)
+            return
+
+        from_block = self.cache.block_number + 1
+        while from_block <= head:
+            to_block = min(head, from_block + self.max_block_range - 1)
+            logs = web3.eth.get_logs({
+                "address": contract.address,
+                "topics": [VOTE_CAST_TOPIC],
+                "fromBlock": from_block,
+                "toBlock": to_block,
+            })
+            candidate_ids = []
+            for log in logs:
+                candidate_id = self._candidate_hashes.get(bytes(log["topics"][2]))
+                if candidate_id is None:
+                    # A candidate we have not seen: take a fresh snapshot at this range's end
+                    self._seed(contract, to_block)
+                    candidate_ids = None
+                    break
+                candidate_ids.append(candidate_id)
+            if candidate_ids is not None:
+                self.cache.add_votes(candidate_ids, to_block)
+            from_block = to_block + 1
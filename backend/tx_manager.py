@@ -0,0 +1,238 @@
+import heapq
+import sqlite3
+import threading
+import time
+import logging
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+class NonceManager:
+    """Allocates transaction nonces locally for a single signing account.
+
+    The first allocation syncs with the node's pending transaction count;
+    after that nonces are handed out from memory without an RPC. Nonces
+    released by transactions that were never sent are reused first, so a
+    failed vote does not leave a gap that stalls every later transaction.
+    """
+
+    def __init__(self, get_chain_nonce: Callable[[], int], get_floor: Callable[[], Optional[int]] = None):
+        self.get_chain_nonce = get_chain_nonce
+        self.get_floor = get_floor
+        self._lock = threading.Lock()
+        self._next: Optional[int] = None
+        self._released = []
+        self._signer: Optional[str] = None
+
+    def _sync(self):
+        nonce = self.get_chain_nonce()
+        floor = self.get_floor() if self.get_floor else None
+        if floor is not None:
+            nonce = max(nonce, floor)
+        self._next = nonce
+        self._released = [n for n in self._released if n < nonce]
+        heapq.heapify(self._released)
+
+    def allocate(self) -> int:
+        with self._lock:
+            if self._next is None:
+                self._sync()
+            if self._released:
+                return heapq.heappop(self._released)
+            nonce = self._next
+            self._next += 1
+            return nonce
+
+    def release(self, nonce: int):
+        """Return an unused nonce so the next transaction fills the gap"""
+        with self._lock:
+            if self._next is not None and nonce < self._next and nonce not in self._released:
+                heapq.heappush(self._released, nonce)
+
+    def resync(self):
+        """Re-read the chain nonce, e.g. after a 'nonce too low' error"""
+        with self._lock:
+            chain_nonce = self.get_chain_nonce()
+            floor = self.get_floor() if self.get_floor else None
+            nonce = max(chain_nonce, floor) if floor is not None else chain_nonce
+            if self._next is None or nonce > self._next:
+                self._next = nonce
+            # Anything below the chain's count has been consumed on chain
+            self._released = [n for n in self._released if n >= chain_nonce]
+            heapq.heapify(self._released)
+            logger.info(f"Nonce manager resynced, next nonce {self._next}")
+
+    def _resync_quietly(self):
+        try:
+            self.resync()
+        except Exception as e:
+            # The next 'nonce too low' error resyncs again
+            logger.warning(f"Nonce resync failed: {str(e)}")
+
+    def set_signer(self, chain_id: int, account: str):
+        """Allocate for ``account`` on ``chain_id``.
+
+        Nonce state is forgotten only when the signer actually changes; for
+        the same signer (a reconfiguration, or another worker starting) it
+        is resynced with the chain and the outbox instead, since nonces
+        already handed out may not be stored yet.
+        """
+        signer = f"{chain_id}:{account.lower()}"
+        with self._lock:
+            changed = signer != self._signer
+            if changed:
+                self._signer = signer
+                self._next = None
+                self._released = []
+        if not changed:
+            self._resync_quietly()
+
+class SharedNonceManager(NonceManager):
+    """NonceManager whose state lives in SQLite so several worker processes
+    can sign with the same account without colliding on nonces.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS nonce_state (
+            id INTEGER PRIMARY KEY CHECK (id = 0),
+            next_nonce INTEGER NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS released_nonces (
+            nonce INTEGER PRIMARY KEY
+        );
+        CREATE TABLE IF NOT EXISTS nonce_signer (
+            id INTEGER PRIMARY KEY CHECK (id = 0),
+            signer TEXT NOT NULL
+        );
+    """
+
+    def __init__(self, get_chain_nonce: Callable[[], int], db_path: str,
+                 get_floor: Callable[[], Optional[int]] = None):
+        super().__init__(get_chain_nonce, get_floor)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(self.SCHEMA)
+
+    def _transaction(self, work):
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                result = work()
+                self._conn.execute("COMMIT")
+                return result
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def _next_nonce(self) -> Optional[int]:
+        row = self._conn.execute("SELECT next_nonce FROM nonce_state WHERE id = 0").fetchone()
+        return row[0] if row else None
+
+    def _set_next_nonce(self, nonce: int):
+        self._conn.execute(
+            "INSERT INTO nonce_state (id, next_nonce) VALUES (0, ?) "
+            "ON CONFLICT(id) DO UPDATE SET next_nonce = excluded.next_nonce",
+            (nonce,)
+        )
+
+    def _chain_nonce(self) -> int:
+        nonce = self.get_chain_nonce()
+        floor = self.get_floor() if self.get_floor else None
+        return max(nonce, floor) if floor is not None else nonce
+
+    def allocate(self) -> int:
+        def work():
+            row = self._conn.execute("SELECT MIN(nonce) FROM released_nonces").fetchone()
+            if row[0] is not None:
+                self._conn.execute("DELETE FROM released_nonces WHERE nonce = ?", (row[0],))
+                return row[0]
+            nonce = self._next_nonce()
+            if nonce is None:
+                nonce = self._chain_nonce()
+            self._set_next_nonce(nonce + 1)
+            return nonce
+        return self._transaction(work)
+
+    def release(self, nonce: int):
+        def work():
+            next_nonce = self._next_nonce()
+            if next_nonce is not None and nonce < next_nonce:
+                self._conn.execute("INSERT OR IGNORE INTO released_nonces (nonce) VALUES (?)", (nonce,))
+        self._transaction(work)
+
+    def resync(self):
+        chain_nonce = self.get_chain_nonce()
+        floor = self.get_floor() if self.get_floor else None
+        target = max(chain_nonce, floor) if floor is not None else chain_nonce
+
+        def work():
+            next_nonce = self._next_nonce()
+            if next_nonce is None or target > next_nonce:
+                self._set_next_nonce(target)
+            self._conn.execute("DELETE FROM released_nonces WHERE nonce < ?", (chain_nonce,))
+        self._transaction(work)
+        logger.info("Shared nonce manager resynced")
+
+    def set_signer(self, chain_id: int, account: str):
+        signer = f"{chain_id}:{account.lower()}"
+
+        def work():
+            # Checked and reset under the shared write lock, so workers starting
+            # together reset at most once and never after another has allocated
+            row = self._conn.execute("SELECT signer FROM nonce_signer WHERE id = 0").fetchone()
+            if row is not None and row[0] == signer:
+                return False
+            self._conn.execute("DELETE FROM nonce_state")
+            self._conn.execute("DELETE FROM released_nonces")
+            self._conn.execute(
+                "INSERT INTO nonce_signer (id, signer) VALUES (0, ?) "
+                "ON CONFLICT(id) DO UPDATE SET signer = excluded.signer",
+                (signer,)
+            )
+            return True
+        if self._transaction(work):
+            logger.info("Shared nonce state reset for a new signer")
+        else:
+            self._resync_quietly()
+
+class GasPriceOracle:
+    """Caches the node's gas price for ``ttl`` seconds"""
+
+    def __init__(self, get_gas_price: Callable[[], int], ttl: float = 15.0,
+                 multiplier: float = 1.1, fallback: Optional[int] = None):
+        self.get_gas_price = get_gas_price
+        self.ttl = ttl
+        self.multiplier = multiplier
+        self.fallback = fallback
+        self._lock = threading.Lock()
+        self._price: Optional[int] = None
+        self._fetched_at = 0.0
+
+    def get_price(self) -> int:
+        with self._lock:
+            if self._price is None or time.monotonic() - self._fetched_at > self.ttl:
+                try:
+                    self._price = int(self.get_gas_price() * self.multiplier)
+                    self._fetched_at = time.monotonic()
+                except Exception as e:
+                    if self._price is None and self.fallback is None:
+                        raise
+                    logger.warning(f"Gas price refresh failed, using cached/fallback price: {str(e)}")
+                    if self._price is None:
+                        self._price = self.fallback
+                    self._fetched_at = time.monotonic()
+            return self._price
+
+    @property
+    def stale(self) -> bool:
+        return self._price is None or time.monotonic() - self._fetched_at > self.ttl
+
+    def update(self, gas_price: int):
+        """Store a node price fetched elsewhere (e.g. by the async client)"""
+        with self._lock:
+            self._price = int(gas_price * self.multiplier)
+            self._fetched_at = time.monotonic()
+
+    def invalidate(self):
+        with self._lock:
+            self._price = None
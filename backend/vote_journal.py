@@ -0,0 +1,318 @@
+import os
+import json
+import fcntl
+import threading
+import logging
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+def _timestamp() -> str:
+    return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+class VoteJournal:
+    """Append-only JSONL log of votes with an offset index by voter name.
+
+    Each line is a ``vote`` record or a ``delete`` tombstone. An in-memory
+    dict maps every voter with a live vote to the byte offset of that
+    record, so lookups and tombstoning are O(1) (one seek, or one
+    append). The index is checkpointed to a sidecar ``<path>.idx``; on
+    start only the records appended since the checkpoint are scanned.
+    Once superseded and tombstoned records outnumber
+    ``compact_ratio`` x the live ones (and at least
+    ``compact_min_records``), the journal is rewritten with just the live
+    votes.
+
+    Several processes may share one journal: operations take an
+    exclusive ``flock`` on ``<path>.lock``, pick up records other
+    processes appended, and reopen the file after another process
+    compacted it.
+    """
+
+    def __init__(self, path: str = "votes.jsonl", compact_ratio: float = 0.5, compact_min_records: int = 1000,
+                 checkpoint_every: int = 10000, fsync: bool = False):
+        self.path = path
+        self.index_path = path + ".idx"
+        self.compact_ratio = compact_ratio
+        self.compact_min_records = compact_min_records
+        self.checkpoint_every = checkpoint_every
+        self.fsync = fsync
+        self._lock = threading.Lock()
+        self._lock_fd = os.open(path + ".lock", os.O_RDWR | os.O_CREAT, 0o644)
+        self._file = None
+        self._inode = None
+        self._offsets: Dict[str, int] = {}
+        self._size = 0      # bytes of the journal covered by the index
+        self._records = 0   # vote and delete records in the journal
+        self._unsaved = 0   # records appended since the last index checkpoint
+        with self._locked(sync=False):
+            self._open()
+            self._load()
+            if self._needs_compaction():
+                self._compact()
+
+    @contextmanager
+    def _locked(self, sync: bool = True):
+        with self._lock:
+            fcntl.flock(self._lock_fd, fcntl.LOCK_EX)
+            try:
+                if sync:
+                    self._sync()
+                yield
+            finally:
+                fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+
+    def _open(self):
+        if self._file is not None:
+            self._file.close()
+        self._file = open(self.path, "a+b")
+        self._inode = os.fstat(self._file.fileno()).st_ino
+
+    def _reset(self):
+        self._offsets = {}
+        self._size = 0
+        self._records = 0
+
+    def _load(self):
+        """Start from the sidecar index if it belongs to this journal file, then scan what follows it"""
+        self._reset()
+        try:
+            with open(self.index_path) as file:
+                index = json.load(file)
+            if index["inode"] == self._inode and index["size"] <= os.fstat(self._file.fileno()).st_size:
+                self._offsets = index["offsets"]
+                self._size = index["size"]
+                self._records = index["records"]
+        except FileNotFoundError:
+            pass
+        except (ValueError, KeyError) as e:
+            logger.warning(f"Ignoring unreadable vote journal index {self.index_path}: {str(e)}")
+        self._scan()
+
+    def _sync(self):
+        """Catch up with records other processes appended, or reload after they compacted"""
+        try:
+            inode = os.stat(self.path).st_ino
+        except FileNotFoundError:
+            inode = None
+        if inode != self._inode:
+            self._open()
+            self._load()
+        else:
+            self._scan()
+
+    def _scan(self):
+        end = os.fstat(self._file.fileno()).st_size
+        if end == self._size:
+            return
+        if end < self._size:
+            # Truncated underneath us; rebuild from the start
+            self._reset()
+        self._file.seek(self._size)
+        offset = self._size
+        for line in self._file:
+            if not line.endswith(b"\n"):
+                break
+            try:
+                self._apply(json.loads(line), offset)
+            except (ValueError, KeyError):
+                logger.warning(f"Skipping malformed vote journal record at offset {offset}")
+                self._records += 1
+            offset += len(line)
+        self._size = offset
+        if offset < end:
+            # Writers append whole lines under the lock, so a partial line is left over from a crash
+            logger.warning(f"Truncating incomplete vote journal record at offset {offset}")
+            self._file.truncate(offset)
+
+    def _apply(self, record: dict, offset: int):
+        self._records += 1
+        if record.get("op") == "delete":
+            self._offsets.pop(record["voter"], None)
+        else:
+            self._offsets[record["voter"]] = offset
+
+    def _append(self, records: List[dict]) -> List[int]:
+        """Write records with one write (and one fsync); returns their offsets"""
+        lines = [(json.dumps(record, separators=(",", ":")) + "\n").encode("utf-8") for record in records]
+        self._file.write(b"".join(lines))
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+        offsets = []
+        for record, line in zip(records, lines):
+            offsets.append(self._size)
+            self._apply(record, self._size)
+            self._size += len(line)
+        self._unsaved += len(records)
+        if self._unsaved >= self.checkpoint_every:
+            self._write_index()
+        return offsets
+
+    def _read(self, offset: int) -> dict:
+        self._file.seek(offset)
+        return json.loads(self._file.readline())
+
+    def append(self, voter_name: str, candidate_id: str, tx_hash: Optional[str] = None,
+               timestamp: Optional[str] = None) -> int:
+        """Record a vote; returns its byte offset in the journal"""
+        return self.append_many([(voter_name, candidate_id, tx_hash, timestamp)])[0]
+
+    def append_many(self, votes: Iterable[Tuple[str, str, Optional[str], Optional[str]]]) -> List[int]:
+        """Record (voter_name, candidate_id, tx_hash, timestamp) votes with a single write and fsync"""
+        records = [{"op": "vote", "voter": voter_name, "candidate": candidate_id,
+                    "tx_hash": tx_hash, "timestamp": timestamp or _timestamp()}
+                   for voter_name, candidate_id, tx_hash, timestamp in votes]
+        with self._locked():
+            return self._append(records)
+
+    def get(self, voter_name: str) -> Optional[dict]:
+        """The voter's live vote record, or None"""
+        with self._locked():
+            offset = self._offsets.get(voter_name)
+            return self._read(offset) if offset is not None else None
+
+    def __contains__(self, voter_name: str) -> bool:
+        with self._locked():
+            return voter_name in self._offsets
+
+    def __len__(self) -> int:
+        with self._locked():
+            return len(self._offsets)
+
+    def tombstone(self, voter_name: str) -> bool:
+        """Mark the voter's vote deleted; False if they have no live vote"""
+        with self._locked():
+            if voter_name not in self._offsets:
+                return False
+            self._append([{"op": "delete", "voter": voter_name, "timestamp": _timestamp()}])
+            if self._needs_compaction():
+                self._compact()
+            return True
+
+    def iter_records(self, include_deleted: bool = False) -> Iterator[dict]:
+        """Stream records in journal order without loading the journal.
+
+        By default yields only live votes; ``include_deleted`` yields every
+        record, including superseded votes and tombstones, for a full audit
+        trail. Reads a snapshot of the journal as of the call.
+        """
+        with self._locked():
+            end = self._size
+            live = None if include_deleted else set(self._offsets.values())
+            # A separate handle keeps reading this file even if it is compacted meanwhile
+            file = open(self.path, "rb")
+        with file:
+            offset = 0
+            for line in file:
+                if offset >= end:
+                    break
+                if live is None or offset in live:
+                    yield json.loads(line)
+                offset += len(line)
+
+    def _needs_compaction(self) -> bool:
+        garbage = self._records - len(self._offsets)
+        return garbage >= max(self.compact_min_records, self.compact_ratio * len(self._offsets))
+
+    def _compact(self):
+        """Rewrite the journal with only the live votes, in their original order"""
+        compacted_path = self.path + ".compact"
+        offsets = {}
+        position = 0
+        with open(compacted_path, "wb") as out:
+            for voter_name, offset in sorted(self._offsets.items(), key=lambda item: item[1]):
+                self._file.seek(offset)
+                line = self._file.readline()
+                offsets[voter_name] = position
+                out.write(line)
+                position += len(line)
+            out.flush()
+            os.fsync(out.fileno())
+        # Drop the old index first so a crash cannot pair it with the new journal
+        if os.path.exists(self.index_path):
+            os.remove(self.index_path)
+        garbage = self._records - len(offsets)
+        os.replace(compacted_path, self.path)
+        self._open()
+        self._offsets, self._size, self._records = offsets, position, len(offsets)
+        self._write_index()
+        logger.info(f"Compacted vote journal {self.path}: dropped {garbage} records, kept {len(offsets)}")
+
+    def compact(self):
+        with self._locked():
+            self._compact()
+
+    def _write_index(self):
+        index = {"inode": self._inode, "size": self._size, "records": self._records, "offsets": self._offsets}
+        with open(self.index_path + ".tmp", "w") as file:
+            json.dump(index, file)
+        os.replace(self.index_path + ".tmp", self.index_path)
+        self._unsaved = 0
+
+    def checkpoint(self):
+        """Save the offset index so the next start does not rescan the journal"""
+        with self._locked():
+            self._write_index()
+
+    def import_legacy_log(self, path: str = "votes.txt") -> int:
+        """Import an old ``votes.txt`` once, then rename it to ``<path>.imported``.
+
+        Lines look like ``<timestamp> - <voter>: <candidate> (tx: <hash>)``;
+        lines that cannot be parsed are skipped with a warning.
+        """
+        with self._locked():
+            # Checked under the lock: another worker may have just imported it
+            if not os.path.exists(path):
+                return 0
+            records = []
+            with open(path) as file:
+                for line in file:
+                    record = self._parse_legacy_line(line.rstrip("\n"))
+                    if record is not None:
+                        records.append(record)
+                    elif line.strip():
+                        logger.warning(f"Skipping unparseable line in {path}: {line.strip()}")
+            if records:
+                self._append(records)
+            self._write_index()
+            os.replace(path, path + ".imported")
+        logger.info(f"Imported {len(records)} votes from {path} into {self.path}")
+        return len(records)
+
+    @staticmethod
+    def _parse_legacy_line(line: str) -> Optional[dict]:
+        timestamp = None
+        if len(line) > 22 and line[19:22] == " - ":
+            try:
+                datetime.strptime(line[:19], "%Y-%m-%d %H:%M:%S")
+                timestamp, line = line[:19], line[22:]
+            except ValueError:
+                pass
+        if not line.endswith(")") or " (" not in line:
+            return None
+        vote, tx_info = line[:-1].rsplit(" (", 1)
+        if ": " not in vote:
+            return None
+        voter_name, candidate_id = vote.rsplit(": ", 1)
+        tx_hash = tx_info[len("tx: "):] if tx_info.startswith("tx: ") else None
+        if tx_hash in ("failed", "None"):
+            tx_hash = None
+        return {"op": "vote", "voter": voter_name, "candidate": candidate_id,
+                "tx_hash": tx_hash, "timestamp": timestamp or _timestamp()}
+
+    def stats(self) -> Dict[str, int]:
+        with self._locked():
+            return {
+                "live_votes": len(self._offsets),
+                "records": self._records,
+                "bytes": self._size,
+            }
+
+    def close(self):
+        with self._locked():
+            self._write_index()
+            self._file.close()
+        os.close(self._lock_fd)
@@ -0,0 +1,613 @@
+import sqlite3
+import threading
+import time
+import logging
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from eth_abi import decode as abi_decode
+from web3 import Web3
+
+from metrics import Histogram, observe_stage, timed
+from tally_cache import VOTE_CAST_TOPIC
+
+logger = logging.getLogger(__name__)
+
+# Transaction states
+QUEUED = "queued"          # waiting for the batcher to put it in a castVotes transaction
+PENDING = "pending"        # signed and stored; sent (sent_at set) or waiting to be sent
+RETRYING = "retrying"      # last send attempt failed, will be retried
+CONFIRMED = "confirmed"    # mined with status 1
+FAILED = "failed"          # reverted, or gave up after max attempts
+
+VOTE_SKIPPED_TOPIC = Web3.keccak(text="VoteSkipped(string,string)")
+
+def _timestamp() -> str:
+    return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+def batch_vote_results(receipt, voter_names: List[str]) -> Tuple[Dict[str, int], Dict[str, str]]:
+    """Match a castVotes receipt's logs to its voters.
+
+    Returns the log index of each voter's VoteCast event, and the reason
+    for each voter the contract skipped. Indexed string topics hold the
+    keccak hash of the name, so names are matched by hash.
+    """
+    names = {bytes(Web3.keccak(text=name)): name for name in voter_names}
+    log_indexes, skipped = {}, {}
+    for log in receipt["logs"]:
+        topics = [bytes(topic) for topic in log["topics"]]
+        if len(topics) < 2 or topics[1] not in names:
+            continue
+        if topics[0] == VOTE_CAST_TOPIC:
+            log_indexes[names[topics[1]]] = log["logIndex"]
+        elif topics[0] == VOTE_SKIPPED_TOPIC:
+            skipped[names[topics[1]]] = abi_decode(["string"], bytes(log["data"]))[0]
+    return log_indexes, skipped
+
+class VoteOutbox:
+    """Durable queue of signed vote transactions and their on-chain state.
+
+    A vote is either signed alone (``enqueue``) or queued for a castVotes
+    batch (``enqueue_for_batch``). Batched votes share the tx hash, nonce
+    and send state of their ``vote_batches`` row, and record the log index
+    of their VoteCast event once mined. The ``*_statement`` variants return
+    the INSERT instead of running it, so a caller sharing the database can
+    commit the row in the same transaction as its own vote record.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS vote_transactions (
+            voter_name TEXT PRIMARY KEY,
+            candidate_id TEXT NOT NULL,
+            status TEXT NOT NULL,
+            tx_hash TEXT,
+            raw_tx BLOB,
+            nonce INTEGER,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            next_attempt_at REAL NOT NULL DEFAULT 0,
+            sent_at TEXT,
+            block_number INTEGER,
+            error TEXT,
+            created_at TEXT NOT NULL,
+            updated_at TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_vote_transactions_status ON vote_transactions (status);
+        CREATE TABLE IF NOT EXISTS vote_batches (
+            batch_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            status TEXT NOT NULL,
+            tx_hash TEXT,
+            raw_tx BLOB,
+            nonce INTEGER,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            next_attempt_at REAL NOT NULL DEFAULT 0,
+            sent_at TEXT,
+            block_number INTEGER,
+            error TEXT,
+            created_at TEXT NOT NULL,
+            updated_at TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_vote_batches_status ON vote_batches (status);
+    """
+
+    # Added after the first release; created on older databases by _migrate
+    BATCH_COLUMNS = {"batch_id": "INTEGER", "log_index": "INTEGER"}
+
+    COLUMNS = ("voter_name", "candidate_id", "status", "tx_hash", "nonce", "attempts",
+               "sent_at", "block_number", "error", "created_at", "updated_at", "batch_id", "log_index")
+
+    # Batch fields mirrored onto the batch's votes, so /vote-status reads one row
+    SHARED_BATCH_FIELDS = ("status", "tx_hash", "nonce", "attempts", "next_attempt_at",
+                           "sent_at", "block_number", "error")
+
+    def __init__(self, db_path: str = "securevote.db"):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=FULL")
+        self._conn.executescript(self.SCHEMA)
+        self._migrate()
+
+    def _migrate(self):
+        existing = {row[1] for row in self._conn.execute("PRAGMA table_info(vote_transactions)")}
+        with self._conn:
+            for column, column_type in self.BATCH_COLUMNS.items():
+                if column not in existing:
+                    self._conn.execute(f"ALTER TABLE vote_transactions ADD COLUMN {column} {column_type}")
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_vote_transactions_batch ON vote_transactions (batch_id)"
+            )
+
+    @staticmethod
+    def enqueue_statement(voter_name: str, candidate_id: str, tx_hash: str, raw_tx: bytes,
+                          nonce: int) -> Tuple[str, tuple]:
+        now = _timestamp()
+        return (
+            "INSERT INTO vote_transactions "
+            "(voter_name, candidate_id, status, tx_hash, raw_tx, nonce, created_at, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (voter_name, candidate_id, PENDING, tx_hash, raw_tx, nonce, now, now)
+        )
+
+    def enqueue(self, voter_name: str, candidate_id: str, tx_hash: str, raw_tx: bytes, nonce: int):
+        """Store a signed transaction for the background submitter"""
+        with self._lock, self._conn:
+            self._conn.execute(*self.enqueue_statement(voter_name, candidate_id, tx_hash, raw_tx, nonce))
+
+    @staticmethod
+    def enqueue_for_batch_statement(voter_name: str, candidate_id: str, flush_at: float) -> Tuple[str, tuple]:
+        now = _timestamp()
+        return (
+            "INSERT INTO vote_transactions "
+            "(voter_name, candidate_id, status, next_attempt_at, created_at, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (voter_name, candidate_id, QUEUED, flush_at, now, now)
+        )
+
+    def enqueue_for_batch(self, voter_name: str, candidate_id: str, flush_at: float):
+        """Queue an unsigned vote for the batcher, to be batched no later than ``flush_at`` (epoch seconds)"""
+        with self._lock, self._conn:
+            self._conn.execute(*self.enqueue_for_batch_statement(voter_name, candidate_id, flush_at))
+
+    def queued(self, limit: int = 50) -> List[tuple]:
+        """(voter_name, candidate_id, flush_at) for queued votes, earliest deadline first"""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT voter_name, candidate_id, next_attempt_at FROM vote_transactions "
+                "WHERE status = ? ORDER BY next_attempt_at, rowid LIMIT ?",
+                (QUEUED, limit)
+            ).fetchall()
+
+    def create_batch(self, voter_names: List[str], tx_hash: str, raw_tx: bytes, nonce: int) -> Optional[int]:
+        """Store a signed castVotes transaction and move its queued votes under it.
+
+        Returns None, storing nothing, if any of the votes left the queue
+        since it was read (its voter was deleted): the signed transaction
+        would still cast that vote, so the caller re-signs without it.
+        """
+        now = _timestamp()
+        with self._lock, self._conn:
+            batch_id = self._conn.execute(
+                "INSERT INTO vote_batches (status, tx_hash, raw_tx, nonce, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (PENDING, tx_hash, raw_tx, nonce, now, now)
+            ).lastrowid
+            moved = self._conn.executemany(
+                "UPDATE vote_transactions SET status = ?, batch_id = ?, tx_hash = ?, nonce = ?, "
+                "next_attempt_at = 0, updated_at = ? WHERE voter_name = ? AND status = ?",
+                [(PENDING, batch_id, tx_hash, nonce, now, voter_name, QUEUED) for voter_name in voter_names]
+            ).rowcount
+            if moved != len(voter_names):
+                self._conn.rollback()
+                return None
+        return batch_id
+
+    def batch_votes(self, batch_id: int) -> List[tuple]:
+        """(voter_name, candidate_id) for the votes in a batch"""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT voter_name, candidate_id FROM vote_transactions WHERE batch_id = ? ORDER BY rowid",
+                (batch_id,)
+            ).fetchall()
+
+    def batches_due_for_send(self, limit: int = 50) -> List[tuple]:
+        """(batch_id, tx_hash, raw_tx, nonce, attempts) for batches not yet accepted by the node"""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT batch_id, tx_hash, raw_tx, nonce, attempts FROM vote_batches "
+                "WHERE status IN (?, ?) AND sent_at IS NULL AND next_attempt_at <= ? "
+                "ORDER BY nonce LIMIT ?",
+                (PENDING, RETRYING, time.time(), limit)
+            ).fetchall()
+
+    def batches_awaiting_receipt(self, limit: int = 200) -> List[tuple]:
+        """(batch_id, tx_hash, raw_tx, attempts, rebroadcast_at) for sent batches without a receipt yet"""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT batch_id, tx_hash, raw_tx, attempts, next_attempt_at FROM vote_batches "
+                "WHERE status = ? AND sent_at IS NOT NULL ORDER BY sent_at LIMIT ?",
+                (PENDING, limit)
+            ).fetchall()
+
+    def update_batch(self, batch_id: int, **fields):
+        """Update a batch and mirror the shared fields onto its unsettled votes"""
+        fields["updated_at"] = _timestamp()
+        shared = {column: value for column, value in fields.items()
+                  if column in self.SHARED_BATCH_FIELDS or column == "updated_at"}
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"UPDATE vote_batches SET {', '.join(f'{column} = ?' for column in fields)} WHERE batch_id = ?",
+                (*fields.values(), batch_id)
+            )
+            self._conn.execute(
+                f"UPDATE vote_transactions SET {', '.join(f'{column} = ?' for column in shared)} "
+                "WHERE batch_id = ? AND status IN (?, ?)",
+                (*shared.values(), batch_id, PENDING, RETRYING)
+            )
+
+    def settle_batch(self, batch_id: int, block_number: int, log_indexes: Dict[str, int], skipped: Dict[str, str]):
+        """Record a mined batch: votes with a VoteCast log are confirmed, the rest failed"""
+        now = _timestamp()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE vote_batches SET status = ?, block_number = ?, error = NULL, updated_at = ? WHERE batch_id = ?",
+                (CONFIRMED, block_number, now, batch_id)
+            )
+            voter_names = [row[0] for row in self._conn.execute(
+                "SELECT voter_name FROM vote_transactions WHERE batch_id = ?", (batch_id,)
+            )]
+            for voter_name in voter_names:
+                if voter_name in log_indexes:
+                    status, error = CONFIRMED, None
+                else:
+                    status, error = FAILED, skipped.get(voter_name, "No VoteCast event in the batch transaction")
+                self._conn.execute(
+                    "UPDATE vote_transactions SET status = ?, block_number = ?, log_index = ?, error = ?, "
+                    "updated_at = ? WHERE voter_name = ?",
+                    (status, block_number, log_indexes.get(voter_name), error, now, voter_name)
+                )
+
+    def get(self, voter_name: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {', '.join(self.COLUMNS)} FROM vote_transactions WHERE voter_name = ?",
+                (voter_name,)
+            ).fetchone()
+        return dict(zip(self.COLUMNS, row)) if row else None
+
+    def due_for_send(self, limit: int = 50) -> List[tuple]:
+        """(voter_name, candidate_id, tx_hash, raw_tx, nonce, attempts) for transactions not yet accepted by the node"""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT voter_name, candidate_id, tx_hash, raw_tx, nonce, attempts FROM vote_transactions "
+                "WHERE status IN (?, ?) AND sent_at IS NULL AND batch_id IS NULL AND next_attempt_at <= ? "
+                "ORDER BY nonce LIMIT ?",
+                (PENDING, RETRYING, time.time(), limit)
+            ).fetchall()
+
+    def awaiting_receipt(self, limit: int = 200) -> List[tuple]:
+        """(voter_name, candidate_id, tx_hash, raw_tx, attempts, rebroadcast_at) for sent transactions without a receipt yet"""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT voter_name, candidate_id, tx_hash, raw_tx, attempts, next_attempt_at FROM vote_transactions "
+                "WHERE status = ? AND sent_at IS NOT NULL AND batch_id IS NULL ORDER BY sent_at LIMIT ?",
+                (PENDING, limit)
+            ).fetchall()
+
+    def update(self, voter_name: str, **fields):
+        fields["updated_at"] = _timestamp()
+        assignments = ", ".join(f"{column} = ?" for column in fields)
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"UPDATE vote_transactions SET {assignments} WHERE voter_name = ?",
+                (*fields.values(), voter_name)
+            )
+
+    def next_nonce(self) -> Optional[int]:
+        """Nonce following the highest one queued here, or None if the outbox is empty"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT MAX(nonce) FROM (SELECT nonce FROM vote_transactions WHERE status != ? "
+                "UNION ALL SELECT nonce FROM vote_batches WHERE status != ?)", (FAILED, FAILED)
+            ).fetchone()
+        return row[0] + 1 if row[0] is not None else None
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT status, COUNT(*) FROM vote_transactions GROUP BY status"
+            ).fetchall()
+        return dict(rows)
+
+    def in_flight(self, voter_name: str) -> bool:
+        """Whether the voter's vote is signed but not yet mined or failed"""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT 1 FROM vote_transactions WHERE voter_name = ? AND status IN (?, ?)",
+                (voter_name, PENDING, RETRYING)
+            ).fetchone() is not None
+
+    def delete(self, voter_name: str) -> bool:
+        """Delete the voter's row unless its transaction is in flight.
+
+        A signed transaction holds a nonce and may still be mined, so its
+        row stays until the submitter settles it.
+        """
+        with self._lock, self._conn:
+            return self._conn.execute(
+                "DELETE FROM vote_transactions WHERE voter_name = ? AND status NOT IN (?, ?)",
+                (voter_name, PENDING, RETRYING)
+            ).rowcount > 0
+
+class VoteSubmitter:
+    """Background thread that sends queued transactions and polls for receipts.
+
+    ``get_web3`` returns the current Web3 instance (or None while the
+    blockchain is not configured), so reconfiguration takes effect on the
+    next cycle. When a send is rejected for its nonce, ``nonce_manager`` is
+    resynced and ``resign(voter_name, candidate_id)`` re-signs the vote with
+    a fresh nonce, returning (tx_hash, raw_tx, nonce); ``resign_batch(votes)``
+    does the same for a castVotes batch.
+
+    A sent transaction with no receipt after ``rebroadcast_after`` seconds
+    is sent again (then with doubling intervals), since nodes drop
+    transactions from their pool and a dropped one blocks every later
+    nonce. A nonce is handed back to ``nonce_manager`` only when the node
+    explicitly rejected the transaction; after an ambiguous failure (a
+    timeout or lost connection) the transaction may have reached the node,
+    so it is treated as sent and waited on instead.
+    """
+
+    KNOWN_ERRORS = ("already known", "already imported")
+    NONCE_ERRORS = ("nonce too low", "replacement transaction underpriced")
+
+    def __init__(self, outbox: VoteOutbox, get_web3, poll_interval: float = 2.0,
+                 max_attempts: int = 5, retry_backoff: float = 5.0,
+                 nonce_manager=None, resign=None, resign_batch=None, rebroadcast_after: float = 60.0):
+        self.outbox = outbox
+        self.get_web3 = get_web3
+        self.nonce_manager = nonce_manager
+        self.resign = resign
+        self.resign_batch = resign_batch
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.retry_backoff = retry_backoff
+        self.rebroadcast_after = rebroadcast_after
+        self._stop = threading.Event()
+        self._thread = None
+        self._sent_times: Dict[str, float] = {}  # voter_name or batch -> monotonic send time, for receipt_wait
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="vote-submitter", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=self.poll_interval * 2)
+
+    def _run(self):
+        while not self._stop.is_set():
+            web3 = self.get_web3()
+            if web3 is not None:
+                try:
+                    self.send_due(web3)
+                    self.poll_receipts(web3)
+                except Exception as e:
+                    logger.error(f"Vote submitter cycle failed: {str(e)}")
+            self._stop.wait(self.poll_interval)
+
+    def send_due(self, web3):
+        for voter_name, candidate_id, tx_hash, raw_tx, nonce, attempts in self.outbox.due_for_send():
+            self._send(
+                web3, voter_name, tx_hash, raw_tx, nonce, attempts,
+                lambda **fields: self.outbox.update(voter_name, **fields),
+                (lambda: self.resign(voter_name, candidate_id)) if self.resign else None,
+            )
+        for batch_id, tx_hash, raw_tx, nonce, attempts in self.outbox.batches_due_for_send():
+            self._send(
+                web3, f"batch {batch_id}", tx_hash, raw_tx, nonce, attempts,
+                lambda **fields: self.outbox.update_batch(batch_id, **fields),
+                (lambda: self.resign_batch(self.outbox.batch_votes(batch_id))) if self.resign_batch else None,
+            )
+
+    @staticmethod
+    def _rejected_by_node(error: Exception) -> bool:
+        """True if the send was refused outright, so no node holds the transaction"""
+        # web3 raises ValueError for a JSON-RPC error reply; after a timeout or a
+        # dropped connection the node may or may not have received the transaction
+        return isinstance(error, ValueError)
+
+    def _mark_sent(self, update: Callable[..., None], **fields):
+        update(status=PENDING, sent_at=_timestamp(), next_attempt_at=time.time() + self.rebroadcast_after, **fields)
+
+    def _resign(self, label: str, resign: Callable[[], tuple]) -> Dict[str, Any]:
+        if self.nonce_manager:
+            self.nonce_manager.resync()
+        tx_hash, raw_tx, nonce = resign()
+        logger.info(f"Re-signed vote transaction for {label} with nonce {nonce}")
+        return {"tx_hash": tx_hash, "raw_tx": raw_tx, "nonce": nonce}
+
+    def _send(self, web3, label: str, tx_hash: str, raw_tx: bytes, nonce: int, attempts: int,
+              update: Callable[..., None], resign: Optional[Callable[[], tuple]]):
+        """Send one signed transaction (a vote or a batch, named ``label``) and record the outcome via ``update``"""
+        try:
+            with timed("tx_send"):
+                web3.eth.send_raw_transaction(raw_tx)
+        except Exception as e:
+            message = str(e)
+            if any(error in message.lower() for error in self.KNOWN_ERRORS):
+                # The node has the transaction from an earlier attempt
+                self._mark_sent(update)
+                return
+            nonce_error = any(error in message.lower() for error in self.NONCE_ERRORS)
+            if nonce_error and self._receipt(web3, label, tx_hash) is not None:
+                # The nonce went to this very transaction, sent by an attempt whose reply was lost
+                self._mark_sent(update)
+                return
+            attempts += 1
+            if attempts >= self.max_attempts:
+                if not self._rejected_by_node(e):
+                    # Keep the nonce: the transaction may still be mined, so wait for it instead
+                    logger.error(f"Vote transaction for {label} may not have been sent: {message}; waiting for a receipt")
+                    self._mark_sent(update, attempts=attempts, error=message)
+                    return
+                logger.error(f"Giving up on vote transaction for {label}: {message}")
+                update(status=FAILED, attempts=attempts, error=message)
+                if self.nonce_manager and not nonce_error:
+                    self.nonce_manager.release(nonce)
+                return
+            fields = self._resign(label, resign) if resign and nonce_error else {}
+            logger.warning(f"Vote transaction for {label} failed (attempt {attempts}): {message}")
+            update(
+                status=RETRYING,
+                attempts=attempts,
+                error=message,
+                next_attempt_at=time.time() + self.retry_backoff * 2 ** (attempts - 1),
+                **fields
+            )
+            return
+        self._mark_sent(update, attempts=attempts + 1, error=None)
+        self._sent_times[label] = time.monotonic()
+
+    def _rebroadcast(self, web3, label: str, tx_hash: str, raw_tx: bytes, attempts: int,
+                     update: Callable[..., None], resign: Optional[Callable[[], tuple]]):
+        """Send again a transaction that has gone without a receipt, in case the node dropped it"""
+        attempts += 1
+        logger.warning(f"No receipt for vote transaction for {label} yet; sending it again (send {attempts})")
+        try:
+            with timed("tx_send"):
+                web3.eth.send_raw_transaction(raw_tx)
+        except Exception as e:
+            message = str(e)
+            if any(error in message.lower() for error in self.NONCE_ERRORS):
+                if self._receipt(web3, label, tx_hash) is not None:
+                    # Mined since the last poll; the next poll settles it
+                    return
+                # Another transaction took the nonce, so this one can never be mined
+                logger.warning(f"Nonce of vote transaction for {label} was taken by another transaction: {message}")
+                if resign:
+                    update(status=RETRYING, sent_at=None, attempts=0, error=message, next_attempt_at=0,
+                           **self._resign(label, resign))
+                else:
+                    update(status=FAILED, error=message)
+                return
+            if not any(error in message.lower() for error in self.KNOWN_ERRORS):
+                logger.warning(f"Resending vote transaction for {label} failed: {message}")
+        update(attempts=attempts, next_attempt_at=time.time() + self.rebroadcast_after * 2 ** min(attempts - 1, 6))
+
+    def _receipt(self, web3, label: str, tx_hash: str):
+        try:
+            receipt = web3.eth.get_transaction_receipt(tx_hash)
+        except Exception:
+            # TransactionNotFound: not mined yet
+            return None
+        if receipt is not None:
+            sent_time = self._sent_times.pop(label, None)
+            if sent_time is not None:
+                observe_stage("receipt_wait", time.monotonic() - sent_time)
+        return receipt
+
+    def poll_receipts(self, web3):
+        for voter_name, candidate_id, tx_hash, raw_tx, attempts, rebroadcast_at in self.outbox.awaiting_receipt():
+            receipt = self._receipt(web3, voter_name, tx_hash)
+            if receipt is None:
+                if rebroadcast_at <= time.time():
+                    self._rebroadcast(
+                        web3, voter_name, tx_hash, raw_tx, attempts,
+                        lambda **fields: self.outbox.update(voter_name, **fields),
+                        (lambda: self.resign(voter_name, candidate_id)) if self.resign else None,
+                    )
+                continue
+            if receipt.status == 1:
+                self.outbox.update(voter_name, status=CONFIRMED, block_number=receipt.blockNumber)
+                logger.info(f"Vote transaction confirmed for {voter_name} in block {receipt.blockNumber}")
+            else:
+                self.outbox.update(voter_name, status=FAILED, block_number=receipt.blockNumber,
+                                   error="Transaction reverted")
+                logger.error(f"Vote transaction reverted for {voter_name}: {tx_hash}")
+        for batch_id, tx_hash, raw_tx, attempts, rebroadcast_at in self.outbox.batches_awaiting_receipt():
+            receipt = self._receipt(web3, f"batch {batch_id}", tx_hash)
+            if receipt is None:
+                if rebroadcast_at <= time.time():
+                    self._rebroadcast(
+                        web3, f"batch {batch_id}", tx_hash, raw_tx, attempts,
+                        lambda **fields: self.outbox.update_batch(batch_id, **fields),
+                        (lambda: self.resign_batch(self.outbox.batch_votes(batch_id))) if self.resign_batch else None,
+                    )
+                continue
+            if receipt.status == 1:
+                voter_names = [voter_name for voter_name, _ in self.outbox.batch_votes(batch_id)]
+                log_indexes, skipped = batch_vote_results(receipt, voter_names)
+                self.outbox.settle_batch(batch_id, receipt.blockNumber, log_indexes, skipped)
+                logger.info(f"Vote batch {batch_id} confirmed in block {receipt.blockNumber}: "
+                            f"{len(log_indexes)} votes recorded, {len(voter_names) - len(log_indexes)} rejected")
+            else:
+                self.outbox.update_batch(batch_id, status=FAILED, block_number=receipt.blockNumber,
+                                         error="Transaction reverted")
+                logger.error(f"Vote batch {batch_id} reverted: {tx_hash}")
+
+class VoteBatcher:
+    """Background thread that packs queued votes into castVotes transactions.
+
+    A batch is signed as soon as ``max_batch_size`` votes are queued, or
+    once the oldest queued vote has waited ``max_wait`` seconds. It is
+    stored in ``vote_batches`` with its votes moved under it, and the
+    VoteSubmitter sends it like any other transaction. ``sign_batch(votes,
+    nonce)`` signs [(voter_name, candidate_id)] and returns (tx_hash,
+    raw_tx); ``is_ready`` says whether the contract is configured.
+    """
+
+    def __init__(self, outbox: VoteOutbox, sign_batch: Callable, nonce_manager, is_ready: Callable[[], bool],
+                 max_batch_size: int = 50, max_wait: float = 2.0, batch_sizes: Optional[Histogram] = None):
+        self.outbox = outbox
+        self.sign_batch = sign_batch
+        self.nonce_manager = nonce_manager
+        self.is_ready = is_ready
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.batch_sizes = batch_sizes
+        self.check_interval = min(max(max_wait / 4, 0.05), 0.5)
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="vote-batcher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout=10)
+
+    def wake(self):
+        """Check for a full batch now instead of at the next interval"""
+        self._wake.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.flush_due()
+            except Exception as e:
+                logger.error(f"Vote batcher cycle failed: {str(e)}")
+            self._wake.wait(self.check_interval)
+            self._wake.clear()
+
+    def flush_due(self, force: bool = False) -> int:
+        """Sign every full or overdue batch (every queued vote with ``force``); returns the votes batched"""
+        batched = 0
+        while self.is_ready():
+            votes = self.outbox.queued(self.max_batch_size)
+            if not votes:
+                break
+            if len(votes) < self.max_batch_size and not force and votes[0][2] > time.time():
+                break
+            if self._flush([(voter_name, candidate_id) for voter_name, candidate_id, _ in votes]):
+                batched += len(votes)
+        return batched
+
+    def _flush(self, votes: List[Tuple[str, str]]) -> bool:
+        """Sign and store one batch; False if a vote left the queue meanwhile and nothing was stored"""
+        nonce = self.nonce_manager.allocate()
+        try:
+            tx_hash, raw_tx = self.sign_batch(votes, nonce)
+            batch_id = self.outbox.create_batch([voter_name for voter_name, _ in votes], tx_hash, raw_tx, nonce)
+        except Exception:
+            # Hand the nonce to the next transaction so no gap is left on chain
+            self.nonce_manager.release(nonce)
+            raise
+        if batch_id is None:
+            self.nonce_manager.release(nonce)
+            logger.info("Queued votes changed while a batch was signed; re-reading the queue")
+            return False
+        if self.batch_sizes is not None:
+            self.batch_sizes.observe(len(votes))
+        logger.info(f"Signed castVotes batch of {len(votes)} votes with nonce {nonce}")
+        return True
@@ -1,98 +1,86 @@
-
 import os
-import pickle
-from typing import Dict, Set, Any
-from blockchain_service import blockchain_service
+from datetime import datetime
+from typing import Dict, Any, Iterable
+from face_gallery import FaceGallery
+from voter_store import VoterStore, SQLiteVoterStore
+from vote_journal import VoteJournal
 
 # File paths
 face_data_dir = "face_embeddings"
 voted_users_file = "voted_users.pkl"
 face_registry_file = "face_registry.pkl"
-
-# Create directory to store embeddings
-if not os.path.exists(face_data_dir):
-    os.makedirs(face_data_dir)
+voter_db_file = os.environ.get("VOTER_DB", "securevote.db")
+vote_journal_file = os.environ.get("VOTE_JOURNAL", "votes.jsonl")
 
 class VoterService:
-    def __init__(self):
-        self.voted_users = self._load_voted_users()
-        self.face_registry = self._load_face_registry()
-    
-    def _load_voted_users(self) -> Set[str]:
-        """Load voted users from file"""
-        if os.path.exists(voted_users_file):
-            with open(voted_users_file, "rb") as file:
-                return pickle.load(file)
-        return set()
-    
-    def _load_face_registry(self) -> Dict[str, Any]:
-        """Load face registry from file"""
-        if os.path.exists(face_registry_file):
-            with open(face_registry_file, "rb") as file:
-                return pickle.load(file)
-        return {}
+    def __init__(self, store: VoterStore = None, journal: VoteJournal = None):
+        if store is None:
+            store = SQLiteVoterStore(voter_db_file)
+            store.migrate_from_pickles(face_registry_file, face_data_dir, voted_users_file)
+        if journal is None:
+            journal = VoteJournal(vote_journal_file)
+            journal.import_legacy_log("votes.txt")
+        self.store = store
+        self.journal = journal
+        self.face_gallery = FaceGallery.from_store(store)
     
-    def _save_voted_users(self):
-        """Save voted users to file"""
-        with open(voted_users_file, "wb") as file:
-            pickle.dump(self.voted_users, file)
-    
-    def _save_face_registry(self):
-        """Save face registry to file"""
-        with open(face_registry_file, "wb") as file:
-            pickle.dump(self.face_registry, file)
-    
-    def register_voter(self, name: str, embedding: list) -> bool:
+    def register_voter(self, name: str, embedding: list, email: str = None) -> bool:
         """Register a new voter with face embedding"""
-        # Save embedding to file
-        user_face_file = os.path.join(face_data_dir, f"{name}.pkl")
-        with open(user_face_file, "wb") as file:
-            pickle.dump([embedding], file)
+        self.store.register_voter(name, email, embedding)
         
-        # Add to face registry for fraud prevention
-        self.face_registry[name] = embedding
-        self._save_face_registry()
+        # Add to face gallery for fraud prevention
+        self.face_gallery.add(name, embedding)
         return True
     
     def is_voter_registered(self, name: str) -> bool:
         """Check if voter is already registered"""
-        return name in self.face_registry
+        return self.store.is_registered(name)
     
     def load_user_embeddings(self) -> Dict[str, Any]:
         """Load all stored embeddings"""
-        user_embeddings = {}
-        for filename in os.listdir(face_data_dir):
-            if filename.endswith('.pkl'):
-                voter_name = filename.replace(".pkl", "")
-                with open(os.path.join(face_data_dir, filename), "rb") as file:
-                    user_embeddings[voter_name] = pickle.load(file)
-        return user_embeddings
+        return {name: [embedding.tolist()] for name, embedding in self.store.iter_embeddings()}
     
     def has_voted_locally(self, voter_name: str) -> bool:
         """Check if voter has voted locally"""
-        return voter_name in self.voted_users
+        return self.store.has_voted(voter_name)
     
     def has_voted(self, voter_name: str) -> bool:
         """Check if voter has voted (local or blockchain)"""
+        # Imported on use so loading voter data does not pull in web3
+        from blockchain_service import blockchain_service
         local_voted = self.has_voted_locally(voter_name)
         blockchain_voted = blockchain_service.has_voted_on_blockchain(voter_name)
         return local_voted or blockchain_voted
     
+    def reconcile_with_blockchain(self, voter_names: Iterable[str] = None) -> Dict[str, Any]:
+        """Compare local vote records with the chain using batched hasVoted lookups"""
+        from blockchain_service import blockchain_service
+        names = list(voter_names) if voter_names is not None else self.store.voter_names()
+        on_chain = blockchain_service.has_voted_many(names)
+        
+        chain_only = [name for name in names if on_chain.get(name) and not self.store.has_voted(name)]
+        local_only = [name for name in names if not on_chain.get(name) and self.store.has_voted(name)]
+        return {
+            "checked": len(names),
+            "voted_on_chain": sum(1 for name in names if on_chain.get(name)),
+            "chain_only": chain_only,
+            "local_only": local_only
+        }
+    
     def record_vote(self, voter_name: str, candidate_id: str, tx_hash: str = None):
         """Record a vote locally"""
-        # Record the vote locally as backup
-        with open("votes.txt", "a") as file:
-            tx_info = f"tx: {tx_hash}" if tx_hash else "blockchain_failed"
-            file.write(f"{voter_name}: {candidate_id} ({tx_info})\n")
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        
+        # Mark user as voted; this raises for a second vote, before anything is journaled
+        self.store.record_vote(voter_name, candidate_id, tx_hash, timestamp)
         
-        # Mark user as voted
-        self.voted_users.add(voter_name)
-        self._save_voted_users()
+        # Record the vote locally as backup
+        self.journal.append(voter_name, candidate_id, tx_hash, timestamp)
     
     def get_stats(self) -> Dict[str, int]:
         """Get voter statistics"""
-        total_registered = len(self.face_registry)
-        total_voted = len(self.voted_users)
+        total_registered = self.store.voter_count()
+        total_voted = self.store.vote_count()
         
         return {
             "total_registered": total_registered,
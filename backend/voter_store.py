@@ -0,0 +1,477 @@
+import os
+import pickle
+import sqlite3
+import threading
+import time
+import logging
+import numpy as np
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from face_gallery import normalize_templates, template_centroid
+
+logger = logging.getLogger(__name__)
+
+class VoterAlreadyRegisteredError(ValueError):
+    """A registration named a voter that already exists"""
+
+    def __init__(self, name: str):
+        super().__init__(f"Voter with name '{name}' is already registered")
+        self.name = name
+
+class VoteAlreadyRecordedError(ValueError):
+    """A vote was recorded for a voter who already has one"""
+
+    def __init__(self, name: str):
+        super().__init__(f"{name} has already cast their vote")
+        self.name = name
+
+class VoterStore:
+    """Persistence interface for registered voters and cast votes.
+
+    Every write is a per-record operation so its cost does not depend on
+    the size of the voter roll.
+    """
+
+    def register_voter(self, name: str, email: str, embedding) -> None:
+        """Register one new voter; raises VoterAlreadyRegisteredError if the name is taken"""
+        if self.register_voters([(name, email, embedding)]):
+            raise VoterAlreadyRegisteredError(name)
+
+    def register_voters(self, voters: Iterable[Tuple[str, str, Any]]) -> List[str]:
+        """Insert new (name, email, embedding) records in one atomic commit.
+
+        ``embedding`` may be a (k, dim) array of templates, in which case the
+        templates are stored and the voter's embedding is their centroid.
+        Names that are already registered are left untouched and returned;
+        use ``set_templates`` to replace an existing voter's templates.
+        """
+        raise NotImplementedError
+
+    def delete_voter(self, name: str) -> Dict[str, bool]:
+        """Remove a voter and their vote; reports which records existed"""
+        raise NotImplementedError
+
+    def is_registered(self, name: str) -> bool:
+        raise NotImplementedError
+
+    def get_embedding(self, name: str) -> Optional[np.ndarray]:
+        raise NotImplementedError
+
+    def get_embeddings(self, names: List[str]) -> Dict[str, np.ndarray]:
+        """Embeddings for the registered voters among ``names``"""
+        embeddings = {}
+        for name in names:
+            embedding = self.get_embedding(name)
+            if embedding is not None:
+                embeddings[name] = embedding
+        return embeddings
+
+    def iter_embeddings(self) -> Iterator[Tuple[str, np.ndarray]]:
+        raise NotImplementedError
+
+    def change_version(self) -> int:
+        """Counter bumped by every voter insert, update or delete; used to validate gallery snapshots"""
+        raise NotImplementedError
+
+    def deletion_version(self) -> int:
+        """Counter bumped by every voter delete, so each worker process can notice deletions made by another"""
+        raise NotImplementedError
+
+    def get_templates(self, name: str) -> Optional[np.ndarray]:
+        """A voter's (k, dim) templates; single-template voters return their embedding"""
+        raise NotImplementedError
+
+    def set_templates(self, name: str, templates) -> np.ndarray:
+        """Replace a registered voter's templates and centroid; returns the centroid"""
+        raise NotImplementedError
+
+    def iter_templates(self) -> Iterator[Tuple[str, np.ndarray]]:
+        """(name, templates) for every voter with more than one template"""
+        raise NotImplementedError
+
+    def template_voter_count(self) -> int:
+        raise NotImplementedError
+
+    def voter_names(self) -> List[str]:
+        raise NotImplementedError
+
+    def voter_count(self) -> int:
+        raise NotImplementedError
+
+    def record_vote(self, name: str, candidate_id: str, tx_hash: Optional[str], voted_at: str) -> None:
+        self.record_votes([(name, candidate_id, tx_hash, voted_at)])
+
+    def record_votes(self, votes: Iterable[Tuple[str, str, Optional[str], str]],
+                     statements: Iterable[Tuple[str, tuple]] = ()) -> None:
+        """Record (name, candidate_id, tx_hash, voted_at) votes in one atomic commit.
+
+        Also clears the voters' reservations from ``reserve_vote``. A voter
+        who already has a vote fails the whole commit with
+        VoteAlreadyRecordedError; a recorded vote is never overwritten.
+        ``statements`` (sql, params) run in the same transaction, so rows
+        of other tables in the database (the votes' outbox transactions)
+        are committed together with the votes or not at all.
+        """
+        raise NotImplementedError
+
+    def reserve_vote(self, name: str) -> bool:
+        """Atomically claim the right to record ``name``'s vote (compare-and-set).
+
+        False if the voter has already voted or another request holds the
+        reservation. The winner must either record the vote or call
+        ``release_vote``.
+        """
+        raise NotImplementedError
+
+    def release_vote(self, name: str) -> None:
+        """Drop a reservation whose vote was not recorded"""
+        raise NotImplementedError
+
+    def get_vote_timestamp(self, name: str) -> Optional[str]:
+        """Return when ``name`` voted, or None if they have not voted"""
+        raise NotImplementedError
+
+    def has_voted(self, name: str) -> bool:
+        return self.get_vote_timestamp(name) is not None
+
+    def vote_count(self) -> int:
+        raise NotImplementedError
+
+    def iter_votes(self) -> Iterator[Tuple[str, str, Optional[str], str]]:
+        """Every recorded (name, candidate_id, tx_hash, voted_at) vote"""
+        raise NotImplementedError
+
+class SQLiteVoterStore(VoterStore):
+    """VoterStore backed by a single SQLite database in WAL mode.
+
+    Embeddings are stored as float32 BLOBs. The voter name is the primary
+    key of both tables, so lookups and upserts are indexed. Row counts are
+    maintained by triggers so statistics never scan a table.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS voters (
+            name TEXT PRIMARY KEY,
+            email TEXT,
+            embedding BLOB NOT NULL,
+            registered_at TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS votes (
+            voter_name TEXT PRIMARY KEY,
+            candidate_id TEXT NOT NULL,
+            tx_hash TEXT,
+            voted_at TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS vote_reservations (
+            voter_name TEXT PRIMARY KEY,
+            reserved_at REAL NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS voter_templates (
+            voter_name TEXT NOT NULL,
+            position INTEGER NOT NULL,
+            embedding BLOB NOT NULL,
+            PRIMARY KEY (voter_name, position)
+        );
+        CREATE TABLE IF NOT EXISTS meta (
+            key TEXT PRIMARY KEY,
+            value TEXT
+        );
+        CREATE TABLE IF NOT EXISTS counters (
+            name TEXT PRIMARY KEY,
+            value INTEGER NOT NULL
+        );
+        INSERT OR IGNORE INTO counters (name, value) SELECT 'voters', COUNT(*) FROM voters;
+        INSERT OR IGNORE INTO counters (name, value) SELECT 'votes', COUNT(*) FROM votes;
+        INSERT OR IGNORE INTO counters (name, value)
+            SELECT 'template_voters', COUNT(*) FROM voter_templates WHERE position = 0;
+        INSERT OR IGNORE INTO counters (name, value) VALUES ('voter_changes', 0);
+        INSERT OR IGNORE INTO counters (name, value) VALUES ('voter_deletions', 0);
+        CREATE TRIGGER IF NOT EXISTS voters_count_insert AFTER INSERT ON voters
+            BEGIN UPDATE counters SET value = value + 1 WHERE name = 'voters'; END;
+        CREATE TRIGGER IF NOT EXISTS voters_count_delete AFTER DELETE ON voters
+            BEGIN UPDATE counters SET value = value - 1 WHERE name = 'voters'; END;
+        CREATE TRIGGER IF NOT EXISTS voters_change_insert AFTER INSERT ON voters
+            BEGIN UPDATE counters SET value = value + 1 WHERE name = 'voter_changes'; END;
+        CREATE TRIGGER IF NOT EXISTS voters_change_update AFTER UPDATE OF embedding ON voters
+            BEGIN UPDATE counters SET value = value + 1 WHERE name = 'voter_changes'; END;
+        CREATE TRIGGER IF NOT EXISTS voters_change_delete AFTER DELETE ON voters
+            BEGIN UPDATE counters SET value = value + 1 WHERE name = 'voter_changes'; END;
+        CREATE TRIGGER IF NOT EXISTS voters_deletion AFTER DELETE ON voters
+            BEGIN UPDATE counters SET value = value + 1 WHERE name = 'voter_deletions'; END;
+        CREATE TRIGGER IF NOT EXISTS votes_count_insert AFTER INSERT ON votes
+            BEGIN UPDATE counters SET value = value + 1 WHERE name = 'votes'; END;
+        CREATE TRIGGER IF NOT EXISTS votes_count_delete AFTER DELETE ON votes
+            BEGIN UPDATE counters SET value = value - 1 WHERE name = 'votes'; END;
+        CREATE TRIGGER IF NOT EXISTS template_voters_count_insert AFTER INSERT ON voter_templates
+            WHEN NEW.position = 0
+            BEGIN UPDATE counters SET value = value + 1 WHERE name = 'template_voters'; END;
+        CREATE TRIGGER IF NOT EXISTS template_voters_count_delete AFTER DELETE ON voter_templates
+            WHEN OLD.position = 0
+            BEGIN UPDATE counters SET value = value - 1 WHERE name = 'template_voters'; END;
+    """
+
+    def __init__(self, db_path: str = "securevote.db", reservation_ttl: float = 300.0):
+        self.db_path = db_path
+        self.reservation_ttl = reservation_ttl
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=FULL")
+        self._conn.executescript(self.SCHEMA)
+        # Reservations only guard a request in flight, so they skip the fsync per
+        # commit; losing one in a crash cannot admit a second vote, because the
+        # vote row and the outbox row are both keyed by voter name
+        self._reservation_lock = threading.Lock()
+        self._reservation_conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._reservation_conn.execute("PRAGMA synchronous=NORMAL")
+
+    def _write(self, statements: List[Tuple[str, tuple]]):
+        """Run statements in a single transaction"""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                for sql, params in statements:
+                    self._conn.execute(sql, params)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def _read_one(self, sql: str, params: tuple = ()):
+        with self._lock:
+            return self._conn.execute(sql, params).fetchone()
+
+    @staticmethod
+    def _template_statements(name: str, templates: np.ndarray) -> List[Tuple[str, tuple]]:
+        statements = [("DELETE FROM voter_templates WHERE voter_name = ?", (name,))]
+        if len(templates) > 1:
+            statements += [
+                # Skipped if the voter was deleted concurrently, so no orphans are left
+                ("INSERT INTO voter_templates (voter_name, position, embedding) "
+                 "SELECT ?, ?, ? WHERE EXISTS (SELECT 1 FROM voters WHERE name = ?)",
+                 (name, position, template.tobytes(), name))
+                for position, template in enumerate(templates)
+            ]
+        return statements
+
+    def register_voters(self, voters):
+        registered_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        records = []
+        for name, email, embedding in voters:
+            vectors = np.asarray(embedding, dtype=np.float32)
+            templates = vectors.reshape(-1, vectors.shape[-1])
+            if len(templates) > 1:
+                templates = normalize_templates(templates)
+                embedding = template_centroid(templates)
+            records.append((name, email, np.asarray(embedding, dtype=np.float32).reshape(-1), templates))
+
+        conflicts = []
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                for name, email, embedding, templates in records:
+                    inserted = self._conn.execute(
+                        "INSERT INTO voters (name, email, embedding, registered_at) VALUES (?, ?, ?, ?) "
+                        "ON CONFLICT(name) DO NOTHING",
+                        (name, email, embedding.tobytes(), registered_at)
+                    ).rowcount > 0
+                    if not inserted:
+                        # Never overwrite another voter's biometric record
+                        conflicts.append(name)
+                        continue
+                    for sql, params in self._template_statements(name, templates):
+                        self._conn.execute(sql, params)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        if conflicts:
+            logger.warning(f"Skipped {len(conflicts)} registrations of names that are already registered")
+        return conflicts
+
+    def delete_voter(self, name):
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                voter_deleted = self._conn.execute("DELETE FROM voters WHERE name = ?", (name,)).rowcount > 0
+                vote_deleted = self._conn.execute("DELETE FROM votes WHERE voter_name = ?", (name,)).rowcount > 0
+                self._conn.execute("DELETE FROM vote_reservations WHERE voter_name = ?", (name,))
+                self._conn.execute("DELETE FROM voter_templates WHERE voter_name = ?", (name,))
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return {"voter": voter_deleted, "vote": vote_deleted}
+
+    def is_registered(self, name):
+        return self._read_one("SELECT 1 FROM voters WHERE name = ?", (name,)) is not None
+
+    def get_embedding(self, name):
+        row = self._read_one("SELECT embedding FROM voters WHERE name = ?", (name,))
+        return np.frombuffer(row[0], dtype=np.float32) if row else None
+
+    def get_embeddings(self, names):
+        names = list(names)
+        if not names:
+            return {}
+        placeholders = ", ".join("?" * len(names))
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT name, embedding FROM voters WHERE name IN ({placeholders})", names
+            ).fetchall()
+        return {name: np.frombuffer(blob, dtype=np.float32) for name, blob in rows}
+
+    def change_version(self):
+        return self._read_one("SELECT value FROM counters WHERE name = 'voter_changes'")[0]
+
+    def deletion_version(self):
+        return self._read_one("SELECT value FROM counters WHERE name = 'voter_deletions'")[0]
+
+    def iter_embeddings(self):
+        with self._lock:
+            rows = self._conn.execute("SELECT name, embedding FROM voters").fetchall()
+        for name, blob in rows:
+            yield name, np.frombuffer(blob, dtype=np.float32)
+
+    def get_templates(self, name):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT embedding FROM voter_templates WHERE voter_name = ? ORDER BY position", (name,)
+            ).fetchall()
+        if rows:
+            return np.stack([np.frombuffer(row[0], dtype=np.float32) for row in rows])
+        embedding = self.get_embedding(name)
+        return embedding.reshape(1, -1) if embedding is not None else None
+
+    def set_templates(self, name, templates):
+        templates = normalize_templates(templates)
+        centroid = template_centroid(templates)
+        self._write(
+            [("UPDATE voters SET embedding = ? WHERE name = ?", (centroid.tobytes(), name))]
+            + self._template_statements(name, templates)
+        )
+        return centroid
+
+    def iter_templates(self):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT voter_name, embedding FROM voter_templates ORDER BY voter_name, position"
+            ).fetchall()
+        current, templates = None, []
+        for name, blob in rows:
+            if name != current and templates:
+                yield current, np.stack(templates)
+                templates = []
+            current = name
+            templates.append(np.frombuffer(blob, dtype=np.float32))
+        if templates:
+            yield current, np.stack(templates)
+
+    def template_voter_count(self):
+        return self._read_one("SELECT value FROM counters WHERE name = 'template_voters'")[0]
+
+    def voter_names(self):
+        with self._lock:
+            return [row[0] for row in self._conn.execute("SELECT name FROM voters")]
+
+    def voter_count(self):
+        return self._read_one("SELECT value FROM counters WHERE name = 'voters'")[0]
+
+    def record_votes(self, votes, statements=()):
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                for name, candidate_id, tx_hash, voted_at in votes:
+                    inserted = self._conn.execute(
+                        "INSERT INTO votes (voter_name, candidate_id, tx_hash, voted_at) VALUES (?, ?, ?, ?) "
+                        "ON CONFLICT(voter_name) DO NOTHING",
+                        (name, candidate_id, tx_hash, voted_at)
+                    ).rowcount > 0
+                    if not inserted:
+                        raise VoteAlreadyRecordedError(name)
+                    self._conn.execute("DELETE FROM vote_reservations WHERE voter_name = ?", (name,))
+                for sql, params in statements:
+                    self._conn.execute(sql, params)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def reserve_vote(self, name):
+        now = time.time()
+        with self._reservation_lock:
+            # IMMEDIATE takes the write lock before reading, so the check and the
+            # claim see the same state even across processes
+            self._reservation_conn.execute("BEGIN IMMEDIATE")
+            try:
+                # Succeeds only with no vote row and no live reservation (an expired one is taken over)
+                reserved = self._reservation_conn.execute(
+                    "INSERT INTO vote_reservations (voter_name, reserved_at) "
+                    "SELECT ?, ? WHERE NOT EXISTS (SELECT 1 FROM votes WHERE voter_name = ?) "
+                    "ON CONFLICT(voter_name) DO UPDATE SET reserved_at = excluded.reserved_at "
+                    "WHERE vote_reservations.reserved_at < ?",
+                    (name, now, name, now - self.reservation_ttl)
+                ).rowcount == 1
+                self._reservation_conn.execute("COMMIT")
+            except Exception:
+                self._reservation_conn.execute("ROLLBACK")
+                raise
+        return reserved
+
+    def release_vote(self, name):
+        with self._reservation_lock:
+            self._reservation_conn.execute("DELETE FROM vote_reservations WHERE voter_name = ?", (name,))
+
+    def get_vote_timestamp(self, name):
+        row = self._read_one("SELECT voted_at FROM votes WHERE voter_name = ?", (name,))
+        return row[0] if row else None
+
+    def vote_count(self):
+        return self._read_one("SELECT value FROM counters WHERE name = 'votes'")[0]
+
+    def iter_votes(self):
+        with self._lock:
+            rows = self._conn.execute("SELECT voter_name, candidate_id, tx_hash, voted_at FROM votes").fetchall()
+        yield from rows
+
+    def migrate_from_pickles(self, face_registry_file: str, face_data_dir: str, voted_users_file: str):
+        """One-time import of the legacy pickle files into the database"""
+        if self._read_one("SELECT value FROM meta WHERE key = 'pickles_migrated'"):
+            return
+
+        embeddings = {}
+        if os.path.isdir(face_data_dir):
+            for filename in os.listdir(face_data_dir):
+                if filename.endswith('.pkl'):
+                    with open(os.path.join(face_data_dir, filename), "rb") as file:
+                        embeddings[filename[:-len(".pkl")]] = pickle.load(file)[0]
+        if os.path.exists(face_registry_file):
+            with open(face_registry_file, "rb") as file:
+                embeddings.update(pickle.load(file))
+
+        votes = {}
+        if os.path.exists(voted_users_file):
+            with open(voted_users_file, "rb") as file:
+                voted_users = pickle.load(file)
+            # Older files hold a set of names rather than {name: timestamp}
+            if isinstance(voted_users, dict):
+                votes = voted_users
+            else:
+                votes = {name: "Unknown time" for name in voted_users}
+
+        statements = [
+            ("INSERT OR IGNORE INTO voters (name, email, embedding, registered_at) VALUES (?, NULL, ?, ?)",
+             (name, np.asarray(embedding, dtype=np.float32).tobytes(), "migrated"))
+            for name, embedding in embeddings.items()
+        ]
+        statements += [
+            ("INSERT OR IGNORE INTO votes (voter_name, candidate_id, tx_hash, voted_at) VALUES (?, '', NULL, ?)",
+             (name, str(timestamp)))
+            for name, timestamp in votes.items()
+        ]
+        statements.append(("INSERT INTO meta (key, value) VALUES ('pickles_migrated', ?)",
+                           (datetime.now().isoformat(),)))
+        self._write(statements)
+        if embeddings or votes:
+            logger.info(f"Migrated {len(embeddings)} voters and {len(votes)} votes from pickle files")
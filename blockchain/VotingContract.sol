@@ -20,6 +20,7 @@ contract SecureVoting {
     uint256 public totalVotes;
     
     event VoteCast(string indexed voterName, string indexed candidateId, uint256 timestamp, bytes32 txHash);
+    event VoteSkipped(string indexed voterName, string reason);
     event VotingStatusChanged(bool active);
     
     modifier onlyAdmin() {
@@ -52,6 +53,36 @@ contract SecureVoting {
         require(isValidCandidate(_candidateId), "Invalid candidate ID");
         require(bytes(_voterName).length > 0, "Voter name cannot be empty");
         
+        _recordVote(_voterName, _candidateId);
+        return true;
+    }
+    
+    // Casts many votes in one transaction. Invalid votes are skipped with a
+    // VoteSkipped event instead of reverting, so one bad vote cannot sink the batch.
+    function castVotes(string[] memory _voterNames, string[] memory _candidateIds)
+        public
+        votingIsActive
+        returns (uint256 recorded)
+    {
+        require(_voterNames.length == _candidateIds.length, "Voter and candidate lists differ in length");
+        
+        for (uint i = 0; i < _voterNames.length; i++) {
+            if (bytes(_voterNames[i]).length == 0) {
+                emit VoteSkipped(_voterNames[i], "Voter name cannot be empty");
+            } else if (hasVoted[_voterNames[i]]) {
+                emit VoteSkipped(_voterNames[i], "Voter has already cast their vote");
+            } else if (!isValidCandidate(_candidateIds[i])) {
+                emit VoteSkipped(_voterNames[i], "Invalid candidate ID");
+            } else {
+                _recordVote(_voterNames[i], _candidateIds[i]);
+                recorded++;
+            }
+        }
+        
+        return recorded;
+    }
+    
+    function _recordVote(string memory _voterName, string memory _candidateId) internal {
         // Record the vote
         votes[_voterName] = Vote({
             voterName: _voterName,
@@ -68,8 +99,6 @@ contract SecureVoting {
         // Emit event with transaction hash
         bytes32 txHash = keccak256(abi.encodePacked(_voterName, _candidateId, block.timestamp));
         emit VoteCast(_voterName, _candidateId, block.timestamp, txHash);
-        
-        return true;
     }
     
     function isValidCandidate(string memory _candidateId) public view returns (bool) {
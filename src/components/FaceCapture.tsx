@@ -84,6 +84,22 @@ const FaceCapture = ({ onCapture, onCancel, mode, voterData }: FaceCaptureProps)
     return canvas.toDataURL('image/jpeg', 0.6);
   };
 
+  const captureImageAsBlob = (): Promise<Blob | null> => {
+    if (!videoRef.current || !canvasRef.current) return Promise.resolve(null);
+    
+    const canvas = canvasRef.current;
+    const context = canvas.getContext('2d');
+    
+    if (!context) return Promise.resolve(null);
+    
+    canvas.width = 320;
+    canvas.height = 240;
+    context.drawImage(videoRef.current, 0, 0, canvas.width, canvas.height);
+    
+    // Binary JPEG frames for the authentication stream (no base64 overhead)
+    return new Promise(resolve => canvas.toBlob(resolve, 'image/jpeg', 0.7));
+  };
+
   const captureAndProcess = async () => {
     if (backendStatus !== 'online') {
       setStatus('Backend server is offline. Please start the Python FastAPI server.');
@@ -96,27 +112,33 @@ const FaceCapture = ({ onCapture, onCancel, mode, voterData }: FaceCaptureProps)
       if (mode === 'register') {
         setStatus('Processing registration (10-15 seconds)...');
       } else {
-        setStatus('Authenticating face (5-10 seconds)...');
-      }
-      
-      const imageData = captureImageAsBase64();
-      
-      if (!imageData) {
-        throw new Error('Failed to capture image');
+        setStatus('Authenticating face - hold still...');
       }
 
       let result;
       const startTime = Date.now();
       
       if (mode === 'register' && voterData) {
+        const imageData = captureImageAsBase64();
+        
+        if (!imageData) {
+          throw new Error('Failed to capture image');
+        }
+
         result = await faceRecognitionApi.registerVoter({
           name: voterData.name,
           email: voterData.email,
           image_data: imageData
         });
       } else if (mode === 'authenticate') {
-        result = await faceRecognitionApi.authenticateVoter({
-          image_data: imageData
+        result = await faceRecognitionApi.authenticateVoterStream(captureImageAsBlob, (progress) => {
+          if (progress.face === false) {
+            setStatus('Looking for your face...');
+          } else if (progress.sharp === false) {
+            setStatus('Hold still - image is blurry');
+          } else {
+            setStatus(`Verifying face (${progress.embeddings} sample${progress.embeddings === 1 ? '' : 's'})...`);
+          }
         });
       }
 
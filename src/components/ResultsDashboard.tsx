@@ -1,11 +1,28 @@
 
+import { useEffect, useState } from 'react';
 import { useVoting } from '../contexts/VotingContext';
+import { blockchainApi, BlockchainResults } from '../services/blockchainApi';
 import { BarChart, Bar, XAxis, YAxis, CartesianGrid, Tooltip, PieChart, Pie, Cell, ResponsiveContainer } from 'recharts';
 
 const ResultsDashboard = () => {
   const { getResults, getTotalVotes, candidates } = useVoting();
-  const results = getResults();
-  const totalVotes = getTotalVotes();
+  const [chainResults, setChainResults] = useState<BlockchainResults | null>(null);
+
+  // The backend pushes the on-chain tally whenever it changes
+  useEffect(() => blockchainApi.subscribeBlockchainResults(setChainResults), []);
+
+  const chainTally = chainResults?.success ? chainResults.results : undefined;
+  const totalVotes = chainTally ? chainResults?.total_votes ?? 0 : getTotalVotes();
+  const results = chainTally
+    ? candidates.map(candidate => {
+        const votes = chainTally[candidate.id] ?? 0;
+        return {
+          ...candidate,
+          votes,
+          percentage: totalVotes > 0 ? (votes / totalVotes) * 100 : 0
+        };
+      })
+    : getResults();
 
   // Sort results by votes for winner determination
   const sortedResults = [...results].sort((a, b) => b.votes - a.votes);
@@ -232,8 +249,9 @@ const ResultsDashboard = () => {
             <path fillRule="evenodd" d="M10 18a8 8 0 100-16 8 8 0 000 16zm.707-10.293a1 1 0 00-1.414-1.414l-3 3a1 1 0 000 1.414l3 3a1 1 0 001.414-1.414L9.414 11H13a1 1 0 100-2H9.414l1.293-1.293z" clipRule="evenodd" />
           </svg>
           <p className="text-blue-700">
-            <strong>Live Results:</strong> This dashboard updates automatically as new votes are cast. 
-            Refresh the page to see the latest results.
+            <strong>Live Results:</strong> {chainTally
+              ? 'This dashboard shows the on-chain tally and updates automatically as votes are confirmed.'
+              : 'Showing votes cast in this browser until the blockchain results stream is available.'}
           </p>
         </div>
       </div>
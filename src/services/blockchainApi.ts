@@ -81,5 +81,17 @@ export const blockchainApi = {
         message: 'Failed to fetch blockchain results - ensure backend is running'
       };
     }
+  },
+
+  subscribeBlockchainResults(onResults: (results: BlockchainResults) => void): () => void {
+    // Pushed by the backend whenever the tally changes, replacing polling
+    const source = new EventSource(`${API_BASE_URL}/blockchain-results/stream`);
+    source.addEventListener('results', (event) => {
+      onResults(JSON.parse((event as MessageEvent).data));
+    });
+    source.onerror = (error) => {
+      console.error('Blockchain results stream error:', error);
+    };
+    return () => source.close();
   }
 };
@@ -11,6 +11,16 @@ export interface FaceAuthenticationRequest {
   image_data: string;
 }
 
+export interface AuthenticationStreamProgress {
+  type: 'progress';
+  face?: boolean;
+  sharpness?: number;
+  sharp?: boolean;
+  frames_processed: number;
+  frames_with_face: number;
+  embeddings: number;
+}
+
 export interface VoteRequest {
   voter_name: string;
   candidate_id: string;
@@ -63,6 +73,57 @@ export const faceRecognitionApi = {
     }
   },
 
+  authenticateVoterStream(
+    captureFrame: () => Promise<Blob | null>,
+    onProgress?: (progress: AuthenticationStreamProgress) => void,
+    frameIntervalMs = 150
+  ): Promise<ApiResponse<any>> {
+    // Streams camera frames until the backend reaches a confident decision
+    return new Promise((resolve, reject) => {
+      const socket = new WebSocket(`${API_BASE_URL.replace(/^http/, 'ws')}/ws/authenticate`);
+      let timer: number | undefined;
+      let settled = false;
+      const stopSending = () => {
+        if (timer !== undefined) {
+          window.clearInterval(timer);
+          timer = undefined;
+        }
+      };
+
+      socket.onopen = () => {
+        timer = window.setInterval(async () => {
+          const frame = await captureFrame();
+          if (frame && socket.readyState === WebSocket.OPEN) {
+            socket.send(frame);
+          }
+        }, frameIntervalMs);
+      };
+      socket.onmessage = (event) => {
+        const message = JSON.parse(event.data);
+        if (message.type === 'progress') {
+          onProgress?.(message);
+          return;
+        }
+        settled = true;
+        stopSending();
+        if (message.type === 'result') {
+          resolve(message);
+        } else {
+          resolve({ success: false, message: message.detail || 'Authentication failed' });
+        }
+      };
+      socket.onerror = (error) => {
+        console.error('Authentication stream error:', error);
+      };
+      socket.onclose = () => {
+        stopSending();
+        if (!settled) {
+          reject(new Error('Failed to authenticate voter'));
+        }
+      };
+    });
+  },
+
   async castVote(data: VoteRequest): Promise<ApiResponse<any>> {
     try {
       const response = await fetch(`${API_BASE_URL}/cast-vote`, {